@@ -1,4 +1,8 @@
 import logging
+import threading
+
+from auth.cache_consultas import CacheConsultas, CacheConsultasAsync
+from config.configuraciones import TAMANIO_POOL_HTTP
 
 # Obtiene el logger para este módulo
 logger = logging.getLogger(__name__)
@@ -8,11 +12,281 @@ class ClienteAzure:
     """
     Una clase para gestionar un cliente de Azure.
 
+    Crea bajo demanda un único cliente de Compute, uno de Red y uno de
+    Recursos por suscripción.
+    Todos los clientes comparten la misma sesión HTTP, de modo que las
+    conexiones TLS se reutilizan entre llamadas. La sesión se cierra con
+    cerrar().
+    La caché de consultas (cache) guarda durante la ejecución los recursos
+    que no cambian, como la subred o la clave SSH.
+
     Args:
         credencial (object): La credencial de autenticación de Azure.
         id_suscripcion (str): El ID de la suscripción de Azure.
+        tamanio_pool (int): Conexiones HTTP máximas por host en la sesión.
+    """
+
+    def __init__(self, credencial, id_suscripcion, tamanio_pool=TAMANIO_POOL_HTTP):
+        self.credencial = credencial
+        self.id_suscripcion = id_suscripcion
+        self.tamanio_pool = tamanio_pool
+        self.clientes_creados = 0
+        self.cache = CacheConsultas()
+
+        self._bloqueo = threading.Lock()
+        self._clientes = {}
+        self._sesion = None
+        self._adaptador = None
+
+    def _obtener_sesion(self):
+        """
+        Crea la sesión HTTP compartida. Debe llamarse con el bloqueo tomado.
+        """
+
+        if self._sesion is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            # Los reintentos los gestiona azure-core, no el adaptador.
+            self._adaptador = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=self.tamanio_pool,
+                max_retries=0,
+            )
+            self._sesion = requests.Session()
+            self._sesion.mount("https://", self._adaptador)
+            logger.debug(
+                "Sesión HTTP compartida creada con %s conexiones por host",
+                self.tamanio_pool,
+            )
+
+        return self._sesion
+
+    def _obtener_cliente(self, tipo, clase_cliente, id_suscripcion=None):
+        """
+        Devuelve el cliente cacheado del tipo indicado o lo crea si no existe.
+        """
+
+        if id_suscripcion is None:
+            id_suscripcion = self.id_suscripcion
+
+        clave = (tipo, id_suscripcion)
+
+        with self._bloqueo:
+            if clave not in self._clientes:
+                from azure.core.pipeline.transport import RequestsTransport
+
+                transporte = RequestsTransport(
+                    session=self._obtener_sesion(), session_owner=False
+                )
+                self._clientes[clave] = clase_cliente(
+                    self.credencial, id_suscripcion, transport=transporte
+                )
+                self.clientes_creados += 1
+                logger.debug(
+                    "Cliente de %s creado para la suscripción %s", tipo, id_suscripcion
+                )
+
+            return self._clientes[clave]
+
+    def obtener_cliente_compute(self, id_suscripcion=None):
+        """
+        Devuelve el ComputeManagementClient compartido de la suscripción.
+        """
+        from azure.mgmt.compute import ComputeManagementClient
+
+        return self._obtener_cliente("compute", ComputeManagementClient, id_suscripcion)
+
+    def obtener_cliente_red(self, id_suscripcion=None):
+        """
+        Devuelve el NetworkManagementClient compartido de la suscripción.
+        """
+        from azure.mgmt.network import NetworkManagementClient
+
+        return self._obtener_cliente("red", NetworkManagementClient, id_suscripcion)
+
+    def obtener_cliente_recursos(self, id_suscripcion=None):
+        """
+        Devuelve el ResourceManagementClient compartido de la suscripción.
+        """
+        from azure.mgmt.resource import ResourceManagementClient
+
+        return self._obtener_cliente(
+            "recursos", ResourceManagementClient, id_suscripcion
+        )
+
+    def estadisticas(self):
+        """
+        Devuelve cuántos clientes y conexiones HTTP se han abierto.
+
+        Returns:
+            dict: Diccionario con las claves "clientes", "conexiones",
+            "consultas_cache" (consultas evitadas) y "consultas_azure".
+        """
+
+        conexiones = 0
+        estadisticas_cache = self.cache.estadisticas()
+
+        with self._bloqueo:
+            if self._adaptador is not None:
+                pools = self._adaptador.poolmanager.pools
+                for clave in pools.keys():
+                    conexiones += pools[clave].num_connections
+
+            return {
+                "clientes": self.clientes_creados,
+                "conexiones": conexiones,
+                "consultas_cache": estadisticas_cache["aciertos"],
+                "consultas_azure": estadisticas_cache["fallos"],
+            }
+
+    def cerrar(self):
+        """
+        Cierra los clientes y la sesión HTTP compartida.
+        """
+
+        with self._bloqueo:
+            for cliente in self._clientes.values():
+                try:
+                    cliente.close()
+                except Exception as e:
+                    logger.debug("Error al cerrar un cliente de Azure: %s", e)
+
+            self._clientes = {}
+
+            if self._sesion is not None:
+                self._sesion.close()
+                self._sesion = None
+                self._adaptador = None
+
+
+class ClienteAzureAsync:
+    """
+    Variante asíncrona de ClienteAzure, sobre los clientes azure.mgmt.*.aio.
+
+    Todos los clientes comparten una sesión aiohttp con un máximo de
+    tamanio_pool conexiones, de modo que un único bucle de eventos puede
+    tener cientos de operaciones en vuelo sin abrir una conexión por cada una.
+    Debe usarse como gestor de contexto asíncrono, que cierra los clientes,
+    la sesión y la credencial al salir.
+
+    Args:
+        credencial (object): Credencial asíncrona de Azure
+            (azure.identity.aio).
+        id_suscripcion (str): El ID de la suscripción de Azure.
+        tamanio_pool (int): Conexiones HTTP máximas de la sesión.
     """
 
-    def __init__(self, credencial, id_suscripcion):
+    def __init__(self, credencial, id_suscripcion, tamanio_pool=TAMANIO_POOL_HTTP):
         self.credencial = credencial
         self.id_suscripcion = id_suscripcion
+        self.tamanio_pool = tamanio_pool
+        self.clientes_creados = 0
+        self.cache = CacheConsultasAsync()
+
+        self._clientes = {}
+        self._sesion = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.cerrar()
+
+    def _obtener_sesion(self):
+        """
+        Crea la sesión aiohttp compartida.
+        """
+
+        if self._sesion is None:
+            import aiohttp
+
+            self._sesion = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.tamanio_pool)
+            )
+            logger.debug(
+                "Sesión HTTP asíncrona creada con %s conexiones", self.tamanio_pool
+            )
+
+        return self._sesion
+
+    def _obtener_cliente(self, tipo, clase_cliente, id_suscripcion=None):
+        """
+        Devuelve el cliente cacheado del tipo indicado o lo crea si no existe.
+        Solo se usa desde el bucle de eventos, por lo que no necesita bloqueo.
+        """
+
+        if id_suscripcion is None:
+            id_suscripcion = self.id_suscripcion
+
+        clave = (tipo, id_suscripcion)
+
+        if clave not in self._clientes:
+            from azure.core.pipeline.transport import AioHttpTransport
+
+            transporte = AioHttpTransport(
+                session=self._obtener_sesion(), session_owner=False
+            )
+            self._clientes[clave] = clase_cliente(
+                self.credencial, id_suscripcion, transport=transporte
+            )
+            self.clientes_creados += 1
+            logger.debug(
+                "Cliente asíncrono de %s creado para la suscripción %s",
+                tipo,
+                id_suscripcion,
+            )
+
+        return self._clientes[clave]
+
+    def obtener_cliente_compute(self, id_suscripcion=None):
+        """
+        Devuelve el ComputeManagementClient asíncrono de la suscripción.
+        """
+        from azure.mgmt.compute.aio import ComputeManagementClient
+
+        return self._obtener_cliente("compute", ComputeManagementClient, id_suscripcion)
+
+    def obtener_cliente_red(self, id_suscripcion=None):
+        """
+        Devuelve el NetworkManagementClient asíncrono de la suscripción.
+        """
+        from azure.mgmt.network.aio import NetworkManagementClient
+
+        return self._obtener_cliente("red", NetworkManagementClient, id_suscripcion)
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Diccionario con las claves "clientes", "consultas_cache"
+            (consultas evitadas) y "consultas_azure".
+        """
+
+        estadisticas_cache = self.cache.estadisticas()
+
+        return {
+            "clientes": self.clientes_creados,
+            "consultas_cache": estadisticas_cache["aciertos"],
+            "consultas_azure": estadisticas_cache["fallos"],
+        }
+
+    async def cerrar(self):
+        """
+        Cierra los clientes, la sesión HTTP y la credencial.
+        """
+
+        for cliente in self._clientes.values():
+            try:
+                await cliente.close()
+            except Exception as e:
+                logger.debug("Error al cerrar un cliente de Azure: %s", e)
+
+        self._clientes = {}
+
+        if self._sesion is not None:
+            await self._sesion.close()
+            self._sesion = None
+
+        cerrar_credencial = getattr(self.credencial, "close", None)
+        if cerrar_credencial is not None:
+            await cerrar_credencial()
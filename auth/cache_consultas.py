@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+import time
+
+from config.configuraciones import TTL_CACHE_AZURE
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+class CacheConsultas:
+    """
+    Caché en memoria, con caducidad, para consultas a Azure cuyo resultado no
+    cambia durante una ejecución (subred, clave SSH, grupos de seguridad).
+
+    Si varios hilos piden a la vez una clave que no está en la caché, solo uno
+    hace la consulta y el resto espera su resultado. Los errores no se
+    guardan.
+
+    Args:
+        ttl (float): Segundos que se conserva cada valor.
+    """
+
+    def __init__(self, ttl=TTL_CACHE_AZURE):
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+
+        self._bloqueo = threading.Lock()
+        self._valores = {}
+        self._bloqueos_clave = {}
+
+    def obtener(self, clave, consulta):
+        """
+        Devuelve el valor guardado para la clave o lo obtiene con la consulta.
+
+        Args:
+            clave (tuple): Clave del valor, por ejemplo ("subred", rg, vnet,
+                subred).
+            consulta (callable): Función sin argumentos que obtiene el valor.
+        """
+
+        valor = self._leer(clave)
+        if valor is not None:
+            return valor
+
+        with self._bloqueo:
+            bloqueo_clave = self._bloqueos_clave.setdefault(clave, threading.Lock())
+
+        with bloqueo_clave:
+            # Otro hilo pudo obtenerlo mientras se esperaba el bloqueo
+            valor = self._leer(clave)
+            if valor is not None:
+                return valor
+
+            with self._bloqueo:
+                self.fallos += 1
+
+            valor = consulta()
+            self.guardar(clave, valor)
+            logger.debug("Consulta guardada en caché: %s", clave)
+
+            return valor
+
+    def guardar(self, clave, valor):
+        """
+        Guarda un valor conocido, por ejemplo el devuelto al crear un recurso.
+        """
+
+        with self._bloqueo:
+            self._valores[clave] = (time.monotonic() + self.ttl, valor)
+
+    def invalidar(self, clave=None):
+        """
+        Elimina una clave de la caché, o todas si no se indica ninguna.
+        """
+
+        with self._bloqueo:
+            if clave is None:
+                self._valores.clear()
+            else:
+                self._valores.pop(clave, None)
+
+    def _leer(self, clave):
+        with self._bloqueo:
+            entrada = self._valores.get(clave)
+
+            if entrada is None:
+                return None
+
+            caducidad, valor = entrada
+            if caducidad < time.monotonic():
+                del self._valores[clave]
+                return None
+
+            self.aciertos += 1
+            return valor
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: Diccionario con las claves "aciertos" y "fallos".
+        """
+
+        with self._bloqueo:
+            return {"aciertos": self.aciertos, "fallos": self.fallos}
+
+
+class CacheConsultasAsync(CacheConsultas):
+    """
+    Variante de CacheConsultas para corrutinas: la consulta es una función
+    sin argumentos que devuelve una corrutina, y las tareas que piden a la vez
+    una clave que no está en la caché esperan a la primera sin bloquear el
+    bucle de eventos.
+    """
+
+    def __init__(self, ttl=TTL_CACHE_AZURE):
+        super().__init__(ttl)
+        self._bloqueos_async = {}
+
+    async def obtener(self, clave, consulta):
+        """
+        Devuelve el valor guardado para la clave o lo obtiene con la consulta.
+        """
+
+        valor = self._leer(clave)
+        if valor is not None:
+            return valor
+
+        bloqueo_clave = self._bloqueos_async.setdefault(clave, asyncio.Lock())
+
+        async with bloqueo_clave:
+            # Otra tarea pudo obtenerlo mientras se esperaba el bloqueo
+            valor = self._leer(clave)
+            if valor is not None:
+                return valor
+
+            with self._bloqueo:
+                self.fallos += 1
+
+            valor = await consulta()
+            self.guardar(clave, valor)
+            logger.debug("Consulta guardada en caché: %s", clave)
+
+            return valor
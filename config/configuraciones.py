@@ -18,8 +18,26 @@ TAMANIO_INSTANCIA_WORKER = os.getenv("TAMANIO_INSTANCIA_WORKER")
 IP_PUBLICA = os.getenv("IP_PUBLICA")
 RUTA_SCRIPTS_DEPENDENCIAS = os.getenv("RUTA_SCRIPTS_DEPENDENCIAS")
 CLOUDFLARE_TOKEN = os.getenv("CLOUDFLARE_TOKEN")
+CLOUDFLARE_URL_API = os.getenv("CLOUDFLARE_URL_API")
 ZONA_DNS = os.getenv("ZONA_DNS")
 PATRON_DNS = os.getenv("PATRON_DNS")
 CORREO_CLOUDFLARE = os.getenv("CORREO_CLOUDFLARE")
 ZONA_DNS_ID = os.getenv("ZONA_DNS_ID")
 CLAVE_PRIVADA_DEVOPS = os.getenv("CLAVE_PRIVADA_DEVOPS")
+MAX_CONCURRENCIA = int(os.getenv("MAX_CONCURRENCIA", "10"))
+TAMANIO_POOL_HTTP = int(os.getenv("TAMANIO_POOL_HTTP", "32"))
+TTL_CACHE_AZURE = int(os.getenv("TTL_CACHE_AZURE", "600"))
+TIEMPO_MAXIMO_DISPONIBILIDAD = int(os.getenv("TIEMPO_MAXIMO_DISPONIBILIDAD", "900"))
+SSH_INTERVALO_KEEPALIVE = int(os.getenv("SSH_INTERVALO_KEEPALIVE", "30"))
+SSH_TIEMPO_INACTIVIDAD = int(os.getenv("SSH_TIEMPO_INACTIVIDAD", "600"))
+MODO_ARTEFACTOS = os.getenv("MODO_ARTEFACTOS", "master")
+DIRECTORIO_CACHE_ARTEFACTOS = os.getenv(
+    "DIRECTORIO_CACHE_ARTEFACTOS",
+    os.path.join(os.path.expanduser("~"), ".cache", "auto-az-spark", "artefactos"),
+)
+PUERTO_ARTEFACTOS = int(os.getenv("PUERTO_ARTEFACTOS", "8765"))
+IMAGEN_DORADA = os.getenv("IMAGEN_DORADA")
+MODO_APROVISIONAMIENTO = os.getenv("MODO_APROVISIONAMIENTO", "ssh")
+MOTOR_ORQUESTACION = os.getenv("MOTOR_ORQUESTACION", "hilos")
+MAX_CONCURRENCIA_ASYNC = int(os.getenv("MAX_CONCURRENCIA_ASYNC", "200"))
+ARCHIVO_ESTADO = os.getenv("ARCHIVO_ESTADO", "estado_cluster.json")
@@ -1,7 +1,12 @@
 import logging
+import os
+import threading
 
 
 LOG_FILE = "Auto-Az-Spark.log"
+DIRECTORIO_REGISTROS_NODOS = "registros"
+
+_bloqueo_registros_nodos = threading.Lock()
 
 
 class FiltroAzure(logging.Filter):
@@ -25,7 +30,8 @@ def setup_logging():
     consola_handler.setLevel(logging.INFO)
     consola_handler.addFilter(filtro_registros_azure)
 
-    archivo_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+    # El archivo solo se crea al escribir el primer mensaje
+    archivo_handler = logging.FileHandler(LOG_FILE, encoding="utf-8", delay=True)
     archivo_handler.setLevel(logging.DEBUG)
     archivo_handler.addFilter(filtro_registros_azure)
 
@@ -36,3 +42,36 @@ def setup_logging():
 
     root_logger.addHandler(consola_handler)
     root_logger.addHandler(archivo_handler)
+
+
+def obtener_logger_nodo(nombre_nodo):
+    """
+    Devuelve un logger propio del nodo que, además de propagar al logger
+    principal, escribe en registros/<nombre_nodo>.log.
+
+    Args:
+        nombre_nodo (str): Nombre del nodo del clúster.
+
+    Returns:
+        logging.Logger: El logger del nodo.
+    """
+    logger_nodo = logging.getLogger(f"nodos.{nombre_nodo}")
+
+    with _bloqueo_registros_nodos:
+        if not logger_nodo.handlers:
+            os.makedirs(DIRECTORIO_REGISTROS_NODOS, exist_ok=True)
+
+            archivo_handler = logging.FileHandler(
+                os.path.join(DIRECTORIO_REGISTROS_NODOS, f"{nombre_nodo}.log"),
+                encoding="utf-8",
+            )
+            archivo_handler.setLevel(logging.DEBUG)
+            archivo_handler.setFormatter(
+                logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+            )
+            logger_nodo.addHandler(archivo_handler)
+            # Sin nivel propio heredaría INFO del logger principal y los
+            # mensajes DEBUG no llegarían al archivo del nodo
+            logger_nodo.setLevel(logging.DEBUG)
+
+    return logger_nodo
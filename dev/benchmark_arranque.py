@@ -0,0 +1,134 @@
+"""
+Mide el tiempo de arranque de la CLI con python -X importtime.
+
+Comprueba que "import main" no carga los SDK pesados (Azure, Cloudflare,
+paramiko) y que tanto la importación como "python main.py --help" quedan por
+debajo del presupuesto. Termina con código 1 si alguna comprobación falla.
+
+Uso:
+    python dev/benchmark_arranque.py [--presupuesto-ms 300] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+RAIZ_REPOSITORIO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que solo deben cargarse al ejecutar el comando que los usa
+MODULOS_PESADOS = (
+    "azure.identity",
+    "azure.mgmt",
+    "cloudflare",
+    "paramiko",
+    "pandas",
+)
+
+PRESUPUESTO_POR_DEFECTO_MS = float(os.getenv("PRESUPUESTO_ARRANQUE_MS", "300"))
+
+# Formato de cada línea: "import time:  propio |  acumulado | módulo"
+PATRON_IMPORTTIME = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def medir_importacion():
+    """
+    Importa main en un proceso nuevo con -X importtime.
+
+    Returns:
+        dict: Diccionario {módulo: microsegundos acumulados}.
+    """
+
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=RAIZ_REPOSITORIO,
+        capture_output=True,
+        text=True,
+    )
+
+    if proceso.returncode != 0:
+        print(proceso.stderr, file=sys.stderr)
+        sys.exit(1)
+
+    tiempos = {}
+
+    for linea in proceso.stderr.splitlines():
+        coincidencia = PATRON_IMPORTTIME.match(linea)
+        if coincidencia:
+            tiempos[coincidencia.group(4)] = int(coincidencia.group(2))
+
+    return tiempos
+
+
+def medir_ayuda():
+    """
+    Returns:
+        float: Milisegundos que tarda "python main.py --help".
+    """
+
+    inicio = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", "--help"],
+        cwd=RAIZ_REPOSITORIO,
+        capture_output=True,
+        check=True,
+    )
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la CLI")
+    parser.add_argument(
+        "--presupuesto-ms",
+        type=float,
+        default=PRESUPUESTO_POR_DEFECTO_MS,
+        help="Tiempo máximo de importación de main y de --help, en milisegundos",
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="Número de módulos más lentos a mostrar"
+    )
+    args = parser.parse_args()
+
+    tiempos = medir_importacion()
+    ms_importacion = tiempos.get("main", 0) / 1000
+    ms_ayuda = medir_ayuda()
+
+    print("Módulos más lentos al importar main (acumulado):")
+    for modulo, microsegundos in sorted(
+        tiempos.items(), key=lambda item: item[1], reverse=True
+    )[: args.top]:
+        print(f"  {microsegundos / 1000:8.1f} ms  {modulo}")
+
+    print(f"\nimport main:        {ms_importacion:8.1f} ms")
+    print(f"main.py --help:     {ms_ayuda:8.1f} ms")
+    print(f"Presupuesto:        {args.presupuesto_ms:8.1f} ms")
+
+    errores = []
+
+    cargados = sorted(
+        modulo
+        for modulo in tiempos
+        if any(
+            modulo == pesado or modulo.startswith(pesado + ".")
+            for pesado in MODULOS_PESADOS
+        )
+    )
+    if cargados:
+        errores.append(f"import main carga módulos pesados: {', '.join(cargados)}")
+
+    if ms_importacion > args.presupuesto_ms:
+        errores.append(f"import main supera el presupuesto ({ms_importacion:.1f} ms)")
+
+    if ms_ayuda > args.presupuesto_ms:
+        errores.append(f"main.py --help supera el presupuesto ({ms_ayuda:.1f} ms)")
+
+    for error in errores:
+        print(f"ERROR: {error}", file=sys.stderr)
+
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Servidor HTTP local que imita la parte de la API de Cloudflare que usa el
+proyecto (registros DNS), para probar la sincronización DNS sin una zona real.
+
+Guarda los registros en memoria y cuenta las peticiones recibidas.
+
+Uso:
+    python dev/cloudflare_local.py [--puerto 8787]
+
+    CLOUDFLARE_URL_API="http://127.0.0.1:8787/client/v4" python main.py --configurar-dns
+"""
+
+import argparse
+import json
+import re
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RUTA_REGISTROS = re.compile(r"/zones/([^/]+)/dns_records(?:/([^/]+))?$")
+
+
+def ahora():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ApiCloudflareLocal:
+    """
+    Estado en memoria de la API: registros por zona y número de peticiones
+    por método.
+    """
+
+    def __init__(self):
+        self.registros = {}
+        self.peticiones = Counter()
+        self._bloqueo = threading.Lock()
+
+    def listar(self, zona, parametros):
+        tipo = parametros.get("type", [None])[0]
+        prefijo = parametros.get("name.startswith", [""])[0].lower()
+        nombre = (parametros.get("name") or parametros.get("name.exact") or [None])[0]
+        pagina = int(float(parametros.get("page", ["1"])[0]))
+        por_pagina = int(float(parametros.get("per_page", ["100"])[0]))
+
+        with self._bloqueo:
+            registros = [
+                registro
+                for registro in self.registros.get(zona, {}).values()
+                if (tipo is None or registro["type"] == tipo)
+                and registro["name"].lower().startswith(prefijo)
+                and (nombre is None or registro["name"].lower() == nombre.lower())
+            ]
+
+        inicio = (pagina - 1) * por_pagina
+        return registros[inicio : inicio + por_pagina], {
+            "page": pagina,
+            "per_page": por_pagina,
+            "count": len(registros[inicio : inicio + por_pagina]),
+            "total_count": len(registros),
+        }
+
+    def crear(self, zona, datos):
+        registro = {
+            "id": uuid.uuid4().hex,
+            "type": "A",
+            "proxied": False,
+            "ttl": 1,
+            "comment": None,
+            **datos,
+            "modified_on": ahora(),
+        }
+        with self._bloqueo:
+            self.registros.setdefault(zona, {})[registro["id"]] = registro
+        return registro
+
+    def modificar(self, zona, id_registro, datos, reemplazar=False):
+        with self._bloqueo:
+            registro = self.registros[zona][id_registro]
+            if reemplazar:
+                registro = {"id": id_registro, "proxied": False, "ttl": 1}
+            registro.update(datos)
+            registro["id"] = id_registro
+            registro["modified_on"] = ahora()
+            self.registros[zona][id_registro] = registro
+        return registro
+
+    def eliminar(self, zona, id_registro):
+        with self._bloqueo:
+            self.registros[zona].pop(id_registro)
+        return {"id": id_registro}
+
+    def lote(self, zona, datos):
+        # Cloudflare aplica siempre los cambios en este orden
+        return {
+            "deletes": [
+                self.eliminar(zona, cambio["id"]) for cambio in datos.get("deletes", [])
+            ],
+            "patches": [
+                self.modificar(zona, cambio["id"], cambio)
+                for cambio in datos.get("patches", [])
+            ],
+            "puts": [
+                self.modificar(zona, cambio["id"], cambio, reemplazar=True)
+                for cambio in datos.get("puts", [])
+            ],
+            "posts": [self.crear(zona, cambio) for cambio in datos.get("posts", [])],
+        }
+
+
+def crear_manejador(api):
+    """
+    Crea la clase que atiende las peticiones HTTP contra la API indicada.
+    """
+
+    class Manejador(BaseHTTPRequestHandler):
+        def _responder(self, estado, resultado, result_info=None):
+            cuerpo = {"success": estado < 400, "errors": [], "messages": []}
+            cuerpo["result"] = resultado
+            if result_info is not None:
+                cuerpo["result_info"] = result_info
+
+            datos = json.dumps(cuerpo).encode("utf-8")
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def _atender(self):
+            url = urlparse(self.path)
+            coincidencia = RUTA_REGISTROS.search(url.path)
+            api.peticiones[self.command] += 1
+
+            if coincidencia is None:
+                self._responder(404, None)
+                return
+
+            zona, id_registro = coincidencia.groups()
+            longitud = int(self.headers.get("Content-Length") or 0)
+            datos = json.loads(self.rfile.read(longitud) or b"{}")
+
+            try:
+                if self.command == "GET" and id_registro is None:
+                    registros, info = api.listar(zona, parse_qs(url.query))
+                    self._responder(200, registros, info)
+                elif self.command == "POST" and id_registro == "batch":
+                    self._responder(200, api.lote(zona, datos))
+                elif self.command == "POST" and id_registro is None:
+                    self._responder(200, api.crear(zona, datos))
+                elif self.command == "PATCH":
+                    self._responder(200, api.modificar(zona, id_registro, datos))
+                elif self.command == "PUT":
+                    self._responder(
+                        200, api.modificar(zona, id_registro, datos, reemplazar=True)
+                    )
+                elif self.command == "DELETE":
+                    self._responder(200, api.eliminar(zona, id_registro))
+                else:
+                    self._responder(405, None)
+            except KeyError:
+                self._responder(404, None)
+
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _atender
+
+        def log_message(self, formato, *args):
+            print(f"{self.command} {self.path}")
+
+    return Manejador
+
+
+def iniciar_servidor(puerto=0, api=None):
+    """
+    Inicia el servidor en un hilo.
+
+    Returns:
+        tuple: (servidor, api, url_base). url_base se pasa como base_url al
+        cliente de Cloudflare o en CLOUDFLARE_URL_API.
+    """
+
+    api = api or ApiCloudflareLocal()
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), crear_manejador(api))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    url_base = f"http://127.0.0.1:{servidor.server_address[1]}/client/v4"
+    return servidor, api, url_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de Cloudflare (DNS)")
+    parser.add_argument("--puerto", type=int, default=8787)
+    args = parser.parse_args()
+
+    servidor, _, url_base = iniciar_servidor(args.puerto)
+    print(f"API local de Cloudflare en {url_base}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import logging
+import time
+from pathlib import Path
+
+from config.configuraciones import TIEMPO_MAXIMO_DISPONIBILIDAD
+from func.conexiones_ssh import pool_ssh
+from func.disponibilidad import esperar_con_reintentos
+from func.funciones_vm import listar_scripts, renderizar_script
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_SCRIPTS_ARRANQUE = "/opt/auto-az-spark"
+DIRECTORIO_MARCADORES = "/var/lib/auto-az-spark"
+REGISTRO_ARRANQUE = "/var/log/auto-az-spark.log"
+
+# Delimitador de los heredocs; no debe aparecer en los scripts
+DELIMITADOR = "AUTO_AZ_SPARK_FIN_SCRIPT"
+
+
+def generar_script_arranque(
+    ruta_scripts,
+    usuario,
+    tipo_nodo,
+    nombre_nodo,
+    ip_privada_vm,
+    zona_dns,
+    patron_dns,
+    fase=None,
+):
+    """
+    Genera el script de cloud-init de un nodo con los scripts de instalación
+    ya renderizados.
+
+    Al arrancar, la VM escribe los scripts en DIRECTORIO_SCRIPTS_ARRANQUE, los
+    ejecuta en orden como root y deja un marcador "completado" o "fallido" en
+    DIRECTORIO_MARCADORES. La salida queda en REGISTRO_ARRANQUE.
+
+    Returns:
+        str: Script de bash para usar como custom_data.
+    """
+
+    scripts = listar_scripts(ruta_scripts, fase)
+
+    lineas = [
+        "#!/bin/bash",
+        f"mkdir -p {DIRECTORIO_SCRIPTS_ARRANQUE} {DIRECTORIO_MARCADORES}",
+        f"exec >> {REGISTRO_ARRANQUE} 2>&1",
+        "",
+    ]
+
+    for script in scripts:
+        contenido = (Path(ruta_scripts) / script).read_text(encoding="utf-8")
+        contenido = renderizar_script(
+            contenido,
+            usuario=usuario,
+            tipo_nodo=tipo_nodo,
+            nombre_nodo=nombre_nodo,
+            ip_privada_vm=ip_privada_vm,
+            zona_dns=zona_dns,
+            patron_dns=patron_dns,
+        )
+
+        if DELIMITADOR in contenido:
+            raise ValueError(
+                f"El script {script} contiene el delimitador {DELIMITADOR}"
+            )
+
+        lineas += [
+            f"cat > {DIRECTORIO_SCRIPTS_ARRANQUE}/{script} <<'{DELIMITADOR}'",
+            contenido.rstrip("\n"),
+            DELIMITADOR,
+            "",
+        ]
+
+    lineas += [
+        f"for script in {' '.join(scripts)}; do",
+        '  echo "--- Ejecutando $script"',
+        f"  bash {DIRECTORIO_SCRIPTS_ARRANQUE}/$script",
+        "  codigo=$?",
+        "  if [ $codigo -ne 0 ]; then",
+        f'    echo "$script $codigo" > {DIRECTORIO_MARCADORES}/fallido',
+        "    exit $codigo",
+        "  fi",
+        "done",
+        "",
+        f"touch {DIRECTORIO_MARCADORES}/completado",
+        "",
+    ]
+
+    return "\n".join(lineas)
+
+
+def datos_personalizados_nodo(ruta_scripts, nodo, zona_dns, patron_dns, fase=None):
+    """
+    Devuelve la función que crear_vm usa para generar el script de arranque
+    del nodo en cuanto conoce su IP privada.
+
+    Args:
+        nodo (dict): Diccionario con las claves "nombre", "usuario" y
+            "tipo_nodo".
+    """
+
+    def generar(ip_privada_vm):
+        return generar_script_arranque(
+            ruta_scripts,
+            usuario=nodo["usuario"],
+            tipo_nodo=nodo["tipo_nodo"],
+            nombre_nodo=nodo["nombre"],
+            ip_privada_vm=ip_privada_vm,
+            zona_dns=zona_dns,
+            patron_dns=patron_dns,
+            fase=fase,
+        )
+
+    return generar
+
+
+def consultar_marcador(ssh_client):
+    """
+    Consulta el estado del script de arranque en el nodo.
+
+    Returns:
+        str: "completado", "fallido" o "pendiente".
+    """
+
+    _, stdout, _ = ssh_client.exec_command(
+        f"if [ -f {DIRECTORIO_MARCADORES}/completado ]; then echo completado; "
+        f"elif [ -f {DIRECTORIO_MARCADORES}/fallido ]; then echo fallido; "
+        "else echo pendiente; fi"
+    )
+
+    return stdout.read().decode().strip()
+
+
+def esperar_aprovisionamiento(
+    nodo, clave_publica, tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD, registro=None
+):
+    """
+    Espera a que el script de arranque de cloud-init termine en el nodo.
+
+    Si falla, se copia al registro del nodo el final de REGISTRO_ARRANQUE.
+
+    Args:
+        nodo (dict): Diccionario con las claves "nombre", "ip" y "usuario".
+        tiempo_maximo (float): Segundos máximos de espera.
+
+    Returns:
+        bool: True si el script de arranque terminó correctamente.
+    """
+
+    if registro is None:
+        registro = logger
+
+    inicio = time.monotonic()
+    estado = {"valor": "pendiente"}
+
+    def sonda():
+        ssh_client = pool_ssh.obtener(nodo["ip"], nodo["usuario"], clave_publica)
+        estado["valor"] = consultar_marcador(ssh_client)
+        return estado["valor"] != "pendiente"
+
+    esperar_con_reintentos(
+        sonda,
+        f"{nodo['nombre']} (cloud-init)",
+        inicio + tiempo_maximo,
+        espera_inicial=5,
+        espera_maxima=15,
+    )
+
+    if estado["valor"] == "completado":
+        registro.info(
+            "Aprovisionamiento de %s completado tras %.1f s de espera",
+            nodo["nombre"],
+            time.monotonic() - inicio,
+        )
+        return True
+
+    registro.error(
+        "El aprovisionamiento de %s terminó en estado: %s",
+        nodo["nombre"],
+        estado["valor"],
+    )
+
+    try:
+        ssh_client = pool_ssh.obtener(nodo["ip"], nodo["usuario"], clave_publica)
+        _, stdout, _ = ssh_client.exec_command(f"sudo tail -n 50 {REGISTRO_ARRANQUE}")
+        for linea in stdout.read().decode(errors="replace").splitlines():
+            registro.error("[%s] cloud-init: %s", nodo["nombre"], linea)
+    except Exception as e:
+        registro.debug("No se pudo leer %s: %s", REGISTRO_ARRANQUE, e)
+
+    return False
@@ -0,0 +1,357 @@
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shlex
+import threading
+import urllib.request
+from pathlib import Path
+
+from config.configuraciones import (
+    DIRECTORIO_CACHE_ARTEFACTOS,
+    MODO_ARTEFACTOS,
+    PUERTO_ARTEFACTOS,
+    TIEMPO_MAXIMO_DISPONIBILIDAD,
+)
+from func.ejecucion_remota import ejecutar_comando
+from func.transferencias import subir_archivos, verificar_checksums
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Deben coincidir con las URL de los scripts de instalación
+ARTEFACTOS = [
+    {
+        "nombre": "Hadoop",
+        "url": "https://git.alephsub0.org/recursos/hadoop-3.3.6.tar.gz",
+    },
+    {
+        "nombre": "Spark",
+        "url": "https://git.alephsub0.org/recursos/spark-3.5.4-bin-hadoop3.tgz",
+    },
+]
+
+DIRECTORIO_REMOTO = "/tmp"
+DIRECTORIO_SERVIDOR_MASTER = "/tmp/artefactos"
+
+_bloqueo_cache = threading.Lock()
+
+
+def _ruta_indice():
+    return Path(DIRECTORIO_CACHE_ARTEFACTOS) / "indice.json"
+
+
+def _leer_indice():
+    ruta_indice = _ruta_indice()
+
+    if not ruta_indice.exists():
+        return {}
+
+    with ruta_indice.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_indice(indice):
+    ruta_indice = _ruta_indice()
+    ruta_temporal = ruta_indice.with_suffix(".tmp")
+
+    with ruta_temporal.open("w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=2)
+
+    os.replace(ruta_temporal, ruta_indice)
+
+
+def obtener_artefacto(url, sha256=None):
+    """
+    Devuelve la ruta local de un artefacto, descargándolo solo si no está en
+    la caché.
+
+    La caché se indexa por URL y guarda cada archivo con su sha256 como nombre,
+    de modo que el contenido se verifica en cada uso.
+
+    Args:
+        url (str): URL del artefacto.
+        sha256 (str): Checksum esperado, opcional.
+
+    Returns:
+        tuple: Ruta local (Path) y sha256 del artefacto.
+    """
+
+    directorio = Path(DIRECTORIO_CACHE_ARTEFACTOS)
+
+    with _bloqueo_cache:
+        directorio.mkdir(parents=True, exist_ok=True)
+        indice = _leer_indice()
+
+        suma_cacheada = indice.get(url)
+        if suma_cacheada and (sha256 is None or suma_cacheada == sha256):
+            ruta_cacheada = directorio / suma_cacheada
+            if ruta_cacheada.exists():
+                logger.info("Artefacto en caché: %s", url)
+                return ruta_cacheada, suma_cacheada
+
+        logger.info("Descargando artefacto: %s", url)
+        ruta_temporal = directorio / (posixpath.basename(url) + ".descarga")
+        suma = hashlib.sha256()
+
+        with urllib.request.urlopen(url) as respuesta, ruta_temporal.open(
+            "wb"
+        ) as archivo:
+            while True:
+                bloque = respuesta.read(1024 * 1024)
+                if not bloque:
+                    break
+                archivo.write(bloque)
+                suma.update(bloque)
+
+        suma_descarga = suma.hexdigest()
+
+        if sha256 is not None and suma_descarga != sha256:
+            ruta_temporal.unlink()
+            raise IOError(f"Checksum incorrecto para {url}: {suma_descarga}")
+
+        os.replace(ruta_temporal, directorio / suma_descarga)
+        indice[url] = suma_descarga
+        _guardar_indice(indice)
+
+        return directorio / suma_descarga, suma_descarga
+
+
+def _ruta_remota(artefacto):
+    return posixpath.join(DIRECTORIO_REMOTO, posixpath.basename(artefacto["url"]))
+
+
+def _contenido_checksum(artefacto):
+    """
+    Contenido del archivo .sha256 que los scripts usan para omitir la descarga.
+    """
+
+    return f"{artefacto['sha256']}  {_ruta_remota(artefacto)}\n"
+
+
+class DistribuidorArtefactos:
+    """
+    Distribuye los tarballs de Hadoop y Spark a los nodos para que cada uno
+    no tenga que descargarlos de internet.
+
+    Modos:
+        "nodo": cada nodo descarga sus artefactos (comportamiento original).
+        "operador": se descargan una vez a la caché local y se suben por SFTP.
+        "master": el master los descarga una vez y los sirve por HTTP en la
+            subred privada; los workers los descargan desde el master.
+
+    En todos los modos, junto a cada archivo se deja un .sha256 y los scripts
+    omiten la descarga si el checksum coincide.
+
+    Args:
+        modo (str): Modo de distribución.
+        tiempo_maximo (float): Segundos que un worker espera al master.
+    """
+
+    def __init__(
+        self, modo=MODO_ARTEFACTOS, tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD
+    ):
+        if modo not in ("nodo", "operador", "master"):
+            raise ValueError(f"Modo de distribución de artefactos desconocido: {modo}")
+
+        self.modo = modo
+        self.tiempo_maximo = tiempo_maximo
+
+        self._bloqueo = threading.Lock()
+        self._artefactos_locales = None
+        self._master_listo = threading.Event()
+        self._datos_master = {"ip_privada": None, "artefactos": None, "ssh": None}
+
+    def precargar(self):
+        """
+        En modo "operador", descarga los artefactos a la caché local. Permite
+        hacerlo mientras se crean las VMs.
+        """
+
+        if self.modo == "operador":
+            try:
+                self._obtener_artefactos_locales()
+            except Exception as e:
+                logger.warning("No se pudieron precargar los artefactos: %s", e)
+
+    def _obtener_artefactos_locales(self):
+        with self._bloqueo:
+            if self._artefactos_locales is None:
+                artefactos = []
+                for artefacto in ARTEFACTOS:
+                    ruta_local, sha256 = obtener_artefacto(artefacto["url"])
+                    artefactos.append(
+                        dict(artefacto, ruta_local=ruta_local, sha256=sha256)
+                    )
+                self._artefactos_locales = artefactos
+
+            return self._artefactos_locales
+
+    def distribuir(self, ssh_client, nodo, registro=None):
+        """
+        Deja los artefactos en /tmp del nodo según el modo configurado.
+
+        Si la distribución falla, los scripts descargarán los archivos por su
+        cuenta, por lo que un fallo aquí no impide la instalación.
+
+        Args:
+            nodo (dict): Diccionario con las claves "nombre" y "tipo_nodo".
+
+        Returns:
+            bool: True si los artefactos quedaron en el nodo.
+        """
+
+        if registro is None:
+            registro = logger
+
+        es_master = nodo["tipo_nodo"] == "Master"
+
+        try:
+            if self.modo == "nodo":
+                return False
+
+            if self.modo == "operador":
+                return self._subir_desde_operador(ssh_client, nodo, registro)
+
+            if es_master:
+                return self._preparar_master(ssh_client, nodo, registro)
+
+            return self._descargar_desde_master(ssh_client, nodo, registro)
+
+        except Exception as e:
+            registro.warning(
+                "No se pudieron distribuir los artefactos a %s, el nodo los "
+                "descargará: %s",
+                nodo["nombre"],
+                e,
+            )
+            return False
+
+        finally:
+            if es_master:
+                self.liberar()
+
+    def liberar(self):
+        """
+        Deja de esperar al master. Debe llamarse si el master falla antes de
+        distribuir, para que los workers no se queden esperando.
+        """
+
+        self._master_listo.set()
+
+    def _subir_desde_operador(self, ssh_client, nodo, registro):
+        artefactos = self._obtener_artefactos_locales()
+
+        pendientes = verificar_checksums(
+            ssh_client,
+            {_ruta_remota(artefacto): artefacto["sha256"] for artefacto in artefactos},
+        )
+
+        archivos = []
+        for artefacto in artefactos:
+            if _ruta_remota(artefacto) in pendientes:
+                archivos.append(
+                    (artefacto["ruta_local"], _ruta_remota(artefacto), None)
+                )
+            archivos.append(
+                (
+                    _contenido_checksum(artefacto),
+                    _ruta_remota(artefacto) + ".sha256",
+                    None,
+                )
+            )
+
+        subir_archivos(ssh_client, archivos, nodo["nombre"], registro)
+        return True
+
+    def _preparar_master(self, ssh_client, nodo, registro):
+        comandos = [f"mkdir -p {DIRECTORIO_SERVIDOR_MASTER}"]
+
+        for artefacto in ARTEFACTOS:
+            ruta = shlex.quote(_ruta_remota(artefacto))
+            comandos.append(
+                f"( [ -f {ruta}.sha256 ] && sha256sum -c --status {ruta}.sha256 ) || "
+                f"( wget -q -O {ruta} {shlex.quote(artefacto['url'])} && "
+                f"sha256sum {ruta} > {ruta}.sha256 )"
+            )
+            comandos.append(f"ln -sf {ruta} {DIRECTORIO_SERVIDOR_MASTER}/")
+            comandos.append(f"cut -d' ' -f1 {ruta}.sha256")
+
+        # El servidor escucha solo en la IP privada del master
+        comandos.append("hostname -I | awk '{print $1}'")
+
+        resultado = ejecutar_comando(
+            ssh_client, " && ".join(comandos), nodo["nombre"], registro
+        )
+        if not resultado["resultado"]:
+            raise RuntimeError("No se pudieron descargar los artefactos en el master")
+
+        *sumas, ip_privada = resultado["salida"].split()
+
+        artefactos = [
+            dict(artefacto, sha256=suma) for artefacto, suma in zip(ARTEFACTOS, sumas)
+        ]
+
+        # El patrón [h]ttp evita que pkill encuentre su propia shell
+        ejecutar_comando(
+            ssh_client,
+            f"pkill -f '[h]ttp.server {PUERTO_ARTEFACTOS}'; "
+            f"nohup python3 -m http.server {PUERTO_ARTEFACTOS} --bind {ip_privada} "
+            f"--directory {DIRECTORIO_SERVIDOR_MASTER} > /dev/null 2>&1 &",
+            nodo["nombre"],
+            registro,
+        )
+
+        self._datos_master.update(
+            ip_privada=ip_privada, artefactos=artefactos, ssh=ssh_client
+        )
+        registro.info("Artefactos servidos desde %s:%s", ip_privada, PUERTO_ARTEFACTOS)
+        return True
+
+    def _descargar_desde_master(self, ssh_client, nodo, registro):
+        if not self._master_listo.wait(self.tiempo_maximo):
+            raise RuntimeError("El master no publicó los artefactos a tiempo")
+
+        if self._datos_master["artefactos"] is None:
+            raise RuntimeError("El master no tiene los artefactos")
+
+        comandos = []
+        for artefacto in self._datos_master["artefactos"]:
+            archivo = posixpath.basename(artefacto["url"])
+            ruta = shlex.quote(_ruta_remota(artefacto))
+            url = f"http://{self._datos_master['ip_privada']}:{PUERTO_ARTEFACTOS}/{archivo}"
+            comandos.append(
+                f"echo {shlex.quote(_contenido_checksum(artefacto).strip())} > "
+                f"{ruta}.sha256 && "
+                f"( sha256sum -c --status {ruta}.sha256 || "
+                f"( wget -q -O {ruta} {url} && sha256sum -c --status {ruta}.sha256 ) )"
+            )
+
+        resultado = ejecutar_comando(
+            ssh_client, " && ".join(comandos), nodo["nombre"], registro
+        )
+        if not resultado["resultado"]:
+            raise RuntimeError(
+                "No se pudieron descargar los artefactos desde el master"
+            )
+
+        registro.info("Artefactos descargados desde el master en %s", nodo["nombre"])
+        return True
+
+    def finalizar(self):
+        """
+        Detiene el servidor HTTP de artefactos del master, si se inició.
+        """
+
+        ssh_client = self._datos_master["ssh"]
+
+        if ssh_client is None:
+            return
+
+        try:
+            ejecutar_comando(
+                ssh_client, f"pkill -f '[h]ttp.server {PUERTO_ARTEFACTOS}'", "master"
+            )
+        except Exception as e:
+            logger.warning("No se pudo detener el servidor de artefactos: %s", e)
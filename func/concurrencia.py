@@ -0,0 +1,289 @@
+import asyncio
+import logging
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+def ejecutar_concurrente(tareas, max_concurrencia=10):
+    """
+    Ejecuta un conjunto de tareas en paralelo con un máximo de tareas en vuelo.
+    Las tareas empiezan en el orden del diccionario.
+
+    Args:
+        tareas (dict): Diccionario {identificador: (funcion, kwargs)}.
+        max_concurrencia (int): Número máximo de tareas ejecutándose a la vez.
+
+    Returns:
+        dict: Diccionario {identificador: {"resultado": bool, "valor": object,
+        "error": Exception | None}} con el resultado de cada tarea.
+    """
+
+    resultados = {}
+
+    if not tareas:
+        return resultados
+
+    max_concurrencia = max(1, min(max_concurrencia, len(tareas)))
+
+    with ThreadPoolExecutor(max_workers=max_concurrencia) as executor:
+        futuros = {
+            executor.submit(funcion, **kwargs): identificador
+            for identificador, (funcion, kwargs) in tareas.items()
+        }
+
+        for futuro in as_completed(futuros):
+            identificador = futuros[futuro]
+            try:
+                resultados[identificador] = {
+                    "resultado": True,
+                    "valor": futuro.result(),
+                    "error": None,
+                }
+            except Exception as e:
+                logger.error("La tarea '%s' falló: %s", identificador, e)
+                resultados[identificador] = {
+                    "resultado": False,
+                    "valor": None,
+                    "error": e,
+                }
+
+    return resultados
+
+
+def ejecutar_grafo(tareas, max_concurrencia=4):
+    """
+    Ejecuta un grafo de tareas respetando sus dependencias.
+
+    Cada tarea se envía en cuanto terminan todas sus dependencias, de modo que
+    las tareas independientes se ejecutan a la vez.
+
+    Args:
+        tareas (dict): Diccionario {nombre: (funcion, [dependencias])}. La
+            función recibe un diccionario {dependencia: resultado}.
+        max_concurrencia (int): Número máximo de tareas ejecutándose a la vez.
+
+    Returns:
+        dict: Diccionario {nombre: resultado} con el resultado de cada tarea.
+
+    Raises:
+        ValueError: Si una dependencia no existe o hay un ciclo.
+        Exception: La primera excepción lanzada por una tarea.
+    """
+
+    for nombre, (_, dependencias) in tareas.items():
+        desconocidas = [d for d in dependencias if d not in tareas]
+        if desconocidas:
+            raise ValueError(
+                f"La tarea '{nombre}' depende de tareas inexistentes: {desconocidas}"
+            )
+
+    pendientes = dict(tareas)
+    resultados = {}
+    en_curso = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrencia)) as executor:
+        while pendientes or en_curso:
+            listas = [
+                nombre
+                for nombre, (_, dependencias) in pendientes.items()
+                if all(d in resultados for d in dependencias)
+            ]
+
+            for nombre in listas:
+                funcion, dependencias = pendientes.pop(nombre)
+                futuro = executor.submit(
+                    funcion, {d: resultados[d] for d in dependencias}
+                )
+                en_curso[futuro] = nombre
+
+            if not en_curso:
+                raise ValueError(
+                    f"Dependencias cíclicas entre las tareas: {list(pendientes)}"
+                )
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+
+            for futuro in terminados:
+                nombre = en_curso.pop(futuro)
+                resultados[nombre] = futuro.result()
+                logger.debug("Tarea '%s' completada", nombre)
+
+    return resultados
+
+
+async def ejecutar_concurrente_async(tareas, max_concurrencia=10):
+    """
+    Variante asíncrona de ejecutar_concurrente: ejecuta corutinas en el bucle
+    de eventos actual con un máximo de tareas en vuelo.
+
+    Args:
+        tareas (dict): Diccionario {identificador: (funcion_async, kwargs)}.
+        max_concurrencia (int): Número máximo de tareas ejecutándose a la vez.
+
+    Returns:
+        dict: El resultado de cada tarea, como en ejecutar_concurrente.
+    """
+
+    resultados = {}
+
+    if not tareas:
+        return resultados
+
+    semaforo = asyncio.Semaphore(max(1, max_concurrencia))
+
+    async def ejecutar(identificador, funcion, kwargs):
+        async with semaforo:
+            try:
+                valor = await funcion(**kwargs)
+            except Exception as e:
+                logger.error("La tarea '%s' falló: %s", identificador, e)
+                resultados[identificador] = {
+                    "resultado": False,
+                    "valor": None,
+                    "error": e,
+                }
+            else:
+                resultados[identificador] = {
+                    "resultado": True,
+                    "valor": valor,
+                    "error": None,
+                }
+
+    await asyncio.gather(
+        *(
+            ejecutar(identificador, funcion, kwargs)
+            for identificador, (funcion, kwargs) in tareas.items()
+        )
+    )
+
+    return resultados
+
+
+async def ejecutar_grafo_async(tareas):
+    """
+    Variante asíncrona de ejecutar_grafo. Cada tarea empieza en cuanto
+    terminan sus dependencias; no hay límite de concurrencia porque las
+    tareas solo esperan E/S.
+
+    Args:
+        tareas (dict): Diccionario {nombre: (funcion_async, [dependencias])}.
+            La función recibe un diccionario {dependencia: resultado}.
+
+    Returns:
+        dict: Diccionario {nombre: resultado} con el resultado de cada tarea.
+
+    Raises:
+        ValueError: Si una dependencia no existe o hay un ciclo.
+        Exception: La primera excepción lanzada por una tarea. El resto de
+            tareas se cancela.
+    """
+
+    for nombre, (_, dependencias) in tareas.items():
+        desconocidas = [d for d in dependencias if d not in tareas]
+        if desconocidas:
+            raise ValueError(
+                f"La tarea '{nombre}' depende de tareas inexistentes: {desconocidas}"
+            )
+
+    # Orden topológico para detectar ciclos antes de lanzar nada
+    resueltas = set()
+    pendientes = dict(tareas)
+    while pendientes:
+        listas = [
+            nombre
+            for nombre, (_, dependencias) in pendientes.items()
+            if all(d in resueltas for d in dependencias)
+        ]
+        if not listas:
+            raise ValueError(
+                f"Dependencias cíclicas entre las tareas: {list(pendientes)}"
+            )
+        for nombre in listas:
+            resueltas.add(nombre)
+            del pendientes[nombre]
+
+    futuros = {}
+
+    async def ejecutar(nombre):
+        funcion, dependencias = tareas[nombre]
+        valores = await asyncio.gather(*(futuros[d] for d in dependencias))
+        resultado = await funcion(dict(zip(dependencias, valores)))
+        logger.debug("Tarea '%s' completada", nombre)
+        return resultado
+
+    for nombre in tareas:
+        futuros[nombre] = asyncio.ensure_future(ejecutar(nombre))
+
+    try:
+        valores = await asyncio.gather(*futuros.values())
+    except BaseException:
+        for futuro in futuros.values():
+            futuro.cancel()
+        await asyncio.gather(*futuros.values(), return_exceptions=True)
+        raise
+
+    return dict(zip(futuros, valores))
+
+
+def ejecutar_pasos(pasos):
+    """
+    Ejecuta un generador de pasos con operaciones síncronas.
+
+    Los pasos se escriben una sola vez para las variantes síncrona y
+    asíncrona: cada operación se produce con yield y su resultado vuelve al
+    generador. Aquí las operaciones ya se han ejecutado al producirlas, así
+    que su valor se devuelve tal cual y sus excepciones se lanzan dentro del
+    propio generador.
+
+    Args:
+        pasos (generator): Generador que produce los resultados de las
+            operaciones.
+
+    Returns:
+        object: El valor que devuelve el generador.
+    """
+
+    resultado = None
+
+    while True:
+        try:
+            resultado = pasos.send(resultado)
+        except StopIteration as fin:
+            return fin.value
+
+
+async def ejecutar_pasos_async(pasos):
+    """
+    Variante asíncrona de ejecutar_pasos: cada operación producida es un
+    awaitable que se espera antes de devolver su resultado al generador. Si
+    falla, la excepción se lanza dentro del generador en el mismo punto.
+
+    Returns:
+        object: El valor que devuelve el generador.
+    """
+
+    resultado = None
+    error = None
+
+    while True:
+        try:
+            if error is not None:
+                operacion = pasos.throw(error)
+            else:
+                operacion = pasos.send(resultado)
+        except StopIteration as fin:
+            return fin.value
+
+        # También la cancelación, para que se ejecuten los finally del
+        # generador
+        try:
+            resultado, error = await operacion, None
+        except BaseException as e:
+            resultado, error = None, e
@@ -0,0 +1,378 @@
+import asyncio
+import atexit
+import importlib.util
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+import paramiko
+
+from config.configuraciones import (
+    MAX_CONCURRENCIA_ASYNC,
+    SSH_INTERVALO_KEEPALIVE,
+    SSH_TIEMPO_INACTIVIDAD,
+)
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+class PoolSSH:
+    """
+    Un pool de conexiones SSH indexado por (host, puerto, usuario, clave).
+
+    Cada conexión se abre una sola vez y se reutiliza en todas las
+    operaciones remotas sobre el mismo nodo. Las conexiones mantienen un
+    keepalive, se comprueban antes de reutilizarse y se cierran si pasan más
+    de tiempo_inactividad segundos sin usarse. Una conexión marcada con
+    en_uso (por ejemplo, mientras ejecuta un comando) nunca se cierra por
+    inactividad.
+
+    Args:
+        intervalo_keepalive (int): Segundos entre paquetes keepalive.
+        tiempo_inactividad (int): Segundos sin uso tras los que se cierra una
+            conexión.
+    """
+
+    def __init__(
+        self,
+        intervalo_keepalive=SSH_INTERVALO_KEEPALIVE,
+        tiempo_inactividad=SSH_TIEMPO_INACTIVIDAD,
+    ):
+        self.intervalo_keepalive = intervalo_keepalive
+        self.tiempo_inactividad = tiempo_inactividad
+
+        self.handshakes = 0
+        self.handshakes_evitados = 0
+        self.desalojos = 0
+
+        self._bloqueo = threading.Lock()
+        self._bloqueos_clave = {}
+        self._conexiones = {}
+
+    @staticmethod
+    def _esta_sana(ssh_client):
+        """
+        Comprueba que el transporte siga activo y autenticado.
+        """
+
+        transporte = ssh_client.get_transport()
+
+        if transporte is None or not transporte.is_active():
+            return False
+
+        if not transporte.is_authenticated():
+            return False
+
+        try:
+            transporte.send_ignore()
+        except Exception:
+            return False
+
+        return True
+
+    def _desalojar_inactivas(self):
+        """
+        Cierra las conexiones que llevan demasiado tiempo sin usarse. Debe
+        llamarse con el bloqueo tomado.
+        """
+
+        ahora = time.monotonic()
+
+        for clave, entrada in list(self._conexiones.items()):
+            if entrada["en_uso"]:
+                continue
+            if ahora - entrada["ultimo_uso"] > self.tiempo_inactividad:
+                logger.debug("Cerrando conexión SSH inactiva con %s", clave[0])
+                entrada["cliente"].close()
+                del self._conexiones[clave]
+                self.desalojos += 1
+
+    def obtener(self, nombre_host, usuario, clave_publica, port=22, tiempo_espera=None):
+        """
+        Devuelve un cliente SSH conectado al host, reutilizando la conexión
+        existente si está sana.
+
+        Args:
+            clave_publica (str): Ruta de la clave sin la extensión .pem.
+            tiempo_espera (float): Tiempo máximo para conectar, en segundos.
+
+        Returns:
+            paramiko.SSHClient: El cliente conectado. No debe cerrarse; usa
+            descartar() si la conexión falla.
+        """
+
+        clave = (nombre_host, port, usuario, clave_publica)
+
+        with self._bloqueo:
+            self._desalojar_inactivas()
+            bloqueo_clave = self._bloqueos_clave.setdefault(clave, threading.Lock())
+
+        # Un bloqueo por clave evita abrir dos conexiones al mismo nodo a la vez
+        with bloqueo_clave:
+            with self._bloqueo:
+                entrada = self._conexiones.get(clave)
+
+            if entrada is not None:
+                if self._esta_sana(entrada["cliente"]):
+                    with self._bloqueo:
+                        entrada["ultimo_uso"] = time.monotonic()
+                        self.handshakes_evitados += 1
+                    return entrada["cliente"]
+
+                logger.debug("Conexión SSH con %s no válida, reconectando", nombre_host)
+                self.descartar(nombre_host, usuario, clave_publica, port)
+
+            ssh_client = paramiko.SSHClient()
+            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            ssh_client.connect(
+                hostname=nombre_host,
+                port=port,
+                username=usuario,
+                key_filename=clave_publica + ".pem",
+                timeout=tiempo_espera,
+                banner_timeout=tiempo_espera,
+                auth_timeout=tiempo_espera,
+            )
+            ssh_client.get_transport().set_keepalive(self.intervalo_keepalive)
+
+            with self._bloqueo:
+                self._conexiones[clave] = {
+                    "cliente": ssh_client,
+                    "ultimo_uso": time.monotonic(),
+                    "en_uso": 0,
+                }
+                self.handshakes += 1
+
+            logger.debug("Nueva conexión SSH con %s", nombre_host)
+            return ssh_client
+
+    @contextmanager
+    def en_uso(self, ssh_client):
+        """
+        Marca la conexión como en uso mientras dura el bloque, para que no se
+        cierre por inactividad aunque el comando dure más que
+        tiempo_inactividad. Al salir cuenta como último uso. Los clientes que
+        no pertenecen al pool se ignoran.
+        """
+
+        with self._bloqueo:
+            entrada = next(
+                (e for e in self._conexiones.values() if e["cliente"] is ssh_client),
+                None,
+            )
+            if entrada is not None:
+                entrada["en_uso"] += 1
+
+        try:
+            yield ssh_client
+        finally:
+            if entrada is not None:
+                with self._bloqueo:
+                    entrada["en_uso"] -= 1
+                    entrada["ultimo_uso"] = time.monotonic()
+
+    def descartar(self, nombre_host, usuario, clave_publica, port=22):
+        """
+        Cierra y elimina del pool la conexión con el host, si existe.
+        """
+
+        with self._bloqueo:
+            entrada = self._conexiones.pop(
+                (nombre_host, port, usuario, clave_publica), None
+            )
+
+        if entrada is not None:
+            entrada["cliente"].close()
+
+    def cerrar(self):
+        """
+        Cierra todas las conexiones del pool.
+        """
+
+        with self._bloqueo:
+            for entrada in self._conexiones.values():
+                entrada["cliente"].close()
+            self._conexiones = {}
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores del pool.
+
+        Returns:
+            dict: Diccionario con las claves "handshakes", "handshakes_evitados",
+            "desalojos" y "conexiones_abiertas".
+        """
+
+        with self._bloqueo:
+            return {
+                "handshakes": self.handshakes,
+                "handshakes_evitados": self.handshakes_evitados,
+                "desalojos": self.desalojos,
+                "conexiones_abiertas": len(self._conexiones),
+            }
+
+
+# Pool compartido por todas las operaciones remotas del proceso
+pool_ssh = PoolSSH()
+atexit.register(pool_ssh.cerrar)
+
+
+class PoolSSHAsync:
+    """
+    Variante asíncrona de PoolSSH sobre asyncssh, para usar desde un único
+    bucle de eventos.
+
+    Cada conexión se abre una sola vez por (host, puerto, usuario, clave) y
+    se reutiliza mientras siga abierta. asyncssh se importa al abrir la
+    primera conexión, ya que es una dependencia opcional.
+
+    Args:
+        intervalo_keepalive (int): Segundos entre paquetes keepalive.
+    """
+
+    def __init__(self, intervalo_keepalive=SSH_INTERVALO_KEEPALIVE):
+        self.intervalo_keepalive = intervalo_keepalive
+
+        self.handshakes = 0
+        self.handshakes_evitados = 0
+
+        self._bloqueos_clave = {}
+        self._conexiones = {}
+
+    async def obtener(
+        self, nombre_host, usuario, clave_publica, port=22, tiempo_espera=None
+    ):
+        """
+        Devuelve una conexión asyncssh con el host, reutilizando la existente
+        si sigue abierta.
+
+        Args:
+            clave_publica (str): Ruta de la clave sin la extensión .pem.
+            tiempo_espera (float): Tiempo máximo para conectar, en segundos.
+
+        Returns:
+            asyncssh.SSHClientConnection: La conexión. No debe cerrarse; usa
+            descartar() si falla.
+        """
+
+        import asyncssh
+
+        clave = (nombre_host, port, usuario, clave_publica)
+        bloqueo_clave = self._bloqueos_clave.setdefault(clave, asyncio.Lock())
+
+        # Un bloqueo por clave evita abrir dos conexiones al mismo nodo a la vez
+        async with bloqueo_clave:
+            conexion = self._conexiones.get(clave)
+
+            if conexion is not None:
+                if not conexion.is_closed():
+                    self.handshakes_evitados += 1
+                    return conexion
+
+                logger.debug("Conexión SSH con %s cerrada, reconectando", nombre_host)
+                self.descartar(nombre_host, usuario, clave_publica, port)
+
+            conexion = await asyncssh.connect(
+                nombre_host,
+                port=port,
+                username=usuario,
+                client_keys=[clave_publica + ".pem"],
+                known_hosts=None,
+                connect_timeout=tiempo_espera,
+                login_timeout=tiempo_espera,
+                keepalive_interval=self.intervalo_keepalive,
+            )
+
+            self._conexiones[clave] = conexion
+            self.handshakes += 1
+
+            logger.debug("Nueva conexión SSH asíncrona con %s", nombre_host)
+            return conexion
+
+    def descartar(self, nombre_host, usuario, clave_publica, port=22):
+        """
+        Cierra y elimina del pool la conexión con el host, si existe.
+        """
+
+        conexion = self._conexiones.pop(
+            (nombre_host, port, usuario, clave_publica), None
+        )
+
+        if conexion is not None:
+            conexion.close()
+
+    async def cerrar(self):
+        """
+        Cierra todas las conexiones del pool y espera a que terminen.
+        """
+
+        conexiones = list(self._conexiones.values())
+        self._conexiones = {}
+
+        for conexion in conexiones:
+            conexion.close()
+
+        for conexion in conexiones:
+            await conexion.wait_closed()
+
+    def estadisticas(self):
+        """
+        Devuelve los contadores del pool.
+
+        Returns:
+            dict: Diccionario con las claves "handshakes", "handshakes_evitados"
+            y "conexiones_abiertas".
+        """
+
+        return {
+            "handshakes": self.handshakes,
+            "handshakes_evitados": self.handshakes_evitados,
+            "conexiones_abiertas": len(self._conexiones),
+        }
+
+
+def asyncssh_disponible():
+    """
+    Indica si asyncssh está instalado. Sin él, las variantes asíncronas de
+    las operaciones remotas ejecutan las síncronas en hilos (ver
+    ejecutar_sin_asyncssh).
+    """
+
+    return importlib.util.find_spec("asyncssh") is not None
+
+
+# Sin asyncssh, todas las operaciones remotas de la orquestación asíncrona
+# pueden estar en vuelo a la vez; el ejecutor por defecto de asyncio
+# (min(32, cpus + 4) hilos) las serializaría
+_ejecutor_sin_asyncssh = None
+_bloqueo_ejecutor = threading.Lock()
+
+
+async def ejecutar_sin_asyncssh(funcion, *args, **kwargs):
+    """
+    Ejecuta la variante síncrona de una operación remota en un hilo, con
+    tantos hilos como MAX_CONCURRENCIA_ASYNC. Se usa cuando asyncssh no está
+    instalado.
+    """
+
+    global _ejecutor_sin_asyncssh
+
+    with _bloqueo_ejecutor:
+        if _ejecutor_sin_asyncssh is None:
+            _ejecutor_sin_asyncssh = ThreadPoolExecutor(
+                max_workers=max(1, MAX_CONCURRENCIA_ASYNC),
+                thread_name_prefix="ssh-sincrono",
+            )
+
+    return await asyncio.get_running_loop().run_in_executor(
+        _ejecutor_sin_asyncssh, partial(funcion, *args, **kwargs)
+    )
+
+
+# Pool compartido por las operaciones remotas asíncronas. Se cierra desde el
+# bucle de eventos que lo usa (ver orquestar_cluster_async)
+pool_ssh_async = PoolSSHAsync()
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import random
+import socket
+import time
+
+from config.configuraciones import MAX_CONCURRENCIA, TIEMPO_MAXIMO_DISPONIBILIDAD
+from func.concurrencia import ejecutar_concurrente
+from func.conexiones_ssh import (
+    asyncssh_disponible,
+    ejecutar_sin_asyncssh,
+    pool_ssh,
+    pool_ssh_async,
+)
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+def esperar_con_reintentos(
+    sonda, descripcion, plazo, espera_inicial=2, espera_maxima=30
+):
+    """
+    Ejecuta una sonda hasta que devuelva True o se alcance el plazo.
+
+    Entre intentos espera con retroceso exponencial y jitter, para que los
+    nodos de un mismo clúster no consulten a la vez.
+
+    Args:
+        sonda (callable): Función sin argumentos que devuelve True si está lista.
+        descripcion (str): Descripción de la sonda para los registros.
+        plazo (float): Instante límite según time.monotonic().
+        espera_inicial (float): Espera en segundos tras el primer intento.
+        espera_maxima (float): Espera máxima en segundos entre intentos.
+
+    Returns:
+        bool: True si la sonda tuvo éxito antes del plazo.
+    """
+
+    intento = 0
+
+    while True:
+        try:
+            if sonda():
+                logger.debug("%s: listo tras %s intentos", descripcion, intento + 1)
+                return True
+        except Exception as e:
+            logger.debug("%s: intento %s fallido: %s", descripcion, intento + 1, e)
+
+        restante = plazo - time.monotonic()
+        if restante <= 0:
+            logger.error("%s: se alcanzó el tiempo máximo de espera", descripcion)
+            return False
+
+        espera = min(espera_maxima, espera_inicial * 2**intento)
+        time.sleep(min(restante, random.uniform(espera / 2, espera)))
+        intento += 1
+
+
+def sonda_estado_aprovisionamiento(cliente_azure, grupo_recursos, nombre_vm):
+    """
+    Comprueba que Azure haya terminado de aprovisionar la VM.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    vm = compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
+
+    return vm.provisioning_state == "Succeeded"
+
+
+def sonda_puerto_tcp(nombre_host, port=22, tiempo_espera=5):
+    """
+    Comprueba que el puerto TCP acepte conexiones.
+    """
+
+    with socket.create_connection((nombre_host, port), timeout=tiempo_espera):
+        return True
+
+
+def sonda_ssh(nombre_host, usuario, clave_publica, port=22, tiempo_espera=10):
+    """
+    Comprueba que el servidor SSH responda con su banner y acepte el inicio
+    de sesión con la clave del clúster.
+
+    La conexión queda en el pool SSH y la reutilizan las fases siguientes.
+    """
+
+    ssh_client = pool_ssh.obtener(
+        nombre_host, usuario, clave_publica, port, tiempo_espera=tiempo_espera
+    )
+
+    return ssh_client.get_transport().is_authenticated()
+
+
+def esperar_nodo_listo(cliente_azure, grupo_recursos, nodo, clave_publica, plazo):
+    """
+    Espera a que un nodo esté aprovisionado, con el puerto 22 abierto y
+    aceptando sesiones SSH.
+
+    Args:
+        nodo (dict): Diccionario con las claves "nombre", "ip" y "usuario".
+        plazo (float): Instante límite según time.monotonic().
+
+    Returns:
+        bool: True si el nodo está listo antes del plazo.
+    """
+
+    inicio = time.monotonic()
+    nombre = nodo["nombre"]
+
+    sondas = [
+        (
+            f"{nombre} (aprovisionamiento)",
+            lambda: sonda_estado_aprovisionamiento(
+                cliente_azure, grupo_recursos, nombre
+            ),
+        ),
+        (f"{nombre} (puerto 22)", lambda: sonda_puerto_tcp(nodo["ip"])),
+        (
+            f"{nombre} (ssh)",
+            lambda: sonda_ssh(nodo["ip"], nodo["usuario"], clave_publica),
+        ),
+    ]
+
+    for descripcion, sonda in sondas:
+        if not esperar_con_reintentos(sonda, descripcion, plazo):
+            return False
+
+    logger.info("Nodo %s listo en %.1f s", nombre, time.monotonic() - inicio)
+    return True
+
+
+async def esperar_con_reintentos_async(
+    sonda, descripcion, plazo, espera_inicial=2, espera_maxima=30
+):
+    """
+    Variante asíncrona de esperar_con_reintentos. sonda es una función sin
+    argumentos que devuelve una corrutina.
+    """
+
+    intento = 0
+
+    while True:
+        try:
+            if await sonda():
+                logger.debug("%s: listo tras %s intentos", descripcion, intento + 1)
+                return True
+        except Exception as e:
+            logger.debug("%s: intento %s fallido: %s", descripcion, intento + 1, e)
+
+        restante = plazo - time.monotonic()
+        if restante <= 0:
+            logger.error("%s: se alcanzó el tiempo máximo de espera", descripcion)
+            return False
+
+        espera = min(espera_maxima, espera_inicial * 2**intento)
+        await asyncio.sleep(min(restante, random.uniform(espera / 2, espera)))
+        intento += 1
+
+
+async def sonda_estado_aprovisionamiento_async(
+    cliente_azure, grupo_recursos, nombre_vm
+):
+    """
+    Variante asíncrona de sonda_estado_aprovisionamiento, sobre
+    ClienteAzureAsync.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    vm = await compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
+
+    return vm.provisioning_state == "Succeeded"
+
+
+async def sonda_puerto_tcp_async(nombre_host, port=22, tiempo_espera=5):
+    """
+    Variante asíncrona de sonda_puerto_tcp.
+    """
+
+    _, escritor = await asyncio.wait_for(
+        asyncio.open_connection(nombre_host, port), tiempo_espera
+    )
+    escritor.close()
+    await escritor.wait_closed()
+
+    return True
+
+
+async def sonda_ssh_async(
+    nombre_host, usuario, clave_publica, port=22, tiempo_espera=10
+):
+    """
+    Variante asíncrona de sonda_ssh. La conexión queda en pool_ssh_async, o
+    en pool_ssh si asyncssh no está instalado.
+    """
+
+    if not asyncssh_disponible():
+        return await ejecutar_sin_asyncssh(
+            sonda_ssh, nombre_host, usuario, clave_publica, port, tiempo_espera
+        )
+
+    await pool_ssh_async.obtener(
+        nombre_host, usuario, clave_publica, port, tiempo_espera=tiempo_espera
+    )
+
+    return True
+
+
+async def esperar_nodo_listo_async(
+    cliente_azure, grupo_recursos, nodo, clave_publica, plazo
+):
+    """
+    Variante asíncrona de esperar_nodo_listo, sobre ClienteAzureAsync.
+
+    Returns:
+        bool: True si el nodo está listo antes del plazo.
+    """
+
+    inicio = time.monotonic()
+    nombre = nodo["nombre"]
+
+    sondas = [
+        (
+            f"{nombre} (aprovisionamiento)",
+            lambda: sonda_estado_aprovisionamiento_async(
+                cliente_azure, grupo_recursos, nombre
+            ),
+        ),
+        (f"{nombre} (puerto 22)", lambda: sonda_puerto_tcp_async(nodo["ip"])),
+        (
+            f"{nombre} (ssh)",
+            lambda: sonda_ssh_async(nodo["ip"], nodo["usuario"], clave_publica),
+        ),
+    ]
+
+    for descripcion, sonda in sondas:
+        if not await esperar_con_reintentos_async(sonda, descripcion, plazo):
+            return False
+
+    logger.info("Nodo %s listo en %.1f s", nombre, time.monotonic() - inicio)
+    return True
+
+
+def esperar_nodos_listos(
+    cliente_azure,
+    grupo_recursos,
+    nodos,
+    clave_publica,
+    tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD,
+    al_estar_listo=None,
+    max_concurrencia=MAX_CONCURRENCIA,
+):
+    """
+    Espera en paralelo a que todos los nodos estén listos.
+
+    Args:
+        nodos (list): Lista de diccionarios con las claves "nombre", "ip" y
+            "usuario".
+        tiempo_maximo (float): Tiempo máximo global de espera en segundos.
+        al_estar_listo (callable): Función opcional que recibe el nodo y se
+            ejecuta en cuanto ese nodo está listo, sin esperar al resto.
+
+    Returns:
+        dict: Diccionario {nombre: bool} indicando qué nodos están listos y, si
+        se pasó al_estar_listo, completaron esa fase sin errores.
+    """
+
+    plazo = time.monotonic() + tiempo_maximo
+
+    def esperar_y_continuar(nodo):
+        if not esperar_nodo_listo(
+            cliente_azure, grupo_recursos, nodo, clave_publica, plazo
+        ):
+            return False
+
+        if al_estar_listo is not None:
+            al_estar_listo(nodo)
+
+        return True
+
+    resultados = ejecutar_concurrente(
+        {nodo["nombre"]: (esperar_y_continuar, {"nodo": nodo}) for nodo in nodos},
+        max_concurrencia=max_concurrencia,
+    )
+
+    return {
+        nombre: resultado["resultado"] and resultado["valor"]
+        for nombre, resultado in resultados.items()
+    }
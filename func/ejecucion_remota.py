@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import select
+import time
+from contextlib import ExitStack
+
+from func.conexiones_ssh import pool_ssh
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+TAMANIO_LECTURA = 32 * 1024
+INTERVALO_SELECT = 0.5
+
+
+class _SalidaCanal:
+    """
+    Acumula la salida de un canal y la registra línea a línea con el nombre
+    del nodo.
+    """
+
+    def __init__(self, nombre_nodo, registro, es_error):
+        self.nombre_nodo = nombre_nodo
+        self.registro = registro
+        self.es_error = es_error
+        self.pendiente = ""
+        self.lineas = []
+
+    def alimentar(self, datos):
+        self.pendiente += datos.decode("utf-8", errors="replace")
+        *completas, self.pendiente = self.pendiente.split("\n")
+        for linea in completas:
+            self._registrar(linea)
+
+    def cerrar(self):
+        if self.pendiente:
+            self._registrar(self.pendiente)
+            self.pendiente = ""
+
+    def _registrar(self, linea):
+        linea = linea.rstrip("\r")
+        self.lineas.append(linea)
+        if self.es_error:
+            self.registro.warning("[%s] STDERR: %s", self.nombre_nodo, linea)
+        else:
+            self.registro.info("[%s] STDOUT: %s", self.nombre_nodo, linea)
+
+
+def ejecutar_comandos(tareas, tiempo_maximo=None):
+    """
+    Ejecuta varios comandos remotos a la vez y lee su stdout y stderr sin
+    bloquear, con un único hilo.
+
+    Cada línea de salida se registra con el nombre de su nodo. Leer ambos
+    flujos a la vez evita que un comando se bloquee porque stderr se llenó.
+
+    Args:
+        tareas (list): Diccionarios con las claves "nombre_nodo", "ssh_client" y
+            "comando", y opcionalmente "registro" (logging.Logger).
+        tiempo_maximo (float): Segundos máximos de espera. Los comandos que no
+            terminen a tiempo se cierran y se marcan como fallidos.
+
+    Returns:
+        dict: Diccionario {nombre_nodo: {"resultado": bool, "codigo_salida":
+        int | None, "duracion": float, "salida": str, "errores": str}}.
+    """
+
+    inicio = time.monotonic()
+    activos = {}
+    resultados = {}
+
+    # Las conexiones se marcan en uso hasta que terminan todos los comandos,
+    # para que el pool no las cierre por inactividad durante un script largo
+    with ExitStack() as pila:
+        for tarea in tareas:
+            pila.enter_context(pool_ssh.en_uso(tarea["ssh_client"]))
+
+        for tarea in tareas:
+            nombre_nodo = tarea["nombre_nodo"]
+            registro = tarea.get("registro") or logger
+
+            canal = tarea["ssh_client"].get_transport().open_session()
+            # Si falla la apertura de un canal posterior, los ya abiertos se
+            # cierran al salir del bloque. Cerrar un canal dos veces no falla
+            pila.callback(canal.close)
+            canal.exec_command(tarea["comando"])
+            canal.setblocking(0)
+
+            registro.debug("[%s] Ejecutando: %s", nombre_nodo, tarea["comando"])
+
+            activos[canal] = {
+                "nombre_nodo": nombre_nodo,
+                "inicio": time.monotonic(),
+                "stdout": _SalidaCanal(nombre_nodo, registro, es_error=False),
+                "stderr": _SalidaCanal(nombre_nodo, registro, es_error=True),
+                "registro": registro,
+            }
+
+        def finalizar(canal, codigo_salida):
+            estado = activos.pop(canal)
+            estado["stdout"].cerrar()
+            estado["stderr"].cerrar()
+            canal.close()
+
+            duracion = time.monotonic() - estado["inicio"]
+            resultados[estado["nombre_nodo"]] = {
+                "resultado": codigo_salida == 0,
+                "codigo_salida": codigo_salida,
+                "duracion": duracion,
+                "salida": "\n".join(estado["stdout"].lineas),
+                "errores": "\n".join(estado["stderr"].lineas),
+            }
+
+            estado["registro"].info(
+                "[%s] Comando terminado con código %s en %.1f s",
+                estado["nombre_nodo"],
+                codigo_salida,
+                duracion,
+            )
+
+        while activos:
+            if tiempo_maximo is not None and time.monotonic() - inicio > tiempo_maximo:
+                for canal in list(activos):
+                    activos[canal]["registro"].error(
+                        "[%s] Tiempo máximo de ejecución superado",
+                        activos[canal]["nombre_nodo"],
+                    )
+                    finalizar(canal, None)
+                break
+
+            # Los canales de paramiko exponen un descriptor que se activa cuando
+            # llega salida por stdout o stderr o cuando el canal se cierra
+            select.select(list(activos), [], [], INTERVALO_SELECT)
+
+            for canal in list(activos):
+                estado = activos[canal]
+
+                while canal.recv_ready():
+                    estado["stdout"].alimentar(canal.recv(TAMANIO_LECTURA))
+
+                while canal.recv_stderr_ready():
+                    estado["stderr"].alimentar(canal.recv_stderr(TAMANIO_LECTURA))
+
+                if (
+                    canal.exit_status_ready()
+                    and not canal.recv_ready()
+                    and not canal.recv_stderr_ready()
+                ):
+                    finalizar(canal, canal.recv_exit_status())
+
+    return resultados
+
+
+def ejecutar_comando(ssh_client, comando, nombre_nodo, registro=None):
+    """
+    Ejecuta un único comando remoto leyendo stdout y stderr a la vez.
+
+    Returns:
+        dict: El resultado del comando, como en ejecutar_comandos.
+    """
+
+    return ejecutar_comandos(
+        [
+            {
+                "nombre_nodo": nombre_nodo,
+                "ssh_client": ssh_client,
+                "comando": comando,
+                "registro": registro,
+            }
+        ]
+    )[nombre_nodo]
+
+
+async def ejecutar_comando_async(
+    conexion, comando, nombre_nodo, registro=None, tiempo_maximo=None
+):
+    """
+    Variante asíncrona de ejecutar_comando sobre una conexión asyncssh. Lee
+    stdout y stderr a la vez y registra cada línea con el nombre del nodo.
+
+    Returns:
+        dict: El resultado del comando, como en ejecutar_comandos.
+    """
+
+    registro = registro or logger
+    inicio = time.monotonic()
+
+    stdout = _SalidaCanal(nombre_nodo, registro, es_error=False)
+    stderr = _SalidaCanal(nombre_nodo, registro, es_error=True)
+
+    async def leer(flujo, salida):
+        while True:
+            datos = await flujo.read(TAMANIO_LECTURA)
+            if not datos:
+                break
+            salida.alimentar(datos)
+
+    registro.debug("[%s] Ejecutando: %s", nombre_nodo, comando)
+
+    # encoding=None para recibir bytes, como los canales de paramiko
+    proceso = await conexion.create_process(comando, encoding=None)
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                leer(proceso.stdout, stdout),
+                leer(proceso.stderr, stderr),
+                proceso.wait(),
+            ),
+            tiempo_maximo,
+        )
+        codigo_salida = proceso.exit_status
+    except asyncio.TimeoutError:
+        registro.error("[%s] Tiempo máximo de ejecución superado", nombre_nodo)
+        codigo_salida = None
+    finally:
+        proceso.close()
+        stdout.cerrar()
+        stderr.cerrar()
+
+    duracion = time.monotonic() - inicio
+
+    registro.info(
+        "[%s] Comando terminado con código %s en %.1f s",
+        nombre_nodo,
+        codigo_salida,
+        duracion,
+    )
+
+    return {
+        "resultado": codigo_salida == 0,
+        "codigo_salida": codigo_salida,
+        "duracion": duracion,
+        "salida": "\n".join(stdout.lineas),
+        "errores": "\n".join(stderr.lineas),
+    }
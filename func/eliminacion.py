@@ -0,0 +1,654 @@
+import asyncio
+import logging
+import time
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from config.configuraciones import MAX_CONCURRENCIA
+from func.concurrencia import ejecutar_concurrente, ejecutar_grafo
+from func.funciones_vm import ETIQUETA_CLUSTER, clave_cache_grupo_seguridad
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+REINTENTOS_ELIMINACION = 3
+ESPERA_REINTENTO = 5
+
+# Tipos de recurso de Azure que crea el clúster
+TIPOS_AZURE = {
+    "microsoft.compute/virtualmachines": "vm",
+    "microsoft.network/networkinterfaces": "nic",
+    "microsoft.compute/disks": "disco",
+    "microsoft.network/publicipaddresses": "ip",
+    "microsoft.network/networksecuritygroups": "nsg",
+}
+
+
+def eliminar_con_reintentos(
+    operacion, descripcion, reintentos=REINTENTOS_ELIMINACION, espera=ESPERA_REINTENTO
+):
+    """
+    Lanza una eliminación de Azure y espera a que termine, reintentando si
+    falla. Un recurso que ya no existe se considera eliminado.
+
+    Args:
+        operacion (callable): Función sin argumentos que devuelve el poller.
+        descripcion (str): Descripción del recurso para los registros.
+
+    Returns:
+        bool: True si el recurso ya no existe.
+    """
+
+    for intento in range(1, reintentos + 1):
+        try:
+            operacion().result()
+            logger.info("%s eliminado.", descripcion)
+            return True
+
+        except ResourceNotFoundError:
+            logger.debug("%s no existe.", descripcion)
+            return True
+
+        except Exception as e:
+            logger.warning(
+                "Error al eliminar %s (intento %s de %s): %s",
+                descripcion,
+                intento,
+                reintentos,
+                e,
+            )
+            if intento < reintentos:
+                time.sleep(espera * intento)
+
+    logger.error("No se pudo eliminar %s", descripcion)
+    return False
+
+
+async def eliminar_con_reintentos_async(
+    operacion, descripcion, reintentos=REINTENTOS_ELIMINACION, espera=ESPERA_REINTENTO
+):
+    """
+    Variante asíncrona de eliminar_con_reintentos.
+
+    Args:
+        operacion (callable): Función sin argumentos que devuelve la corrutina
+            begin_delete de un cliente asíncrono.
+
+    Returns:
+        bool: True si el recurso ya no existe.
+    """
+
+    for intento in range(1, reintentos + 1):
+        try:
+            poller = await operacion()
+            await poller.result()
+            logger.info("%s eliminado.", descripcion)
+            return True
+
+        except ResourceNotFoundError:
+            logger.debug("%s no existe.", descripcion)
+            return True
+
+        except Exception as e:
+            logger.warning(
+                "Error al eliminar %s (intento %s de %s): %s",
+                descripcion,
+                intento,
+                reintentos,
+                e,
+            )
+            if intento < reintentos:
+                await asyncio.sleep(espera * intento)
+
+    logger.error("No se pudo eliminar %s", descripcion)
+    return False
+
+
+def recursos_por_nombre(nombre_vm, ids=None):
+    """
+    Nombres de los recursos de una VM según cómo los crea crear_vm. Si se
+    indican los ids guardados en el estado ({tipo: id}), se toman de ellos.
+    """
+
+    recursos = {
+        "vm": nombre_vm,
+        "nic": f"{nombre_vm}-nic",
+        "disco": f"{nombre_vm}disk",
+        "ip": f"{nombre_vm}-ip",
+    }
+
+    for tipo, id_recurso in (ids or {}).items():
+        if tipo in recursos and id_recurso:
+            recursos[tipo] = id_recurso.split("/")[-1]
+
+    return recursos
+
+
+def obtener_recursos_vms(cliente_azure, grupo_recursos, nombres_vms, ids_vms=None):
+    """
+    Obtiene los nombres del disco, la NIC y la IP pública de varias VMs con
+    dos listados en bloque (VMs y NICs), en lugar de dos llamadas por VM.
+
+    Si una VM o su NIC ya no existen (por ejemplo, tras una eliminación
+    interrumpida) se usan los ids guardados en ids_vms ({nombre: {tipo: id}})
+    o, si no los hay, los nombres con los que crear_vm los crea, para no
+    dejar recursos huérfanos.
+
+    Returns:
+        list: Un diccionario por VM con las claves "vm", "nic", "disco" e
+        "ip", y "en_cascada" con los tipos que Azure elimina junto con la VM
+        (deleteOption "Delete").
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    network_client = cliente_azure.obtener_cliente_red()
+
+    listados = ejecutar_concurrente(
+        {
+            "vm": (
+                lambda: {
+                    vm.name: vm
+                    for vm in compute_client.virtual_machines.list(grupo_recursos)
+                },
+                {},
+            ),
+            "nic": (
+                lambda: {
+                    nic.name: nic
+                    for nic in network_client.network_interfaces.list(grupo_recursos)
+                },
+                {},
+            ),
+        }
+    )
+
+    for resultado in listados.values():
+        if not resultado["resultado"]:
+            raise resultado["error"]
+
+    vms = listados["vm"]["valor"]
+    nics = listados["nic"]["valor"]
+
+    recursos_vms = []
+
+    for nombre_vm in nombres_vms:
+        recursos = recursos_vm(
+            nombre_vm, vms.get(nombre_vm), (ids_vms or {}).get(nombre_vm)
+        )
+        completar_ip_publica(recursos, nics.get(recursos["nic"]))
+        recursos_vms.append(recursos)
+
+    return recursos_vms
+
+
+def recursos_vm(nombre_vm, vm, ids=None):
+    """
+    Obtiene de la VM los nombres de su disco y su NIC y cuáles se eliminan en
+    cascada. Si la VM no existe se usan los nombres de recursos_por_nombre.
+
+    Returns:
+        dict: Como en obtener_recursos_vms, sin completar la IP pública.
+    """
+
+    recursos = recursos_por_nombre(nombre_vm, ids)
+    recursos["en_cascada"] = set()
+
+    if vm is None:
+        logger.debug("La VM %s no existe", nombre_vm)
+        return recursos
+
+    os_disk = vm.storage_profile.os_disk
+    interfaz = vm.network_profile.network_interfaces[0]
+    recursos["disco"] = os_disk.name
+    recursos["nic"] = interfaz.id.split("/")[-1]
+    if os_disk.delete_option == "Delete":
+        recursos["en_cascada"].add("disco")
+    if interfaz.delete_option == "Delete":
+        recursos["en_cascada"].add("nic")
+
+    return recursos
+
+
+def completar_ip_publica(recursos, nic):
+    """
+    Completa en recursos el nombre de la IP pública de la NIC y si se elimina
+    en cascada.
+    """
+
+    if nic is None:
+        logger.debug("La NIC %s no existe", recursos["nic"])
+        return
+
+    ip_publica = nic.ip_configurations[0].public_ip_address
+    if ip_publica:
+        recursos["ip"] = ip_publica.id.split("/")[-1]
+        # La IP solo se elimina en cascada si también lo hace la NIC
+        if "nic" in recursos["en_cascada"] and ip_publica.delete_option == "Delete":
+            recursos["en_cascada"].add("ip")
+
+
+def listar_recursos_existentes(cliente_azure, grupo_recursos):
+    """
+    Lista en bloque los nombres de los recursos del grupo, una llamada por
+    tipo.
+
+    Returns:
+        dict: Diccionario {tipo: set(nombres)} con los tipos "vm", "nic",
+        "disco", "ip" y "nsg".
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    network_client = cliente_azure.obtener_cliente_red()
+
+    listados = {
+        "vm": lambda: compute_client.virtual_machines.list(grupo_recursos),
+        "nic": lambda: network_client.network_interfaces.list(grupo_recursos),
+        "disco": lambda: compute_client.disks.list_by_resource_group(grupo_recursos),
+        "ip": lambda: network_client.public_ip_addresses.list(grupo_recursos),
+        "nsg": lambda: network_client.network_security_groups.list(grupo_recursos),
+    }
+
+    resultados = ejecutar_concurrente(
+        {
+            tipo: (
+                lambda listado: {recurso.name for recurso in listado()},
+                {"listado": listado},
+            )
+            for tipo, listado in listados.items()
+        }
+    )
+
+    for tipo, resultado in resultados.items():
+        if not resultado["resultado"]:
+            raise resultado["error"]
+
+    return {tipo: resultado["valor"] for tipo, resultado in resultados.items()}
+
+
+def operaciones_eliminacion(cliente_azure):
+    """
+    Devuelve la operación begin_delete y la etiqueta de cada tipo de recurso.
+    Sirve tanto para ClienteAzure como para ClienteAzureAsync.
+
+    Returns:
+        dict: Diccionario {tipo: (begin_delete, etiqueta)}.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    network_client = cliente_azure.obtener_cliente_red()
+
+    return {
+        "vm": (compute_client.virtual_machines.begin_delete, "VM"),
+        "nic": (network_client.network_interfaces.begin_delete, "NIC"),
+        "disco": (compute_client.disks.begin_delete, "Disco"),
+        "ip": (network_client.public_ip_addresses.begin_delete, "IP pública"),
+        "nsg": (network_client.network_security_groups.begin_delete, "NSG"),
+    }
+
+
+def _tarea_eliminacion(cliente_azure, grupo_recursos, tipo, nombre):
+    """
+    Devuelve la tarea del grafo que elimina un recurso.
+
+    La tarea devuelve True si el recurso ya no existe y se omite si alguna de
+    sus dependencias falló.
+    """
+
+    begin_delete, etiqueta = operaciones_eliminacion(cliente_azure)[tipo]
+
+    if tipo == "nsg":
+        cliente_azure.cache.invalidar(
+            clave_cache_grupo_seguridad(grupo_recursos, nombre)
+        )
+
+    def eliminar(dependencias):
+        if not all(dependencias.values()):
+            logger.error(
+                "Se omite %s %s porque no se eliminó lo que depende de él",
+                etiqueta,
+                nombre,
+            )
+            return False
+
+        return eliminar_con_reintentos(
+            lambda: begin_delete(grupo_recursos, nombre),
+            f"{etiqueta} {nombre}",
+        )
+
+    return eliminar
+
+
+def _grafo_eliminacion(cliente_azure, grupo_recursos, recursos_vms, nombres_nsgs):
+    """
+    Construye el grafo de eliminación: las VMs no dependen de nada, la NIC y
+    el disco de cada VM esperan a su VM, la IP pública espera a su NIC y los
+    NSGs esperan a todas las NICs.
+
+    Returns:
+        tuple: (tareas, en_cascada), donde en_cascada son las claves de los
+        recursos que Azure elimina con su VM.
+    """
+
+    def tarea(tipo, nombre):
+        return _tarea_eliminacion(cliente_azure, grupo_recursos, tipo, nombre)
+
+    tareas = {}
+    en_cascada = set()
+
+    for recursos in recursos_vms:
+        clave_vm = f"vm/{recursos['vm']}"
+        clave_nic = f"nic/{recursos['nic']}"
+
+        tareas[clave_vm] = (tarea("vm", recursos["vm"]), [])
+        tareas[clave_nic] = (tarea("nic", recursos["nic"]), [clave_vm])
+        tareas[f"disco/{recursos['disco']}"] = (
+            tarea("disco", recursos["disco"]),
+            [clave_vm],
+        )
+        tareas[f"ip/{recursos['ip']}"] = (tarea("ip", recursos["ip"]), [clave_nic])
+
+        en_cascada.update(
+            f"{tipo}/{recursos[tipo]}" for tipo in recursos.get("en_cascada", ())
+        )
+
+    claves_nics = [clave for clave in tareas if clave.startswith("nic/")]
+
+    for nombre_nsg in nombres_nsgs:
+        tareas[f"nsg/{nombre_nsg}"] = (tarea("nsg", nombre_nsg), claves_nics)
+
+    return tareas, en_cascada
+
+
+def _grafo_por_tipo(cliente_azure, grupo_recursos, nombres_por_tipo):
+    """
+    Construye el grafo de eliminación cuando no se conoce qué recurso usa
+    cada VM: los discos y las NICs esperan a todas las VMs, y las IPs públicas
+    y los NSGs esperan a todas las NICs.
+    """
+
+    dependencias_tipo = {
+        "vm": [],
+        "nic": ["vm"],
+        "disco": ["vm"],
+        "ip": ["nic"],
+        "nsg": ["nic"],
+    }
+
+    tareas = {}
+
+    for tipo, dependencias in dependencias_tipo.items():
+        claves_dependencias = [
+            f"{tipo_dependencia}/{nombre}"
+            for tipo_dependencia in dependencias
+            for nombre in nombres_por_tipo.get(tipo_dependencia, ())
+        ]
+
+        for nombre in nombres_por_tipo.get(tipo, ()):
+            tareas[f"{tipo}/{nombre}"] = (
+                _tarea_eliminacion(cliente_azure, grupo_recursos, tipo, nombre),
+                claves_dependencias,
+            )
+
+    return tareas
+
+
+def _ejecutar_eliminacion(tareas, listar_existentes, max_concurrencia, en_cascada=()):
+    """
+    Ejecuta el grafo de eliminación y verifica el resultado con un listado en
+    bloque. Lo que quede se reintenta una vez.
+
+    Args:
+        listar_existentes (callable): Función sin argumentos que devuelve
+            {tipo: set(nombres)} con los recursos que existen.
+        en_cascada (iterable): Claves de los recursos que Azure elimina con su
+            VM. En la primera pasada no se piden, solo se espera a la VM; si
+            la verificación los encuentra, se eliminan en la segunda.
+
+    Returns:
+        list: Recursos que no se pudieron eliminar, como "tipo/nombre".
+    """
+
+    # Cada VM lanza hasta cuatro eliminaciones; se permiten todas en vuelo
+    concurrencia = max(max_concurrencia, len(tareas))
+    pendientes = []
+
+    def esperar_dependencias(dependencias):
+        return all(dependencias.values())
+
+    for pasada in (1, 2):
+        ejecutar_grafo(
+            {
+                clave: (
+                    (
+                        esperar_dependencias
+                        if pasada == 1 and clave in en_cascada
+                        else funcion
+                    ),
+                    dependencias,
+                )
+                for clave, (funcion, dependencias) in tareas.items()
+            },
+            max_concurrencia=concurrencia,
+        )
+
+        # Verificación: se comprueba que no quede ninguno de los eliminados
+        existentes = listar_existentes()
+        pendientes = [
+            clave
+            for clave in tareas
+            if clave.partition("/")[2] in existentes.get(clave.partition("/")[0], set())
+        ]
+
+        if not pendientes:
+            break
+
+        logger.warning(
+            "Quedan %s recursos tras la pasada %s: %s",
+            len(pendientes),
+            pasada,
+            pendientes,
+        )
+
+        # En la siguiente pasada solo se reintenta lo pendiente
+        tareas = {
+            clave: (
+                funcion if clave in pendientes else (lambda dependencias: True),
+                dependencias,
+            )
+            for clave, (funcion, dependencias) in tareas.items()
+        }
+
+    if pendientes:
+        logger.error("No se pudieron eliminar: %s", pendientes)
+
+    return pendientes
+
+
+def eliminar_recursos_cluster(
+    cliente_azure,
+    grupo_recursos,
+    nombres_vms,
+    nombres_nsgs,
+    max_concurrencia=MAX_CONCURRENCIA,
+    ids_vms=None,
+):
+    """
+    Elimina las VMs del clúster, sus NICs, discos e IPs públicas y los NSGs.
+
+    Todas las VMs se eliminan a la vez y cada recurso dependiente se elimina
+    en cuanto termina lo que lo usa, por lo que el tiempo total se acerca al
+    de eliminar una sola VM. Los recursos creados con deleteOption "Delete"
+    los elimina Azure con la VM y no se piden aparte. Al final se listan los
+    recursos del grupo y se reintenta lo que quede. ids_vms son los ids
+    guardados en el estado ({nombre: {tipo: id}}), para cuando una VM ya no
+    existe.
+
+    Returns:
+        list: Recursos que no se pudieron eliminar, como "tipo/nombre".
+    """
+
+    inicio = time.monotonic()
+
+    try:
+        recursos_vms = obtener_recursos_vms(
+            cliente_azure, grupo_recursos, nombres_vms, ids_vms
+        )
+    except Exception as e:
+        logger.warning("No se pudieron listar las VMs y NICs del grupo: %s", e)
+        recursos_vms = [
+            recursos_por_nombre(nombre, (ids_vms or {}).get(nombre))
+            for nombre in nombres_vms
+        ]
+
+    tareas, en_cascada = _grafo_eliminacion(
+        cliente_azure, grupo_recursos, recursos_vms, nombres_nsgs
+    )
+
+    pendientes = _ejecutar_eliminacion(
+        tareas,
+        lambda: listar_recursos_existentes(cliente_azure, grupo_recursos),
+        max_concurrencia,
+        en_cascada,
+    )
+
+    logger.info(
+        "Eliminación de %s VMs y %s NSGs terminada en %.1f s",
+        len(nombres_vms),
+        len(nombres_nsgs),
+        time.monotonic() - inicio,
+    )
+
+    return pendientes
+
+
+async def eliminar_recursos_vm_async(cliente_azure, grupo_recursos, nombre_vm):
+    """
+    Variante asíncrona de eliminar_recursos_cluster para una sola VM, sobre
+    ClienteAzureAsync.
+
+    Se elimina la VM y, después, solo los recursos que Azure no elimina en
+    cascada: la NIC seguida de su IP pública y, a la vez, el disco.
+
+    Returns:
+        list: Recursos que no se pudieron eliminar, como "tipo/nombre".
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    network_client = cliente_azure.obtener_cliente_red()
+    operaciones = operaciones_eliminacion(cliente_azure)
+
+    async def obtener(consulta):
+        try:
+            return await consulta
+        except ResourceNotFoundError:
+            return None
+
+    recursos = recursos_vm(
+        nombre_vm,
+        await obtener(compute_client.virtual_machines.get(grupo_recursos, nombre_vm)),
+    )
+    completar_ip_publica(
+        recursos,
+        await obtener(
+            network_client.network_interfaces.get(grupo_recursos, recursos["nic"])
+        ),
+    )
+
+    async def eliminar(tipo):
+        if tipo in recursos["en_cascada"]:
+            return True
+
+        begin_delete, etiqueta = operaciones[tipo]
+        return await eliminar_con_reintentos_async(
+            lambda: begin_delete(grupo_recursos, recursos[tipo]),
+            f"{etiqueta} {recursos[tipo]}",
+        )
+
+    if not await eliminar("vm"):
+        return [f"{tipo}/{recursos[tipo]}" for tipo in ("vm", "nic", "disco", "ip")]
+
+    async def eliminar_nic_e_ip():
+        if not await eliminar("nic"):
+            return ["nic", "ip"]
+        return [] if await eliminar("ip") else ["ip"]
+
+    async def eliminar_disco():
+        return [] if await eliminar("disco") else ["disco"]
+
+    fallidos = await asyncio.gather(eliminar_nic_e_ip(), eliminar_disco())
+
+    return [f"{tipo}/{recursos[tipo]}" for lista in fallidos for tipo in lista]
+
+
+def listar_recursos_etiquetados(cliente_azure, grupo_recursos, id_cluster):
+    """
+    Lista con una sola llamada los recursos del grupo etiquetados con el id
+    del clúster.
+
+    Returns:
+        dict: Diccionario {tipo: set(nombres)} con los tipos "vm", "nic",
+        "disco", "ip" y "nsg".
+    """
+
+    resource_client = cliente_azure.obtener_cliente_recursos()
+
+    recursos = resource_client.resources.list_by_resource_group(
+        grupo_recursos,
+        filter=f"tagName eq '{ETIQUETA_CLUSTER}' and tagValue eq '{id_cluster}'",
+    )
+
+    nombres_por_tipo = {tipo: set() for tipo in TIPOS_AZURE.values()}
+
+    for recurso in recursos:
+        tipo = TIPOS_AZURE.get(recurso.type.lower())
+        if tipo is None:
+            logger.warning(
+                "Recurso etiquetado de tipo no gestionado: %s (%s)",
+                recurso.name,
+                recurso.type,
+            )
+            continue
+        nombres_por_tipo[tipo].add(recurso.name)
+
+    return nombres_por_tipo
+
+
+def eliminar_recursos_etiquetados(
+    cliente_azure, grupo_recursos, id_cluster, max_concurrencia=MAX_CONCURRENCIA
+):
+    """
+    Elimina todos los recursos etiquetados con el id del clúster, sin depender
+    del estado guardado. Sirve para limpiar recursos huérfanos tras una
+    ejecución interrumpida.
+
+    Returns:
+        list: Recursos que no se pudieron eliminar, como "tipo/nombre".
+    """
+
+    inicio = time.monotonic()
+
+    nombres_por_tipo = listar_recursos_etiquetados(
+        cliente_azure, grupo_recursos, id_cluster
+    )
+
+    total = sum(len(nombres) for nombres in nombres_por_tipo.values())
+    if not total:
+        logger.info("No hay recursos etiquetados con el clúster %s", id_cluster)
+        return []
+
+    logger.info(
+        "Eliminando %s recursos etiquetados con el clúster %s", total, id_cluster
+    )
+
+    pendientes = _ejecutar_eliminacion(
+        _grafo_por_tipo(cliente_azure, grupo_recursos, nombres_por_tipo),
+        lambda: listar_recursos_etiquetados(cliente_azure, grupo_recursos, id_cluster),
+        max_concurrencia,
+    )
+
+    logger.info(
+        "Eliminación de los recursos etiquetados terminada en %.1f s",
+        time.monotonic() - inicio,
+    )
+
+    return pendientes
@@ -0,0 +1,310 @@
+import logging
+import threading
+import time
+
+from config.configuraciones import MAX_CONCURRENCIA, TIEMPO_MAXIMO_DISPONIBILIDAD
+from config.registros import obtener_logger_nodo
+from func.artefactos import DistribuidorArtefactos
+from func.concurrencia import ejecutar_concurrente
+from func.conexiones_ssh import pool_ssh
+from func.disponibilidad import esperar_nodo_listo
+from func.funciones_cluster import (
+    SISTEMA_OPERATIVO_POR_DEFECTO,
+    completar_ips_privadas,
+    guardar_nodos_cluster,
+    indice_worker,
+    leer_nodos_cluster,
+    nombre_registro_dns,
+)
+from func.funciones_dns import create_or_update_dns_record, delete_dns_record
+from func.funciones_vm import (
+    crear_vm,
+    eliminar_vm,
+    iniciar_worker,
+    instalar_dependencias_vm,
+)
+from func.inicializar_vm import ejecutar_comando_remoto
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+def escalar_workers(
+    cliente_azure,
+    cf,
+    cantidad_workers,
+    nombre_base,
+    tamanio_instancia_worker,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    region,
+    username,
+    ruta_scripts,
+    zona_dns,
+    zona_dns_id,
+    patron_dns,
+    grupo_recursos_vnet=None,
+    sistema_operativo=None,
+    desde_imagen=False,
+    max_concurrencia=MAX_CONCURRENCIA,
+    tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD,
+):
+    """
+    Ajusta el número de workers de un clúster en marcha sin tocar el resto de
+    nodos.
+
+    Si faltan workers, se crean con números a partir del mayor existente, se
+    instalan, se inician contra la IP privada del master y se registran en el
+    DNS. Si sobran, se detienen y eliminan los de número más alto junto con su
+    registro DNS.
+
+    Args:
+        cantidad_workers (int): Número de workers deseado.
+        desde_imagen (bool): Si sistema_operativo es la imagen dorada.
+
+    Returns:
+        dict: Diccionario {nombre_nodo: bool} con el resultado de cada worker
+        añadido o eliminado.
+    """
+
+    if cantidad_workers < 0:
+        raise ValueError("El número de workers no puede ser negativo.")
+
+    nodos = leer_nodos_cluster()
+
+    master = next((nodo for nodo in nodos if nodo["tipo_nodo"] == "Master"), None)
+    if master is None:
+        raise ValueError("El clúster no tiene un nodo master.")
+
+    workers = sorted(
+        (nodo for nodo in nodos if nodo["tipo_nodo"] == "Worker"),
+        key=lambda nodo: indice_worker(nombre_base, nodo["nombre"]) or 0,
+    )
+
+    logger.info("Escalando de %s a %s workers", len(workers), cantidad_workers)
+
+    if cantidad_workers == len(workers):
+        logger.info("El clúster ya tiene %s workers", cantidad_workers)
+        return {}
+
+    if cantidad_workers < len(workers):
+        return reducir_workers(
+            cliente_azure,
+            cf,
+            nodos,
+            workers[cantidad_workers:],
+            grupo_recursos,
+            nombre_clave_ssh,
+            zona_dns,
+            zona_dns_id,
+            patron_dns,
+            max_concurrencia,
+        )
+
+    if grupo_recursos_vnet is None:
+        grupo_recursos_vnet = grupo_recursos
+
+    if sistema_operativo is None:
+        sistema_operativo = SISTEMA_OPERATIVO_POR_DEFECTO
+
+    siguiente = (
+        max(
+            (indice_worker(nombre_base, nodo["nombre"]) or 0 for nodo in workers),
+            default=0,
+        )
+        + 1
+    )
+    nuevos = [
+        f"{nombre_base}-worker-{i}"
+        for i in range(siguiente, siguiente + cantidad_workers - len(workers))
+    ]
+
+    logger.info("Añadiendo los workers: %s", nuevos)
+
+    completar_ips_privadas(cliente_azure, grupo_recursos, nodos)
+    ip_privada_master = master["ip_privada"]
+    if ip_privada_master is None:
+        raise ValueError("No se pudo obtener la IP privada del master.")
+
+    # En modo "master" el master vuelve a publicar los artefactos que ya tiene
+    distribuidor = DistribuidorArtefactos(tiempo_maximo=tiempo_maximo)
+    if not desde_imagen and distribuidor.modo == "master":
+        distribuidor.distribuir(
+            pool_ssh.obtener(master["ip"], master["usuario"], nombre_clave_ssh),
+            master,
+        )
+    elif not desde_imagen:
+        distribuidor.precargar()
+
+    bloqueo_nodos = threading.Lock()
+    plazo = time.monotonic() + tiempo_maximo
+
+    def incorporar_worker(nombre):
+        registro = obtener_logger_nodo(nombre)
+
+        resultado, _, ip, ip_privada, ids = crear_vm(
+            cliente_azure=cliente_azure,
+            tamanio_instancia=tamanio_instancia_worker,
+            nombre_base=nombre,
+            grupo_recursos=grupo_recursos,
+            nombre_red_virtual=nombre_red_virtual,
+            nombre_subred=nombre_subred,
+            nombre_clave_ssh=nombre_clave_ssh,
+            sistema_operativo=sistema_operativo,
+            region=region,
+            username=username,
+            grupo_recursos_vnet=grupo_recursos_vnet,
+            grupo_seguridad=nombre_base + "-nsg-worker",
+            id_cluster=nombre_base,
+        )
+        if not resultado:
+            raise RuntimeError(f"No se pudo crear la VM {nombre}")
+
+        nodo = {
+            "nombre": nombre,
+            "ip": ip,
+            "usuario": username,
+            "tipo_nodo": "Worker",
+            "ip_privada": ip_privada,
+            "ids": ids,
+        }
+
+        with bloqueo_nodos:
+            nodos.append(nodo)
+            guardar_nodos_cluster(nodos)
+
+        if not esperar_nodo_listo(
+            cliente_azure, grupo_recursos, nodo, nombre_clave_ssh, plazo
+        ):
+            raise RuntimeError(f"El nodo {nombre} no está disponible")
+
+        if not desde_imagen:
+            distribuidor.distribuir(
+                pool_ssh.obtener(ip, username, nombre_clave_ssh), nodo, registro
+            )
+
+        if not instalar_dependencias_vm(
+            cliente_azure,
+            ip,
+            nombre_clave_ssh,
+            username,
+            ruta_scripts=ruta_scripts,
+            nombre_nodo=nombre,
+            tipo_nodo="Worker",
+            grupo_recursos=grupo_recursos,
+            zona_dns=zona_dns,
+            patron_dns=patron_dns,
+            registro=registro,
+            fase="configuracion" if desde_imagen else None,
+            ip_privada_vm=ip_privada,
+        ):
+            raise RuntimeError(f"La instalación falló en {nombre}")
+
+        if not iniciar_worker(
+            nombre_host=ip,
+            usuario=username,
+            clave_publica=nombre_clave_ssh,
+            nombre_host_master=ip_privada_master,
+        ):
+            raise RuntimeError(f"No se pudo iniciar el worker {nombre}")
+
+        create_or_update_dns_record(
+            cf,
+            nombre_zona=zona_dns,
+            id_zona=zona_dns_id,
+            record_type="A",
+            record_name=nombre_registro_dns(nodo, zona_dns, patron_dns),
+            record_content=ip,
+            proxied=False,
+        )
+
+    try:
+        resultados = ejecutar_concurrente(
+            {nombre: (incorporar_worker, {"nombre": nombre}) for nombre in nuevos},
+            max_concurrencia=max_concurrencia,
+        )
+    finally:
+        distribuidor.finalizar()
+
+    return _resumir(resultados, "añadir")
+
+
+def reducir_workers(
+    cliente_azure,
+    cf,
+    nodos,
+    sobrantes,
+    grupo_recursos,
+    nombre_clave_ssh,
+    zona_dns,
+    zona_dns_id,
+    patron_dns,
+    max_concurrencia=MAX_CONCURRENCIA,
+):
+    """
+    Detiene y elimina los workers sobrantes y sus registros DNS.
+
+    Args:
+        nodos (list): Todos los nodos del clúster, para actualizar el estado.
+        sobrantes (list): Workers que se eliminan.
+
+    Returns:
+        dict: Diccionario {nombre_nodo: bool}.
+    """
+
+    logger.info("Eliminando los workers: %s", [nodo["nombre"] for nodo in sobrantes])
+
+    bloqueo_nodos = threading.Lock()
+
+    def retirar_worker(nodo):
+        registro = obtener_logger_nodo(nodo["nombre"])
+
+        # Se detiene el worker para que el master lo dé de baja antes de
+        # eliminar la VM
+        if not ejecutar_comando_remoto(
+            nodo["ip"],
+            nombre_clave_ssh,
+            nodo["usuario"],
+            "/opt/spark/sbin/stop-worker.sh",
+            registro=registro,
+        ):
+            registro.warning("No se pudo detener el worker %s", nodo["nombre"])
+
+        pool_ssh.descartar(nodo["ip"], nodo["usuario"], nombre_clave_ssh)
+
+        if not eliminar_vm(cliente_azure, grupo_recursos, nodo["nombre"]):
+            raise RuntimeError(f"No se pudo eliminar la VM {nodo['nombre']}")
+
+        with bloqueo_nodos:
+            nodos.remove(nodo)
+            guardar_nodos_cluster(nodos)
+
+        delete_dns_record(
+            cf,
+            id_zona=zona_dns_id,
+            record_type="A",
+            record_name=nombre_registro_dns(nodo, zona_dns, patron_dns),
+        )
+
+    resultados = ejecutar_concurrente(
+        {nodo["nombre"]: (retirar_worker, {"nodo": nodo}) for nodo in sobrantes},
+        max_concurrencia=max_concurrencia,
+    )
+
+    return _resumir(resultados, "eliminar")
+
+
+def _resumir(resultados, accion):
+    resumen = {
+        nombre: resultado["resultado"] for nombre, resultado in resultados.items()
+    }
+
+    fallidos = [nombre for nombre, correcto in resumen.items() if not correcto]
+    if fallidos:
+        logger.error("No se pudieron %s los workers: %s", accion, fallidos)
+    else:
+        logger.info("Escalado completado")
+
+    return resumen
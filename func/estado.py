@@ -0,0 +1,302 @@
+import csv
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from config.configuraciones import ARCHIVO_ESTADO
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+VERSION_ESTADO = 1
+
+# Campos que se guardan de cada nodo, además de los ids de sus recursos
+CAMPOS_NODO = ("nombre", "ip", "usuario", "tipo_nodo", "ip_privada")
+
+# Recursos de Azure de cada nodo cuyos ids se guardan, como los devuelve
+# crear_vm
+TIPOS_RECURSO = ("vm", "nic", "ip", "disco", "nsg")
+
+# Archivos de versiones anteriores, que se migran al leer el estado
+CSV_NODOS = "datos_cluster.csv"
+CSV_GRUPOS_SEGURIDAD = "datos_grupos_seguridad.csv"
+
+# Las escrituras de todos los hilos pasan por este bloqueo
+_bloqueo = threading.RLock()
+
+
+def estado_vacio():
+    """
+    Devuelve un estado sin nodos ni grupos de seguridad.
+
+    Los nodos se guardan por nombre ({nombre: nodo}) y "tipos" indexa sus
+    nombres por tipo de nodo ({"Master": [...], "Worker": [...]}). Los grupos
+    de seguridad se guardan como {nombre: id}.
+    """
+
+    return {
+        "version": VERSION_ESTADO,
+        "nodos": {},
+        "tipos": {},
+        "grupos_seguridad": {},
+        "fases": {},
+    }
+
+
+def normalizar_nodo(nodo, ids_anteriores=None):
+    """
+    Devuelve el nodo tal como se guarda: las claves de CAMPOS_NODO e "ids",
+    con el id de cada recurso de TIPOS_RECURSO (None si no se conoce). Los ids
+    que falten en el nodo se toman de ids_anteriores.
+    """
+
+    ids = dict(ids_anteriores or {})
+    ids.update(
+        {tipo: valor for tipo, valor in (nodo.get("ids") or {}).items() if valor}
+    )
+
+    return {
+        **{campo: nodo.get(campo) for campo in CAMPOS_NODO},
+        "ids": {tipo: ids.get(tipo) for tipo in TIPOS_RECURSO},
+    }
+
+
+def indexar_nodos(nodos):
+    """
+    Construye las claves "nodos" ({nombre: nodo}) y "tipos" del estado a
+    partir de una lista de nodos ya normalizados.
+    """
+
+    por_nombre = {}
+    tipos = {}
+
+    for nodo in nodos:
+        por_nombre[nodo["nombre"]] = nodo
+        tipos.setdefault(nodo["tipo_nodo"], []).append(nodo["nombre"])
+
+    return por_nombre, tipos
+
+
+def existe_estado(ruta=ARCHIVO_ESTADO):
+    """
+    Indica si hay un estado guardado, en JSON o en los .csv anteriores.
+    """
+
+    return os.path.exists(ruta) or os.path.exists(CSV_NODOS)
+
+
+def leer_estado(ruta=ARCHIVO_ESTADO):
+    """
+    Lee el estado del clúster. Si solo existen los .csv de versiones
+    anteriores, se migran al formato JSON.
+
+    Returns:
+        dict: Estado con las claves "version", "nodos", "tipos",
+        "grupos_seguridad" y "fases", como en estado_vacio.
+    """
+
+    with _bloqueo:
+        if not os.path.exists(ruta):
+            if os.path.exists(CSV_NODOS) or os.path.exists(CSV_GRUPOS_SEGURIDAD):
+                return migrar_csv(ruta)
+            return estado_vacio()
+
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            estado = json.load(archivo)
+
+    for clave, valor in estado_vacio().items():
+        estado.setdefault(clave, valor)
+
+    return estado
+
+
+def escribir_estado(estado, ruta=ARCHIVO_ESTADO):
+    """
+    Escribe el estado de forma atómica: se escribe en un archivo temporal del
+    mismo directorio, se sincroniza con el disco y se renombra sobre el
+    anterior, de modo que una interrupción nunca deja un archivo a medias.
+    """
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+
+    with _bloqueo:
+        descriptor, ruta_temporal = tempfile.mkstemp(
+            prefix=".estado-", suffix=".tmp", dir=directorio
+        )
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as archivo:
+                json.dump(estado, archivo, ensure_ascii=False, indent=2)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            os.replace(ruta_temporal, ruta)
+        except BaseException:
+            if os.path.exists(ruta_temporal):
+                os.remove(ruta_temporal)
+            raise
+
+
+@contextmanager
+def transaccion(ruta=ARCHIVO_ESTADO):
+    """
+    Lee el estado, permite modificarlo y lo escribe al salir. Si el bloque
+    lanza una excepción, el estado guardado no cambia.
+    """
+
+    with _bloqueo:
+        estado = leer_estado(ruta)
+        yield estado
+        escribir_estado(estado, ruta)
+
+
+def migrar_csv(ruta=ARCHIVO_ESTADO):
+    """
+    Convierte datos_cluster.csv y datos_grupos_seguridad.csv al estado JSON.
+    Los .csv se conservan con la extensión .migrado.
+
+    Returns:
+        dict: El estado migrado.
+    """
+
+    estado = estado_vacio()
+
+    with _bloqueo:
+        if os.path.exists(CSV_NODOS):
+            with open(CSV_NODOS, newline="", encoding="utf-8") as archivo:
+                estado["nodos"], estado["tipos"] = indexar_nodos(
+                    [
+                        normalizar_nodo(
+                            {
+                                "nombre": fila["Nombre"],
+                                "ip": fila["IP"] or None,
+                                "usuario": fila["Usuario"],
+                                "tipo_nodo": fila["TipoNodo"],
+                                "ip_privada": fila.get("IPPrivada") or None,
+                            }
+                        )
+                        for fila in csv.DictReader(archivo)
+                    ]
+                )
+
+        if os.path.exists(CSV_GRUPOS_SEGURIDAD):
+            with open(CSV_GRUPOS_SEGURIDAD, newline="", encoding="utf-8") as archivo:
+                estado["grupos_seguridad"] = {
+                    fila["Nombre"]: None for fila in csv.DictReader(archivo)
+                }
+
+        escribir_estado(estado, ruta)
+
+        for archivo_csv in (CSV_NODOS, CSV_GRUPOS_SEGURIDAD):
+            if os.path.exists(archivo_csv):
+                os.replace(archivo_csv, archivo_csv + ".migrado")
+
+    logger.info(
+        "Estado migrado desde los .csv a %s: %s nodos, %s grupos de seguridad",
+        ruta,
+        len(estado["nodos"]),
+        len(estado["grupos_seguridad"]),
+    )
+
+    return estado
+
+
+def eliminar_estado(ruta=ARCHIVO_ESTADO):
+    """
+    Elimina el estado del clúster, incluidos los .csv de versiones anteriores.
+    """
+
+    with _bloqueo:
+        for archivo in (ruta, CSV_NODOS, CSV_GRUPOS_SEGURIDAD):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+
+
+def leer_nodos(ruta=ARCHIVO_ESTADO):
+    """
+    Returns:
+        list: Un diccionario por nodo con las claves de CAMPOS_NODO e "ids",
+        en el orden en que se guardaron.
+    """
+
+    return list(leer_estado(ruta)["nodos"].values())
+
+
+def guardar_nodos(nodos, ruta=ARCHIVO_ESTADO):
+    """
+    Sustituye los nodos guardados. Solo se guardan las claves de CAMPOS_NODO
+    y los ids de TIPOS_RECURSO; los ids que falten en un nodo se conservan
+    del nodo guardado con el mismo nombre.
+    """
+
+    with transaccion(ruta) as estado:
+        anteriores = estado["nodos"]
+        estado["nodos"], estado["tipos"] = indexar_nodos(
+            [
+                normalizar_nodo(nodo, anteriores.get(nodo["nombre"], {}).get("ids"))
+                for nodo in nodos
+            ]
+        )
+
+
+def obtener_nodo(nombre, ruta=ARCHIVO_ESTADO):
+    """
+    Returns:
+        dict: El nodo con ese nombre o None.
+    """
+
+    return leer_estado(ruta)["nodos"].get(nombre)
+
+
+def nodos_por_tipo(tipo_nodo, ruta=ARCHIVO_ESTADO):
+    """
+    Returns:
+        list: Los nodos de un tipo ("Master" o "Worker").
+    """
+
+    estado = leer_estado(ruta)
+
+    return [estado["nodos"][nombre] for nombre in estado["tipos"].get(tipo_nodo, [])]
+
+
+def leer_grupos_seguridad(ruta=ARCHIVO_ESTADO):
+    """
+    Returns:
+        list: Nombres de los grupos de seguridad del clúster.
+    """
+
+    return list(leer_estado(ruta)["grupos_seguridad"])
+
+
+def guardar_grupos_seguridad(nombres_grupos, ids=None, ruta=ARCHIVO_ESTADO):
+    """
+    Sustituye los grupos de seguridad guardados.
+
+    Args:
+        ids (dict): Diccionario opcional {nombre: id}. Los ids que no se
+            indiquen se conservan del grupo guardado con el mismo nombre.
+    """
+
+    ids = ids or {}
+
+    with transaccion(ruta) as estado:
+        anteriores = estado["grupos_seguridad"]
+        estado["grupos_seguridad"] = {
+            nombre: ids.get(nombre) or anteriores.get(nombre)
+            for nombre in nombres_grupos
+        }
+
+
+def registrar_fase(nombre_nodo, nombre_fase, resultado, ruta=ARCHIVO_ESTADO):
+    """
+    Guarda el resultado de una fase de un nodo, para saber dónde se quedó una
+    orquestación interrumpida.
+    """
+
+    with transaccion(ruta) as estado:
+        estado["fases"].setdefault(nombre_nodo, {})[nombre_fase] = {
+            "resultado": bool(resultado),
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
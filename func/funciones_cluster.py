@@ -1,25 +1,36 @@
 import logging
-import os
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.network import NetworkManagementClient
-import pandas as pd
+import re
+from func import estado
 from func.funciones_vm import (
     crear_vm,
     crear_grupo_seguridad,
-    eliminar_grupo_seguridad,
-    eliminar_vm,
     instalar_dependencias_vm,
     iniciar_master,
-    iniciar_worker,
-    obtener_ip_privada_vm,
+    comando_iniciar_worker,
+    inventario_ips,
     copiar_clave_privada_devops,
 )
-from func.funciones_dns import create_or_update_dns_record
+from func.funciones_dns import sincronizar_dns
+from func.concurrencia import ejecutar_concurrente
+from func.conexiones_ssh import pool_ssh
+from func.ejecucion_remota import ejecutar_comandos
+from func.disponibilidad import esperar_nodos_listos
+from func.eliminacion import eliminar_recursos_cluster, eliminar_recursos_etiquetados
+from func.artefactos import DistribuidorArtefactos
+from config.configuraciones import MAX_CONCURRENCIA
+from config.registros import obtener_logger_nodo
 from pathlib import Path
 
 # Obtiene el logger para este módulo
 logger = logging.getLogger(__name__)
 
+SISTEMA_OPERATIVO_POR_DEFECTO = {
+    "publisher": "canonical",
+    "offer": "0001-com-ubuntu-server-jammy",
+    "sku": "22_04-lts-gen2",
+    "version": "latest",
+}
+
 
 def crear_cluster(
     cliente_azure,
@@ -40,9 +51,13 @@ def crear_cluster(
     sistema_operativo=None,
     username_worker=None,
     tamanio_instancia_worker=None,
+    max_concurrencia=MAX_CONCURRENCIA,
 ):
     """
     Crea un cluster en Azure.
+
+    Los nodos se crean en paralelo. Si alguno falla, el resto se conserva y se
+    registra en el estado del clúster.
     """
 
     if grupo_recursos_vnet is None:
@@ -55,12 +70,88 @@ def crear_cluster(
         tamanio_instancia_worker = tamanio_instancia_driver
 
     if sistema_operativo is None:
-        sistema_operativo = {
-            "publisher": "canonical",
-            "offer": "0001-com-ubuntu-server-jammy",
-            "sku": "22_04-lts-gen2",
-            "version": "latest",
-        }
+        sistema_operativo = SISTEMA_OPERATIVO_POR_DEFECTO
+
+    grupo_seguridad_driver, grupo_seguridad_worker = preparar_grupos_seguridad(
+        cliente_azure=cliente_azure,
+        nombre_base=nombre_base,
+        region=region,
+        grupo_recursos=grupo_recursos,
+        ip_publica=ip_publica,
+        reglas_cortafuegos=reglas_cortafuegos,
+        grupo_seguridad_driver=grupo_seguridad_driver,
+        grupo_seguridad_worker=grupo_seguridad_worker,
+    )
+
+    # Lógica para crear un clúster de Spark
+    # El master y los workers se crean a la vez; el tiempo total se acerca al
+    # de una sola VM mientras max_concurrencia >= cantidad_nodos + 1.
+
+    especificaciones = especificaciones_nodos(
+        nombre_base=nombre_base,
+        cantidad_nodos=cantidad_nodos,
+        tamanio_instancia_driver=tamanio_instancia_driver,
+        tamanio_instancia_worker=tamanio_instancia_worker,
+        username_driver=username_driver,
+        username_worker=username_worker,
+        grupo_seguridad_driver=grupo_seguridad_driver,
+        grupo_seguridad_worker=grupo_seguridad_worker,
+    )
+
+    listado_nodos = crear_nodos(
+        cliente_azure=cliente_azure,
+        especificaciones=especificaciones,
+        grupo_recursos=grupo_recursos,
+        nombre_red_virtual=nombre_red_virtual,
+        nombre_subred=nombre_subred,
+        nombre_clave_ssh=nombre_clave_ssh,
+        sistema_operativo=sistema_operativo,
+        region=region,
+        grupo_recursos_vnet=grupo_recursos_vnet,
+        max_concurrencia=max_concurrencia,
+        id_cluster=nombre_base,
+    )
+
+    nodos_creados = [nodo for nodo in listado_nodos if nodo["resultado"]]
+    nodos_fallidos = [nodo for nodo in listado_nodos if not nodo["resultado"]]
+
+    if nodos_fallidos:
+        logger.error(
+            "No se pudieron crear %s de %s nodos: %s",
+            len(nodos_fallidos),
+            len(listado_nodos),
+            [nodo["nombre"] for nodo in nodos_fallidos],
+        )
+
+    if not any(nodo["tipo_nodo"] == "Master" for nodo in nodos_creados):
+        logger.error("No se pudo crear el nodo master, el clúster no es utilizable.")
+
+    # guardamos los datos en el estado, solo con los nodos que existen,
+    # para poder instalarlos o eliminarlos después aunque haya fallos parciales
+
+    guardar_nodos_cluster(nodos_creados)
+    guardar_grupos_seguridad([grupo_seguridad_driver, grupo_seguridad_worker])
+
+    return listado_nodos
+
+
+def preparar_grupos_seguridad(
+    cliente_azure,
+    nombre_base,
+    region,
+    grupo_recursos,
+    ip_publica,
+    reglas_cortafuegos=None,
+    grupo_seguridad_driver=None,
+    grupo_seguridad_worker=None,
+):
+    """
+    Crea los grupos de seguridad del driver y de los workers si no se
+    proporcionaron.
+
+    Returns:
+        tuple: Nombres de los grupos de seguridad del driver y del worker.
+    """
 
     if grupo_seguridad_driver is None and grupo_seguridad_worker is None:
 
@@ -123,263 +214,443 @@ def crear_cluster(
             reglas_cortafuegos_http = []
             reglas_cortafuegos_http_worker = []
 
-        # crear grupos de seguridad
-        crear_grupo_seguridad(
-            cliente_azure=cliente_azure,
-            nombre_nsg=nombre_base + "-nsg-driver",
-            region=region,
-            grupo_recursos=grupo_recursos,
-            reglas_cortafuegos=reglas_cortafuegos_ssh + reglas_cortafuegos_http,
-        )
+        grupo_seguridad_driver = nombre_base + "-nsg-driver"
+        grupo_seguridad_worker = nombre_base + "-nsg-worker"
 
-        crear_grupo_seguridad(
-            cliente_azure=cliente_azure,
-            nombre_nsg=nombre_base + "-nsg-worker",
-            region=region,
-            grupo_recursos=grupo_recursos,
-            reglas_cortafuegos=reglas_cortafuegos_ssh + reglas_cortafuegos_http_worker,
+        # Los dos grupos de seguridad se crean a la vez
+        resultados = ejecutar_concurrente(
+            {
+                grupo_seguridad_driver: (
+                    crear_grupo_seguridad,
+                    {
+                        "cliente_azure": cliente_azure,
+                        "nombre_nsg": grupo_seguridad_driver,
+                        "region": region,
+                        "grupo_recursos": grupo_recursos,
+                        "reglas_cortafuegos": reglas_cortafuegos_ssh
+                        + reglas_cortafuegos_http,
+                        "id_cluster": nombre_base,
+                    },
+                ),
+                grupo_seguridad_worker: (
+                    crear_grupo_seguridad,
+                    {
+                        "cliente_azure": cliente_azure,
+                        "nombre_nsg": grupo_seguridad_worker,
+                        "region": region,
+                        "grupo_recursos": grupo_recursos,
+                        "reglas_cortafuegos": reglas_cortafuegos_ssh
+                        + reglas_cortafuegos_http_worker,
+                        "id_cluster": nombre_base,
+                    },
+                ),
+            }
         )
 
-        grupo_seguridad_driver = nombre_base + "-nsg-driver"
-        grupo_seguridad_worker = nombre_base + "-nsg-worker"
+        for nombre_nsg, resultado in resultados.items():
+            if not resultado["resultado"] or not resultado["valor"]:
+                logger.error("No se pudo crear el grupo de seguridad %s", nombre_nsg)
+
+        # Los ids se guardan ya; quien llama guarda después los nombres y los
+        # ids se conservan
+        guardar_grupos_seguridad(
+            [grupo_seguridad_driver, grupo_seguridad_worker],
+            ids={
+                nombre_nsg: resultado["valor"]
+                for nombre_nsg, resultado in resultados.items()
+                if resultado["resultado"]
+            },
+        )
 
     elif grupo_seguridad_driver is None or grupo_seguridad_worker is None:
         raise ValueError(
             "Es necesario especificar grupos de seguridad para el driver y el worker."
         )
 
-    # Lógica para crear un clúster de Spark
+    return grupo_seguridad_driver, grupo_seguridad_worker
 
-    nombre_master, ip_master = crear_master(
-        cliente_azure=cliente_azure,
-        nombre_base=nombre_base,
-        tamanio_instancia=tamanio_instancia_driver,
-        grupo_recursos=grupo_recursos,
-        nombre_red_virtual=nombre_red_virtual,
-        nombre_subred=nombre_subred,
-        nombre_clave_ssh=nombre_clave_ssh,
-        sistema_operativo=sistema_operativo,
-        region=region,
-        username=username_driver,
-        grupo_seguridad=grupo_seguridad_driver,
-        grupo_recursos_vnet=grupo_recursos_vnet,
-    )
 
-    listado_workers = crear_worker(
-        cliente_azure=cliente_azure,
-        nombre_base=nombre_base,
-        cantidad_nodos=cantidad_nodos,
-        tamanio_instancia=tamanio_instancia_worker,
-        grupo_recursos=grupo_recursos,
-        nombre_red_virtual=nombre_red_virtual,
-        nombre_subred=nombre_subred,
-        nombre_clave_ssh=nombre_clave_ssh,
-        sistema_operativo=sistema_operativo,
-        region=region,
-        username=username_worker,
-        grupo_seguridad=grupo_seguridad_worker,
-        grupo_recursos_vnet=grupo_recursos_vnet,
-    )
+def guardar_nodos_cluster(nodos):
+    """
+    Guarda los nodos del clúster en el estado.
+    """
 
-    # guardamos los datos en un archivo csv
+    estado.guardar_nodos(nodos)
 
-    if listado_workers is None:
-        listado_workers = []
 
-    df = pd.DataFrame(
-        {
-            "Nombre": [nombre_master]
-            + [worker["nombre"] for worker in listado_workers],
-            "IP": [ip_master] + [worker["ip"] for worker in listado_workers],
-            "Usuario": [username_driver]
-            + [worker["usuario"] for worker in listado_workers],
-            "TipoNodo": ["Master"] + ["Worker"] * len(listado_workers),
-        }
-    )
+def guardar_grupos_seguridad(nombres_grupos, ids=None):
+    """
+    Guarda los nombres de los grupos de seguridad en el estado y, si se
+    indican, sus ids ({nombre: id}).
+    """
+
+    estado.guardar_grupos_seguridad(nombres_grupos, ids)
+
 
-    df.to_csv("datos_cluster.csv", index=False)
+def especificaciones_nodos(
+    nombre_base,
+    cantidad_nodos,
+    tamanio_instancia_driver,
+    tamanio_instancia_worker,
+    username_driver,
+    username_worker,
+    grupo_seguridad_driver,
+    grupo_seguridad_worker,
+):
+    """
+    Construye las especificaciones del master y de los workers del clúster.
+    """
 
-    df_grupos_seguridad = pd.DataFrame(
+    return [
         {
-            "Nombre": [grupo_seguridad_driver, grupo_seguridad_worker],
+            "nombre": nombre_base + "-master",
+            "tipo_nodo": "Master",
+            "tamanio_instancia": tamanio_instancia_driver,
+            "usuario": username_driver,
+            "grupo_seguridad": grupo_seguridad_driver,
         }
-    )
-
-    df_grupos_seguridad.to_csv("datos_grupos_seguridad.csv", index=False)
+    ] + [
+        {
+            "nombre": nombre,
+            "tipo_nodo": "Worker",
+            "tamanio_instancia": tamanio_instancia_worker,
+            "usuario": username_worker,
+            "grupo_seguridad": grupo_seguridad_worker,
+        }
+        for nombre in nombres_workers(nombre_base, cantidad_nodos)
+    ]
 
 
-def crear_master(
-    cliente_azure,
-    nombre_base,
-    tamanio_instancia,
-    grupo_recursos,
-    nombre_red_virtual,
-    nombre_subred,
-    nombre_clave_ssh,
-    sistema_operativo,
-    region,
-    username,
-    grupo_seguridad,
-    grupo_recursos_vnet,
-):
+def nombres_workers(nombre_base, cantidad_nodos):
     """
-    Crea un nodo maestro para el clúster de Spark.
+    Genera los nombres de los nodos trabajadores del clúster.
     """
 
-    nombre_master = nombre_base + "-master"
+    return [f"{nombre_base}-worker-{i+1}" for i in range(cantidad_nodos)]
 
-    (resultado, nombre, ip) = crear_vm(
-        cliente_azure=cliente_azure,
-        tamanio_instancia=tamanio_instancia,
-        nombre_base=nombre_master,
-        grupo_recursos=grupo_recursos,
-        nombre_red_virtual=nombre_red_virtual,
-        nombre_subred=nombre_subred,
-        nombre_clave_ssh=nombre_clave_ssh,
-        sistema_operativo=sistema_operativo,
-        region=region,
-        username=username,
-        grupo_recursos_vnet=grupo_recursos_vnet,
-        grupo_seguridad=grupo_seguridad,
-    )
 
-    if resultado:
-        logger.info("Máquina virtual creada: %s (%s)", nombre, ip)
-        return nombre, ip
+def indice_worker(nombre_base, nombre):
+    """
+    Devuelve el número de un worker del clúster a partir de su nombre, o None
+    si el nombre no corresponde a un worker de este clúster.
+    """
+
+    coincidencia = re.fullmatch(rf"{re.escape(nombre_base)}-worker-(\d+)", nombre)
 
-    logger.error("Error al crear la máquina virtual: %s", nombre)
-    return None, None
+    return int(coincidencia.group(1)) if coincidencia else None
 
 
-def crear_worker(
+def crear_nodos(
     cliente_azure,
-    nombre_base,
-    cantidad_nodos: int,
-    tamanio_instancia,
+    especificaciones,
     grupo_recursos,
     nombre_red_virtual,
     nombre_subred,
     nombre_clave_ssh,
     sistema_operativo,
     region,
-    username,
     grupo_recursos_vnet,
-    grupo_seguridad,
+    max_concurrencia=MAX_CONCURRENCIA,
+    id_cluster=None,
 ):
     """
-    Crea un grupo de nodos trabajadores para el clúster de Spark.
+    Crea varias máquinas virtuales en paralelo.
+
+    Args:
+        especificaciones (list): Lista de diccionarios con las claves "nombre",
+            "tipo_nodo", "tamanio_instancia", "usuario" y "grupo_seguridad".
+        max_concurrencia (int): Número máximo de VMs creándose a la vez.
+        id_cluster (str): Id del clúster con el que se etiquetan los recursos.
+
+    Returns:
+        list: Un diccionario por nodo con las claves "resultado", "nombre",
+        "ip", "usuario", "tipo_nodo", "ip_privada" e "ids" (ids de sus
+        recursos), en el mismo orden de las especificaciones.
     """
 
-    nombre_worker = nombre_base + "-worker"
+    tareas = {
+        especificacion["nombre"]: (
+            crear_vm,
+            {
+                "cliente_azure": cliente_azure,
+                "tamanio_instancia": especificacion["tamanio_instancia"],
+                "nombre_base": especificacion["nombre"],
+                "grupo_recursos": grupo_recursos,
+                "nombre_red_virtual": nombre_red_virtual,
+                "nombre_subred": nombre_subred,
+                "nombre_clave_ssh": nombre_clave_ssh,
+                "sistema_operativo": sistema_operativo,
+                "region": region,
+                "username": especificacion["usuario"],
+                "grupo_recursos_vnet": grupo_recursos_vnet,
+                "grupo_seguridad": especificacion["grupo_seguridad"],
+                "id_cluster": id_cluster,
+            },
+        )
+        for especificacion in especificaciones
+    }
+
+    logger.info(
+        "Creando %s máquinas virtuales (máximo %s en paralelo)",
+        len(tareas),
+        max_concurrencia,
+    )
+
+    resultados = ejecutar_concurrente(tareas, max_concurrencia=max_concurrencia)
 
     listado_resultados = []
 
-    listado_nombres_workers = [nombre_worker + f"-{i+1}" for i in range(cantidad_nodos)]
+    for especificacion in especificaciones:
+        nombre = especificacion["nombre"]
+        resultado, ip, ip_privada, ids = False, None, None, None
 
-    for nombre_worker in listado_nombres_workers:
-        (resultado, nombre, ip) = crear_vm(
-            cliente_azure=cliente_azure,
-            tamanio_instancia=tamanio_instancia,
-            nombre_base=nombre_worker,
-            grupo_recursos=grupo_recursos,
-            nombre_red_virtual=nombre_red_virtual,
-            nombre_subred=nombre_subred,
-            nombre_clave_ssh=nombre_clave_ssh,
-            sistema_operativo=sistema_operativo,
-            region=region,
-            username=username,
-            grupo_recursos_vnet=grupo_recursos_vnet,
-            grupo_seguridad=grupo_seguridad,
-        )
+        if resultados[nombre]["resultado"]:
+            resultado, _, ip, ip_privada, ids = resultados[nombre]["valor"]
 
-        listado_resultados.append(
-            {"resultado": resultado, "nombre": nombre, "ip": ip, "usuario": username}
-        )
+        if resultado:
+            logger.info("Máquina virtual creada: %s (%s)", nombre, ip)
+        else:
+            logger.error("Error al crear la máquina virtual: %s", nombre)
 
-    if all(item["resultado"] for item in listado_resultados):
-        logger.info(
-            "Máquina virtual creada: %s (%s)",
-            listado_resultados[0]["nombre"],
-            listado_resultados[0]["ip"],
+        listado_resultados.append(
+            {
+                "resultado": resultado,
+                "nombre": nombre,
+                "ip": ip,
+                "usuario": especificacion["usuario"],
+                "tipo_nodo": especificacion["tipo_nodo"],
+                "ip_privada": ip_privada,
+                "ids": ids,
+            }
         )
-        return listado_resultados
 
-    logger.error("Error al crear los nodos: %s", listado_nombres_workers)
-    return None
+    return listado_resultados
 
 
-def eliminar_cluster(cliente_azure, grupo_recursos):
+def eliminar_cluster(
+    cliente_azure, grupo_recursos, id_cluster=None, max_concurrencia=MAX_CONCURRENCIA
+):
     """
     Elimina los recursos del clúster de Spark.
+
+    Todas las VMs y sus recursos se eliminan a la vez respetando las
+    dependencias entre ellos. Si se indica id_cluster, después se eliminan
+    también los recursos etiquetados con él que no estén en el estado (por
+    ejemplo, los de una creación interrumpida), aunque no haya estado.
+    El estado solo se borra si no queda ningún recurso, para poder reintentar
+    la eliminación.
     """
+    nombres_vms = []
+    nombres_nsgs = []
+    ids_vms = {}
+
     try:
-        df_recursos_cluster = pd.read_csv("datos_cluster.csv")
+        estado_cluster = estado.leer_estado()
+        nombres_vms = list(estado_cluster["nodos"])
+        nombres_nsgs = list(estado_cluster["grupos_seguridad"])
+        ids_vms = {
+            nombre: nodo.get("ids") or {}
+            for nombre, nodo in estado_cluster["nodos"].items()
+        }
+    except Exception as e:
+        logger.error("Error al leer el estado del clúster: %s", e)
 
-        for _, row in df_recursos_cluster.iterrows():
-            logger.info("Eliminando recurso: %s", row["Nombre"])
-            eliminar_vm(cliente_azure, grupo_recursos, row["Nombre"])
+    logger.info("Eliminando los nodos: %s", nombres_vms)
+    logger.info("Eliminando los grupos de seguridad: %s", nombres_nsgs)
 
+    try:
+        pendientes = eliminar_recursos_cluster(
+            cliente_azure,
+            grupo_recursos,
+            nombres_vms,
+            nombres_nsgs,
+            max_concurrencia=max_concurrencia,
+            ids_vms=ids_vms,
+        )
+
+        if id_cluster is not None:
+            huerfanos = eliminar_recursos_etiquetados(
+                cliente_azure,
+                grupo_recursos,
+                id_cluster,
+                max_concurrencia=max_concurrencia,
+            )
+            pendientes = sorted(set(pendientes) | set(huerfanos))
     except Exception as e:
         logger.error("Error al eliminar el clúster: %s", e)
+        return False
 
-    try:
+    if pendientes:
+        logger.error(
+            "Se conserva el estado para reintentar la eliminación de: %s",
+            pendientes,
+        )
+        return False
 
-        df_grupos_seguridad = pd.read_csv("datos_grupos_seguridad.csv")
+    estado.eliminar_estado()
 
-        for _, row in df_grupos_seguridad.iterrows():
-            logger.info("Eliminando grupo de seguridad: %s", row["Nombre"])
-            eliminar_grupo_seguridad(cliente_azure, grupo_recursos, row["Nombre"])
-    except Exception as e:
-        logger.error("Error al eliminar los grupos de seguridad: %s", e)
+    return True
+
+
+def leer_nodos_cluster():
+    """
+    Lee los nodos del clúster desde el estado.
+
+    Returns:
+        list: Un diccionario por nodo con las claves "nombre", "ip", "usuario",
+        "tipo_nodo", "ip_privada" (None si no está guardada) e "ids" (ids de
+        sus recursos en Azure).
+    """
+
+    if not estado.existe_estado():
+        raise FileNotFoundError("No hay ningún clúster guardado.")
+
+    return estado.leer_nodos()
+
+
+def completar_ips_privadas(cliente_azure, grupo_recursos, nodos):
+    """
+    Completa las IPs privadas que falten en el estado del clúster (por
+    ejemplo, en un estado de una versión anterior) con una sola consulta en
+    bloque y guarda el resultado.
+
+    Returns:
+        list: Los mismos nodos, con la clave "ip_privada".
+    """
+
+    if all(nodo.get("ip_privada") for nodo in nodos):
+        return nodos
 
-    # Eliminamos los archivos .csv verificando si existen
-    if os.path.exists("datos_cluster.csv"):
-        os.remove("datos_cluster.csv")
-    if os.path.exists("datos_grupos_seguridad.csv"):
-        os.remove("datos_grupos_seguridad.csv")
+    inventario = inventario_ips(cliente_azure, grupo_recursos)
+
+    for nodo in nodos:
+        if not nodo.get("ip_privada"):
+            nodo["ip_privada"] = inventario.get(nodo["nombre"], {}).get("ip_privada")
+
+    guardar_nodos_cluster(nodos)
+
+    return nodos
 
 
 def instalar_dependencias_cluster(
-    cliente_azure, ruta_scripts, clave_publica, zona_dns, patron_dns, grupo_recursos
+    cliente_azure,
+    ruta_scripts,
+    clave_publica,
+    zona_dns,
+    patron_dns,
+    grupo_recursos,
+    esperar_disponibilidad=False,
+    max_concurrencia=MAX_CONCURRENCIA,
+    fase=None,
 ):
     """
-    Instala las dependencias en los nodos del clúster.
+    Instala las dependencias en los nodos del clúster en paralelo.
+
+    La salida de cada nodo se escribe en registros/<nodo>.log. Si
+    esperar_disponibilidad es True, se comprueba en paralelo que cada nodo
+    esté listo y la instalación de cada uno empieza en cuanto lo está.
+
+    Los tarballs de Hadoop y Spark se descargan una sola vez y se reparten a
+    los nodos según MODO_ARTEFACTOS. Con fase="configuracion" (nodos creados
+    desde la imagen dorada) solo se ejecutan los scripts de configuración.
+
+    Returns:
+        dict: Diccionario {nombre_nodo: bool} con el resultado de cada nodo.
     """
-    try:
-        logger.info("Instalando dependencias en el cluster")
-        df_recursos_cluster = pd.read_csv("datos_cluster.csv")
+    logger.info("Instalando dependencias en el cluster")
+    nodos = completar_ips_privadas(cliente_azure, grupo_recursos, leer_nodos_cluster())
+    distribuidor = DistribuidorArtefactos()
+
+    # El estado guarda los nodos en el orden en que se crearon. El master va
+    # primero para que ocupe uno de los primeros huecos de max_concurrencia:
+    # en modo "master" los workers esperan ocupando su hueco hasta que el
+    # master publica los artefactos
+    nodos = sorted(nodos, key=lambda nodo: nodo["tipo_nodo"] != "Master")
+
+    def instalar_nodo(nodo):
+        logger.info("Instalando dependencias en: %s", nodo["nombre"])
+        registro = obtener_logger_nodo(nodo["nombre"])
+        if fase != "configuracion":
+            try:
+                distribuidor.distribuir(
+                    pool_ssh.obtener(nodo["ip"], nodo["usuario"], clave_publica),
+                    nodo,
+                    registro,
+                )
+            finally:
+                # Si el master falla, los workers no deben quedarse esperando
+                if nodo["tipo_nodo"] == "Master":
+                    distribuidor.liberar()
+        resultado = instalar_dependencias_vm(
+            cliente_azure,
+            nodo["ip"],
+            clave_publica,
+            nodo["usuario"],
+            ruta_scripts=ruta_scripts,
+            nombre_nodo=nodo["nombre"],
+            tipo_nodo=nodo["tipo_nodo"],
+            grupo_recursos=grupo_recursos,
+            zona_dns=zona_dns,
+            patron_dns=patron_dns,
+            registro=registro,
+            fase=fase,
+            ip_privada_vm=nodo["ip_privada"],
+        )
+        if not resultado:
+            raise RuntimeError(f"La instalación falló en {nodo['nombre']}")
+
+    if fase != "configuracion":
+        distribuidor.precargar()
+
+    if esperar_disponibilidad:
+        resumen = esperar_nodos_listos(
+            cliente_azure,
+            grupo_recursos,
+            nodos,
+            clave_publica,
+            al_estar_listo=instalar_nodo,
+            max_concurrencia=max_concurrencia,
+        )
+    else:
+        resultados = ejecutar_concurrente(
+            {nodo["nombre"]: (instalar_nodo, {"nodo": nodo}) for nodo in nodos},
+            max_concurrencia=max_concurrencia,
+        )
+        resumen = {
+            nombre: resultado["resultado"] for nombre, resultado in resultados.items()
+        }
 
-        for _, row in df_recursos_cluster.iterrows():
-            logger.info("Instalando dependencias en: %s", row["Nombre"])
-            instalar_dependencias_vm(
-                cliente_azure,
-                row["IP"],
-                clave_publica,
-                row["Usuario"],
-                ruta_scripts=ruta_scripts,
-                nombre_nodo=row["Nombre"],
-                tipo_nodo=row["TipoNodo"],
-                grupo_recursos=grupo_recursos,
-                zona_dns=zona_dns,
-                patron_dns=patron_dns,
-            )
-    except Exception as e:
-        logger.error("Error al instalar dependencias en el cluster: %s", e)
+    distribuidor.finalizar()
+
+    nodos_correctos = [nombre for nombre, correcto in resumen.items() if correcto]
+    nodos_fallidos = [nombre for nombre, correcto in resumen.items() if not correcto]
+
+    logger.info(
+        "Instalación completada en %s de %s nodos", len(nodos_correctos), len(nodos)
+    )
+    if nodos_fallidos:
+        logger.error("La instalación falló en los nodos: %s", nodos_fallidos)
+
+    return resumen
 
 
 def iniciar_nodos_cluster(cliente_azure, clave_publica, grupo_recursos):
     """
     Inicia el cluster
+
+    Primero se inicia el master y después todos los workers a la vez, leyendo
+    la salida de todos ellos desde un único hilo.
     """
     try:
         logger.info("Iniciando el cluster")
-        df_recursos_cluster = pd.read_csv("datos_cluster.csv")
+        nodos = completar_ips_privadas(
+            cliente_azure, grupo_recursos, leer_nodos_cluster()
+        )
 
-        nombre_vm = df_recursos_cluster[df_recursos_cluster["TipoNodo"] == "Master"][
-            "Nombre"
-        ].values[0]
+        master = next(nodo for nodo in nodos if nodo["tipo_nodo"] == "Master")
+        workers = [nodo for nodo in nodos if nodo["tipo_nodo"] == "Worker"]
 
-        _, ip_privada = obtener_ip_privada_vm(cliente_azure, grupo_recursos, nombre_vm)
+        ip_privada = master["ip_privada"]
 
         if ip_privada:
             logger.info("IP privada del nodo master: %s", ip_privada)
@@ -387,85 +658,134 @@ def iniciar_nodos_cluster(cliente_azure, clave_publica, grupo_recursos):
             logger.error("No se pudo obtener la IP privada del nodo master")
             raise ValueError("No se pudo obtener la IP privada del nodo master")
 
-        for _, row in df_recursos_cluster.iterrows():
-            logger.info("Iniciando nodo: %s", row["Nombre"])
-
-            if row["TipoNodo"] == "Master":
-
-                iniciar_master(
-                    nombre_host=row["IP"],
-                    usuario=row["Usuario"],
-                    clave_publica=clave_publica,
+        logger.info("Iniciando nodo: %s", master["nombre"])
+        if not iniciar_master(
+            nombre_host=master["ip"],
+            usuario=master["usuario"],
+            clave_publica=clave_publica,
+        ):
+            raise RuntimeError("No se pudo iniciar el nodo master")
+
+        logger.info("Iniciando %s workers", len(workers))
+
+        # Las conexiones se abren en paralelo y un worker inaccesible solo
+        # hace fallar a ese worker
+        conexiones = ejecutar_concurrente(
+            {
+                nodo["nombre"]: (
+                    pool_ssh.obtener,
+                    {
+                        "nombre_host": nodo["ip"],
+                        "usuario": nodo["usuario"],
+                        "clave_publica": clave_publica,
+                    },
                 )
-            elif row["TipoNodo"] == "Worker":
-                iniciar_worker(
-                    nombre_host=row["IP"],
-                    usuario=row["Usuario"],
-                    clave_publica=clave_publica,
-                    nombre_host_master=ip_privada,
+                for nodo in workers
+            },
+            max_concurrencia=MAX_CONCURRENCIA,
+        )
+
+        for nombre, conexion in conexiones.items():
+            if not conexion["resultado"]:
+                logger.error(
+                    "No se pudo conectar con el worker %s: %s",
+                    nombre,
+                    conexion["error"],
                 )
 
+        resultados = ejecutar_comandos(
+            [
+                {
+                    "nombre_nodo": nodo["nombre"],
+                    "ssh_client": conexiones[nodo["nombre"]]["valor"],
+                    "comando": comando_iniciar_worker(ip_privada),
+                }
+                for nodo in workers
+                if conexiones[nodo["nombre"]]["resultado"]
+            ]
+        )
+
+        nodos_fallidos = [
+            nodo["nombre"]
+            for nodo in workers
+            if not resultados.get(nodo["nombre"], {}).get("resultado")
+        ]
+        if nodos_fallidos:
+            logger.error("No se pudieron iniciar los workers: %s", nodos_fallidos)
+
     except Exception as e:
-        logger.error("Error al instalar dependencias en el cluster: %s", e)
+        logger.error("Error al iniciar los nodos del cluster: %s", e)
+
+
+def nombre_registro_dns(nodo, zona, patron_dns="cluster.spark"):
+    """
+    Devuelve el nombre del registro DNS de un nodo del clúster.
+    """
+
+    if nodo["tipo_nodo"] == "Master":
+        return f"{patron_dns}.driver.{zona}"
 
+    numero_nodo = nodo["nombre"].split("-")[-1]
+    return f"{patron_dns}.worker.{numero_nodo}.{zona}"
 
-def actualizar_dns(cf, zona, zona_id, patron_dns="cluster.spark"):
 
-    # Cargamos los datos de los nodos
+def actualizar_dns(cf, zona, zona_id, patron_dns="cluster.spark", forzar=False):
+    """
+    Sincroniza los registros DNS del clúster con el estado: un registro A para
+    el driver y uno por worker. Los registros worker.N de workers que ya no
+    existen, por ejemplo tras reducir el clúster, se eliminan.
+
+    Cada registro se compara con el existente por su huella, de modo que si
+    nada ha cambiado solo se hace la consulta que lista los registros. Con
+    forzar se reescriben todos.
+
+    Returns:
+        dict: El plan aplicado, como en sincronizar_dns.
+    """
 
     logger.debug("Cargando datos del cluster")
-    df_recursos_cluster = pd.read_csv("datos_cluster.csv")
+    nodos = leer_nodos_cluster()
+
+    deseados = {
+        nombre_registro_dns(nodo, zona, patron_dns): nodo["ip"]
+        for nodo in nodos
+        if nodo["ip"]
+    }
 
-    datos_nodo_driver = (
-        df_recursos_cluster[df_recursos_cluster["TipoNodo"] == "Master"]
-        .iloc[0]
-        .to_dict()
+    patron_worker = re.compile(
+        rf"^{re.escape(patron_dns)}\.worker\.\d+\.{re.escape(zona)}$", re.IGNORECASE
     )
 
-    logger.info("Creando registro DNS para el nodo driver")
-    create_or_update_dns_record(
+    plan = sincronizar_dns(
         cf,
-        nombre_zona=zona,
         id_zona=zona_id,
-        record_type="A",
-        record_name=patron_dns + ".driver." + zona,
-        record_content=datos_nodo_driver["IP"],
-        proxied=False,
-    )
-    logger.info(
-        "Registro DNS creado para el nodo driver: %s",
-        patron_dns + ".driver." + zona,
+        prefijo=f"{patron_dns}.",
+        deseados=deseados,
+        es_sobrante=patron_worker.match,
+        forzar=forzar,
     )
 
-    df_workers = df_recursos_cluster[df_recursos_cluster["TipoNodo"] == "Worker"].copy()
-    df_workers["id"] = df_workers["Nombre"].str.split("-").str[-1]
-
-    lista_datos_nodos = df_workers[["id", "IP"]].values.tolist()
-
-    for id, ip in lista_datos_nodos:
-        logger.info("Creando registro DNS para el nodo worker %s", id)
-        create_or_update_dns_record(
-            cf,
-            nombre_zona=zona,
-            id_zona=zona_id,
-            record_type="A",
-            record_name=f"{patron_dns}.worker.{id}.{zona}",
-            record_content=ip,
-            proxied=False,
+    if plan["fallidos"]:
+        logger.error(
+            "No se pudieron actualizar los registros DNS: %s", plan["fallidos"]
         )
-        logger.info("Registro DNS creado para el nodo worker %s", id)
+    else:
+        logger.info("Registros DNS del clúster actualizados")
+
+    return plan
 
 
 def configurar_driver_devops(clave_publica, clave_devops):
     """
     Configura el nodo driver para DevOps
     """
-    df_recursos_cluster = pd.read_csv("datos_cluster.csv")
-
     # filtramos los datos del nodo master
-    datos_master = df_recursos_cluster[
-        df_recursos_cluster["TipoNodo"] == "Master"
-    ].to_dict(orient="records")[0]
+    nodos = leer_nodos_cluster()
+    datos_master = next((nodo for nodo in nodos if nodo["tipo_nodo"] == "Master"), None)
+
+    if datos_master is None:
+        logger.error("El clúster no tiene un nodo master al que copiar la clave")
+        raise ValueError("El clúster no tiene un nodo master.")
 
     ruta_clave_devops = Path(clave_devops)
 
@@ -478,9 +798,9 @@ def configurar_driver_devops(clave_publica, clave_devops):
         raise FileNotFoundError("La ruta de la clave de DevOps no existe")
 
     copiar_clave_privada_devops(
-        nombre_vm=datos_master["Nombre"],
+        nombre_vm=datos_master["nombre"],
         clave_publica=clave_publica,
-        ip_nodo=datos_master["IP"],
-        usuario=datos_master["Usuario"],
+        ip_nodo=datos_master["ip"],
+        usuario=datos_master["usuario"],
         contenido_clave_devops=contenido_clave_devops,
     )
@@ -1,8 +1,46 @@
+import hashlib
+import json
 import logging
 
+from config.configuraciones import MAX_CONCURRENCIA
+from func.concurrencia import ejecutar_concurrente
+
 # Obtiene el logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Registros que se piden en cada página al listar la zona
+REGISTROS_POR_PAGINA = 500
+
+
+def huella_registro(record_type, record_content, proxied, ttl, comment):
+    """
+    Devuelve una huella (sha256) de los campos que se escriben en un registro
+    DNS. Dos registros con la misma huella no necesitan actualizarse.
+    """
+
+    datos = [
+        record_type,
+        record_content,
+        bool(proxied),
+        int(ttl) if ttl is not None else None,
+        comment or None,
+    ]
+    return hashlib.sha256(json.dumps(datos).encode("utf-8")).hexdigest()
+
+
+def huella_registro_existente(registro):
+    """
+    Devuelve la huella de un registro obtenido de Cloudflare.
+    """
+
+    return huella_registro(
+        registro.type,
+        registro.content,
+        registro.proxied,
+        registro.ttl,
+        registro.comment,
+    )
+
 
 def create_or_update_dns_record(
     cf,
@@ -24,14 +62,24 @@ def create_or_update_dns_record(
     )
 
     if existing_records.result:
+        registro = existing_records.result[0]
+
+        if huella_registro_existente(registro) == huella_registro(
+            record_type, record_content, proxied, ttl, comment
+        ):
+            logger.info("Registro sin cambios: %s", record_name)
+            return registro
+
         # Ya existe → actualizar
-        record_id = existing_records.result[0].id
         updated = cf.dns.records.update(
             zone_id=id_zona,
-            dns_record_id=record_id,
+            dns_record_id=registro.id,
             content=record_content,
             type=record_type,
             name=record_name,
+            proxied=proxied,
+            ttl=ttl,
+            comment=comment,
         )
         logger.info(f"✅ Registro actualizado: {updated}")
         return updated
@@ -48,3 +96,326 @@ def create_or_update_dns_record(
         )
         logger.info(f"🆕 Registro creado: {created}")
         return created
+
+
+async def create_or_update_dns_record_async(
+    cf,
+    nombre_zona,
+    id_zona,
+    record_type,
+    record_name,
+    record_content,
+    proxied=False,
+    ttl=120,
+    comment="SparkClusterSdk",
+):
+    """
+    Variante asíncrona de create_or_update_dns_record, con un cliente
+    AsyncCloudflare.
+    """
+
+    existing_records = await cf.dns.records.list(
+        zone_id=id_zona, name=record_name, type=record_type
+    )
+
+    if existing_records.result:
+        registro = existing_records.result[0]
+
+        if huella_registro_existente(registro) == huella_registro(
+            record_type, record_content, proxied, ttl, comment
+        ):
+            logger.info("Registro sin cambios: %s", record_name)
+            return registro
+
+        updated = await cf.dns.records.update(
+            zone_id=id_zona,
+            dns_record_id=registro.id,
+            content=record_content,
+            type=record_type,
+            name=record_name,
+            proxied=proxied,
+            ttl=ttl,
+            comment=comment,
+        )
+        logger.info("✅ Registro actualizado: %s", updated)
+        return updated
+
+    created = await cf.dns.records.create(
+        zone_id=id_zona,
+        name=record_name,
+        type=record_type,
+        content=record_content,
+        proxied=proxied,
+        ttl=ttl,
+        comment=comment,
+    )
+    logger.info("🆕 Registro creado: %s", created)
+    return created
+
+
+def delete_dns_record(cf, id_zona, record_type, record_name):
+    """
+    Elimina un registro DNS de Cloudflare si existe.
+
+    Returns:
+        bool: True si se eliminó algún registro.
+    """
+
+    existing_records = cf.dns.records.list(
+        zone_id=id_zona, name=record_name, type=record_type
+    )
+
+    for record in existing_records.result:
+        cf.dns.records.delete(zone_id=id_zona, dns_record_id=record.id)
+        logger.info("🗑️ Registro eliminado: %s", record_name)
+
+    return bool(existing_records.result)
+
+
+def listar_registros_dns(cf, id_zona, prefijo, record_type="A"):
+    """
+    Lista en una sola consulta paginada los registros cuyo nombre empieza por
+    el prefijo indicado.
+
+    Returns:
+        dict: Diccionario {nombre: registro}. Si hay varios registros con el
+        mismo nombre, se conserva el primero.
+    """
+
+    registros = {}
+
+    paginas = cf.dns.records.list(
+        zone_id=id_zona,
+        type=record_type,
+        name={"startswith": prefijo},
+        per_page=REGISTROS_POR_PAGINA,
+    ).iter_pages()
+
+    for pagina in paginas:
+        for registro in pagina.result:
+            registros.setdefault(registro.name, registro)
+
+        # Una página incompleta es la última; así no se pide una página vacía
+        if len(pagina.result) < REGISTROS_POR_PAGINA:
+            break
+
+    return registros
+
+
+def planificar_sincronizacion_dns(
+    deseados,
+    existentes,
+    es_sobrante=None,
+    forzar=False,
+    record_type="A",
+    proxied=False,
+    ttl=120,
+    comment="SparkClusterSdk",
+):
+    """
+    Compara los registros deseados con los existentes.
+
+    Un registro no se actualiza si su huella coincide con la del registro
+    existente.
+
+    Args:
+        deseados (dict): Diccionario {nombre: contenido}.
+        existentes (dict): Registros existentes, como en listar_registros_dns.
+        es_sobrante (callable): Recibe el nombre de un registro existente que
+            no está en deseados e indica si debe eliminarse. Por defecto no se
+            elimina ninguno.
+        forzar (bool): Actualiza todos los registros existentes sin comparar.
+
+    Returns:
+        dict: Diccionario con las listas "crear" ({"name", "content",
+        "huella"}), "actualizar" ({"id", "name", "content", "huella"}),
+        "eliminar" ({"id", "name"}) y "sin_cambios" (nombres).
+    """
+
+    plan = {"crear": [], "actualizar": [], "eliminar": [], "sin_cambios": []}
+
+    for nombre, contenido in deseados.items():
+        registro = existentes.get(nombre)
+        huella = huella_registro(record_type, contenido, proxied, ttl, comment)
+
+        if registro is None:
+            plan["crear"].append(
+                {"name": nombre, "content": contenido, "huella": huella}
+            )
+        elif not forzar and huella_registro_existente(registro) == huella:
+            plan["sin_cambios"].append(nombre)
+        else:
+            plan["actualizar"].append(
+                {
+                    "id": registro.id,
+                    "name": nombre,
+                    "content": contenido,
+                    "huella": huella,
+                }
+            )
+
+    if es_sobrante is not None:
+        plan["eliminar"] = [
+            {"id": registro.id, "name": nombre}
+            for nombre, registro in sorted(existentes.items())
+            if nombre not in deseados and es_sobrante(nombre)
+        ]
+
+    return plan
+
+
+def aplicar_sincronizacion_dns(
+    cf,
+    id_zona,
+    plan,
+    record_type="A",
+    proxied=False,
+    ttl=120,
+    comment="SparkClusterSdk",
+    usar_lote=True,
+    max_concurrencia=MAX_CONCURRENCIA,
+):
+    """
+    Aplica un plan de planificar_sincronizacion_dns. Todos los cambios se
+    envían en una sola llamada al endpoint de lotes de Cloudflare; si falla
+    (por ejemplo, en una API que no lo implementa), se aplican uno a uno en
+    paralelo.
+
+    Returns:
+        list: Nombres de los registros que no se pudieron modificar.
+    """
+
+    posts = [
+        {
+            "name": cambio["name"],
+            "type": record_type,
+            "content": cambio["content"],
+            "proxied": proxied,
+            "ttl": ttl,
+            "comment": comment,
+        }
+        for cambio in plan["crear"]
+    ]
+    patches = [
+        {
+            "id": cambio["id"],
+            "name": cambio["name"],
+            "type": record_type,
+            "content": cambio["content"],
+            "proxied": proxied,
+            "ttl": ttl,
+            "comment": comment,
+        }
+        for cambio in plan["actualizar"]
+    ]
+    deletes = [{"id": cambio["id"]} for cambio in plan["eliminar"]]
+
+    if not (posts or patches or deletes):
+        return []
+
+    if usar_lote:
+        try:
+            cf.dns.records.batch(
+                zone_id=id_zona, deletes=deletes, patches=patches, posts=posts
+            )
+            return []
+        except Exception as e:
+            logger.warning(
+                "No se pudo aplicar el lote de registros DNS, se aplican uno a uno: %s",
+                e,
+            )
+
+    tareas = {}
+
+    for post in posts:
+        tareas[post["name"]] = (cf.dns.records.create, {"zone_id": id_zona, **post})
+
+    for patch in patches:
+        tareas[patch["name"]] = (
+            cf.dns.records.edit,
+            {
+                "zone_id": id_zona,
+                "dns_record_id": patch["id"],
+                **{clave: valor for clave, valor in patch.items() if clave != "id"},
+            },
+        )
+
+    for cambio in plan["eliminar"]:
+        tareas[cambio["name"]] = (
+            cf.dns.records.delete,
+            {"zone_id": id_zona, "dns_record_id": cambio["id"]},
+        )
+
+    resultados = ejecutar_concurrente(tareas, max_concurrencia=max_concurrencia)
+
+    fallidos = [nombre for nombre in tareas if not resultados[nombre]["resultado"]]
+    for nombre in fallidos:
+        logger.error(
+            "No se pudo modificar el registro %s: %s",
+            nombre,
+            resultados[nombre]["error"],
+        )
+
+    return fallidos
+
+
+def sincronizar_dns(
+    cf,
+    id_zona,
+    prefijo,
+    deseados,
+    es_sobrante=None,
+    forzar=False,
+    record_type="A",
+    proxied=False,
+    ttl=120,
+    comment="SparkClusterSdk",
+):
+    """
+    Deja los registros de la zona que empiezan por el prefijo como indica
+    deseados: una consulta para listarlos y, si hay cambios, una llamada al
+    endpoint de lotes, en lugar de una consulta y una escritura por registro.
+    Si nada ha cambiado, no se escribe nada.
+
+    Args:
+        deseados (dict): Diccionario {nombre: contenido}.
+        es_sobrante (callable): Indica qué registros existentes que no están
+            en deseados deben eliminarse, como en planificar_sincronizacion_dns.
+        forzar (bool): Reescribe todos los registros existentes.
+
+    Returns:
+        dict: El plan aplicado, con la clave adicional "fallidos" (nombres).
+    """
+
+    existentes = listar_registros_dns(cf, id_zona, prefijo, record_type)
+    plan = planificar_sincronizacion_dns(
+        deseados,
+        existentes,
+        es_sobrante,
+        forzar=forzar,
+        record_type=record_type,
+        proxied=proxied,
+        ttl=ttl,
+        comment=comment,
+    )
+
+    logger.info(
+        "Sincronización DNS: %s por crear, %s por actualizar, %s por eliminar, "
+        "%s sin cambios",
+        len(plan["crear"]),
+        len(plan["actualizar"]),
+        len(plan["eliminar"]),
+        len(plan["sin_cambios"]),
+    )
+
+    plan["fallidos"] = aplicar_sincronizacion_dns(
+        cf,
+        id_zona,
+        plan,
+        record_type=record_type,
+        proxied=proxied,
+        ttl=ttl,
+        comment=comment,
+    )
+
+    return plan
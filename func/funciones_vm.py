@@ -1,22 +1,50 @@
+import base64
 import logging
 import os
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.network.models import (
-    NetworkSecurityGroup,
-    SecurityRule,
-    NetworkInterface,
-    NetworkInterfaceIPConfiguration,
-    Subnet,
-    PublicIPAddress,
+from func.inicializar_vm import (
+    ejecutar_directorio_scripts,
+    ejecutar_scripts_remotos_async,
 )
-from func.inicializar_vm import ejecutar_script_remoto
+from func.concurrencia import (
+    ejecutar_concurrente,
+    ejecutar_grafo,
+    ejecutar_grafo_async,
+    ejecutar_pasos,
+    ejecutar_pasos_async,
+)
+from func.conexiones_ssh import pool_ssh
+from func.ejecucion_remota import ejecutar_comando
+from func.transferencias import subir_archivo
 from pathlib import Path
 import paramiko
 
 # Obtiene el logger para este módulo
 logger = logging.getLogger(__name__)
 
+PREFIJO_SCRIPTS_CONFIGURACION = "configuracion_"
+
+# Etiqueta con la que se marcan todos los recursos de un clúster
+ETIQUETA_CLUSTER = "auto-az-spark-cluster"
+
+# Rango de prioridades de Azure para las reglas de un grupo de seguridad
+PRIORIDAD_MINIMA = 100
+PRIORIDAD_MAXIMA = 4096
+
+CLAVES_REGLA_CORTAFUEGOS = {
+    "protocolo",
+    "puerto_origen",
+    "puerto_destino",
+    "direccion_origen",
+    "direccion_destino",
+    "acceso",
+    "direccion",
+    "prioridad",
+    "nombre",
+}
+
+# Límite de Azure para custom_data, ya codificado en base64
+TAMANIO_MAXIMO_DATOS_PERSONALIZADOS = 87380
+
 
 def crear_vm(
     cliente_azure,
@@ -32,9 +60,107 @@ def crear_vm(
     grupo_seguridad=None,
     reglas_cortafuegos=None,
     grupo_recursos_vnet=None,
+    datos_personalizados=None,
+    id_cluster=None,
 ):
     """
     Crea una máquina virtual en Azure.
+
+    Los recursos de la VM se crean como un grafo de dependencias: el NSG, la
+    subred, la IP pública y la clave SSH se solicitan a la vez, y cada recurso
+    se espera solo cuando otro necesita su id. La subred, la clave SSH y los
+    NSGs existentes se leen de la caché del cliente, compartida por todas las
+    VMs de la ejecución.
+
+    La NIC, el disco y la IP pública se crean con deleteOption "Delete", de
+    modo que Azure los elimina junto con la VM.
+
+    Args:
+        datos_personalizados (str | callable): Script de cloud-init que la VM
+            ejecuta al arrancar. Si es una función, recibe la IP privada de la
+            VM (conocida al crear la NIC) y devuelve el script.
+        id_cluster (str): Id del clúster con el que se etiquetan todos los
+            recursos de la VM, incluido su disco.
+
+    Returns:
+        tuple: (resultado, nombre, ip pública, ip privada, ids). La IP privada
+        se toma de la NIC creada, para no tener que consultarla después. ids
+        son los ids de los recursos de la VM, como en ids_recursos_vm.
+    """
+
+    try:
+        tareas = tareas_crear_vm(
+            cliente_azure,
+            lambda operacion: operacion.result(),
+            tamanio_instancia=tamanio_instancia,
+            nombre_base=nombre_base,
+            grupo_recursos=grupo_recursos,
+            nombre_red_virtual=nombre_red_virtual,
+            nombre_subred=nombre_subred,
+            nombre_clave_ssh=nombre_clave_ssh,
+            sistema_operativo=sistema_operativo,
+            region=region,
+            username=username,
+            grupo_seguridad=grupo_seguridad,
+            reglas_cortafuegos=reglas_cortafuegos,
+            grupo_recursos_vnet=grupo_recursos_vnet,
+            datos_personalizados=datos_personalizados,
+            id_cluster=id_cluster,
+        )
+
+        recursos = ejecutar_grafo(
+            {
+                nombre: (
+                    lambda dependencias, pasos=pasos: ejecutar_pasos(
+                        pasos(dependencias)
+                    ),
+                    dependencias,
+                )
+                for nombre, (pasos, dependencias) in tareas.items()
+            }
+        )
+
+        return resultado_crear_vm(nombre_base, recursos)
+
+    except Exception as e:
+        logger.error("Error al crear la VM %s: %s", nombre_base, e)
+        return False, None, None, None, None
+
+
+def tareas_crear_vm(
+    cliente_azure,
+    esperar,
+    tamanio_instancia,
+    nombre_base,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    sistema_operativo,
+    region,
+    username,
+    grupo_seguridad,
+    reglas_cortafuegos,
+    grupo_recursos_vnet,
+    datos_personalizados,
+    id_cluster,
+):
+    """
+    Devuelve el grafo de recursos de una VM, común a crear_vm y
+    crear_vm_async.
+
+    Cada tarea es un generador de pasos (ver ejecutar_pasos) que produce las
+    llamadas a Azure, por lo que el mismo grafo funciona con los clientes
+    síncronos y con los asíncronos.
+
+    Args:
+        cliente_azure (ClienteAzure | ClienteAzureAsync): Cliente de Azure.
+        esperar (callable): Espera una operación de larga duración recién
+            lanzada con begin_*.
+
+    Returns:
+        dict: Diccionario {nombre: (pasos, [dependencias])}, como lo espera
+        ejecutar_grafo si cada pasos se ejecuta con ejecutar_pasos.
     """
 
     logger.info(
@@ -44,87 +170,81 @@ def crear_vm(
     nombre_nsg = f"{nombre_base}-nsg"
     nic_name = f"{nombre_base}-nic"
     nombre_ip_publica = f"{nombre_base}-ip"
+    etiquetas = etiquetas_cluster(id_cluster)
 
-    try:
-
-        if grupo_recursos_vnet is None:
-            logger.debug(
-                "No se proporcionó un grupo de recursos para la VNet, usando el grupo de recursos principal."
-            )
-            grupo_recursos_vnet = grupo_recursos
-
-        network_client = NetworkManagementClient(
-            cliente_azure.credencial, cliente_azure.id_suscripcion
+    if grupo_recursos_vnet is None:
+        logger.debug(
+            "No se proporcionó un grupo de recursos para la VNet, usando el grupo de recursos principal."
         )
-        compute_client = ComputeManagementClient(
-            cliente_azure.credencial, cliente_azure.id_suscripcion
+        grupo_recursos_vnet = grupo_recursos
+
+    if grupo_seguridad is not None and not isinstance(grupo_seguridad, str):
+        raise ValueError(
+            "El grupo de seguridad debe ser un nombre de grupo existente o None."
         )
 
+    network_client = cliente_azure.obtener_cliente_red()
+    compute_client = cliente_azure.obtener_cliente_compute()
+    cache = cliente_azure.cache
+
+    def obtener_grupo_seguridad(_):
+        nombre_grupo = nombre_nsg
+
+        reglas = []
+        if reglas_cortafuegos is not None and isinstance(reglas_cortafuegos, list):
+            logger.debug("Se han proporcionado reglas de cortafuegos personalizadas.")
+            reglas = compilar_reglas_cortafuegos(reglas_cortafuegos)
+
         if grupo_seguridad is None:
             logger.debug("No se proporcionó un grupo de seguridad, creando uno nuevo.")
-            nsg_params = NetworkSecurityGroup(location=region)
-            nsg = network_client.network_security_groups.begin_create_or_update(
-                grupo_recursos, nombre_nsg, nsg_params
-            ).result()
-
-            logger.info(
-                "Se ha creado el grupo de seguridad: %s con nombre: %s",
-                nsg.id,
-                nombre_nsg,
-            )
-        elif grupo_seguridad is not None and isinstance(grupo_seguridad, str):
+            nsg_params = parametros_grupo_seguridad(region, etiquetas, reglas)
+        else:
             logger.debug(
                 "Se ha proporcionado un grupo de seguridad existente: %s",
                 grupo_seguridad,
             )
-            nsg = network_client.network_security_groups.get(
+            nombre_grupo = grupo_seguridad
+
+            if not reglas:
+                return (
+                    yield cache.obtener(
+                        clave_cache_grupo_seguridad(grupo_recursos, grupo_seguridad),
+                        lambda: network_client.network_security_groups.get(
+                            grupo_recursos, grupo_seguridad
+                        ),
+                    )
+                )
+
+            # Se lee sin caché porque las reglas se modifican
+            nsg_params = yield network_client.network_security_groups.get(
                 grupo_recursos, grupo_seguridad
             )
-            nombre_nsg = grupo_seguridad
-        else:
-            raise ValueError(
-                "El grupo de seguridad debe ser un nombre de grupo existente o None."
-            )
-
-        if reglas_cortafuegos is not None and isinstance(reglas_cortafuegos, list):
-            logger.debug("Se han proporcionado reglas de cortafuegos personalizadas.")
+            reglas = fusionar_reglas_grupo_seguridad(nsg_params, reglas)
 
-            for regla in reglas_cortafuegos:
-                try:
-
-                    regla_configuraciones_cortafuego = SecurityRule(
-                        protocol=regla["protocolo"],
-                        source_port_range=regla["puerto_origen"],
-                        destination_port_range=regla["puerto_destino"],
-                        source_address_prefix=regla["direccion_origen"],
-                        destination_address_prefix=regla["direccion_destino"],
-                        access=regla["acceso"],
-                        direction=regla["direccion"],
-                        priority=regla["prioridad"],
-                        name=regla["nombre"],
-                    )
-
-                    resultado_regla = (
-                        network_client.security_rules.begin_create_or_update(
-                            grupo_recursos,
-                            nombre_nsg,
-                            regla["nombre"],
-                            regla_configuraciones_cortafuego,
-                        ).result()
-                    )
+        nsg = yield esperar(
+            network_client.network_security_groups.begin_create_or_update(
+                grupo_recursos, nombre_grupo, nsg_params
+            )
+        )
+        cache.guardar(clave_cache_grupo_seguridad(grupo_recursos, nombre_grupo), nsg)
 
-                    logger.info(
-                        "Se ha creado la regla de cortafuegos: %s",
-                        resultado_regla.id,
-                    )
+        logger.info(
+            "Se ha creado el grupo de seguridad: %s con nombre: %s y %s reglas",
+            nsg.id,
+            nombre_grupo,
+            len(reglas),
+        )
 
-                except Exception as e:
-                    logger.error("Error al crear la regla de cortafuegos: %s", e)
+        return nsg
 
-        ## Subred
+    ## Subred
 
-        subnet = network_client.subnets.get(
-            grupo_recursos_vnet, nombre_red_virtual, nombre_subred
+    def obtener_subred(_):
+        subnet = yield cache.obtener(
+            ("subred", grupo_recursos_vnet, nombre_red_virtual, nombre_subred),
+            lambda: network_client.subnets.get(
+                grupo_recursos_vnet, nombre_red_virtual, nombre_subred
+            ),
         )
 
         logger.info(
@@ -133,459 +253,600 @@ def crear_vm(
             nombre_subred,
         )
 
-        # Ip Publica
-        resultado_ip = public_ip = (
+        return subnet
+
+    # Ip Publica
+
+    def crear_ip_publica(_):
+        public_ip = yield esperar(
             network_client.public_ip_addresses.begin_create_or_update(
                 grupo_recursos,
                 nombre_ip_publica,
-                {
-                    "location": region,
-                    "sku": {"name": "Standard"},
-                    "public_ip_allocation_method": "Static",
-                },
-            ).result()
+                parametros_ip_publica(region, etiquetas),
+            )
         )
 
-        logger.info(
-            "Se ha creado la IP pública: %s",
-            resultado_ip.id,
-        )
-
-        # Interface de red
-        nic_params = NetworkInterface(
-            location=region,
-            ip_configurations=[
-                NetworkInterfaceIPConfiguration(
-                    name="default",
-                    subnet=Subnet(id=subnet.id),
-                    public_ip_address=PublicIPAddress(id=public_ip.id),
-                )
-            ],
-            network_security_group=nsg,
-        )
+        logger.info("Se ha creado la IP pública: %s", public_ip.id)
 
-        nic = network_client.network_interfaces.begin_create_or_update(
-            grupo_recursos, nic_name, nic_params
-        ).result()
+        return public_ip
 
-        logger.info(
-            "Se ha creado la interfaz de red: %s",
-            nic.id,
-        )
+    # Clave ssh
 
-        # Clave ssh
-        ssh_key = compute_client.ssh_public_keys.get(
-            resource_group_name=grupo_recursos, ssh_public_key_name=nombre_clave_ssh
+    def obtener_clave_ssh(_):
+        ssh_key = yield cache.obtener(
+            ("clave_ssh", grupo_recursos, nombre_clave_ssh),
+            lambda: compute_client.ssh_public_keys.get(
+                resource_group_name=grupo_recursos,
+                ssh_public_key_name=nombre_clave_ssh,
+            ),
         )
 
-        logger.info(
-            "Se ha obtenido la clave SSH: %s",
-            ssh_key.id,
-        )
-
-        ssh_key_data = ssh_key.public_key
-
-        # Maquina virtual
-
-        # ⚡ 4. Crear la VM
-        parametros_vm = {
-            "location": region,
-            "hardware_profile": {"vm_size": tamanio_instancia},
-            "storage_profile": {"image_reference": sistema_operativo},
-            "os_profile": {
-                "computer_name": nombre_base,
-                "admin_username": username,
-                "linux_configuration": {
-                    "disable_password_authentication": True,
-                    "ssh": {
-                        "public_keys": [
-                            {
-                                "path": f"/home/{username}/.ssh/authorized_keys",
-                                "key_data": ssh_key_data,
-                            }
-                        ]
-                    },
-                },
-            },
-            "network_profile": {
-                "network_interfaces": [{"id": nic.id, "primary": True}]
-            },
-            "os_disk": {
-                "name": nombre_base + "disk",
-                "create_option": "FromImage",
-                "disk_size_gb": 32,
-                "managed_disk": {"storage_account_type": "StandardSSD_LRS"},
-            },
-        }
+        logger.info("Se ha obtenido la clave SSH: %s", ssh_key.id)
 
-        compute_client.virtual_machines.begin_create_or_update(
-            grupo_recursos, nombre_base, parametros_vm
-        ).result()
+        return ssh_key
 
-        logger.info(
-            "✅ VM '%s' creada con IP estática %s",
-            nombre_base,
-            public_ip.ip_address,
-        )
+    # Interface de red
 
-        return True, nombre_base, public_ip.ip_address
+    def crear_interfaz_red(dependencias):
+        nic = yield esperar(
+            network_client.network_interfaces.begin_create_or_update(
+                grupo_recursos,
+                nic_name,
+                parametros_interfaz_red(region, etiquetas, dependencias),
+            )
+        )
 
-    except Exception as e:
-        logger.error(
-            "Error al crear la VM: %s",
-            e,
+        logger.info("Se ha creado la interfaz de red: %s", nic.id)
+
+        return nic
+
+    # Maquina virtual
+
+    def crear_maquina_virtual(dependencias):
+        return (
+            yield esperar(
+                compute_client.virtual_machines.begin_create_or_update(
+                    grupo_recursos,
+                    nombre_base,
+                    parametros_maquina_virtual(
+                        nombre_base,
+                        region,
+                        etiquetas,
+                        tamanio_instancia,
+                        sistema_operativo,
+                        username,
+                        datos_personalizados,
+                        dependencias,
+                    ),
+                )
+            )
         )
-        return False, None, None
 
+    # El disco del sistema operativo lo crea Azure con la VM y no hereda
+    # sus etiquetas (os_disk no las admite). Etiquetarlo es opcional: solo
+    # se lanza la operación, sin esperarla, y un error no hace fallar la VM
 
-def eliminar_vm(cliente_azure, nombre_vm, grupo_recursos):
-    """
-    Elimina una máquina virtual de Azure.
+    def etiquetar_disco(dependencias):
+        if not etiquetas:
+            return None
 
-    Args:
-        cliente_azure (ClienteAzure): Cliente de Azure.
-        nombre_vm (str): Nombre de la máquina virtual a eliminar.
-        grupo_recursos (str): Nombre del grupo de recursos donde se encuentra la VM.
+        nombre_disco = dependencias["maquina_virtual"].storage_profile.os_disk.name
+
+        try:
+            yield compute_client.disks.begin_update(
+                grupo_recursos, nombre_disco, {"tags": etiquetas}
+            )
+        except Exception as e:
+            logger.warning("No se pudo etiquetar el disco %s: %s", nombre_disco, e)
+
+        return None
+
+    # Las operaciones independientes (NSG, subred, IP pública y clave SSH)
+    # se lanzan a la vez; la NIC y la VM esperan solo a lo que necesitan.
+    return {
+        "grupo_seguridad": (obtener_grupo_seguridad, []),
+        "subred": (obtener_subred, []),
+        "ip_publica": (crear_ip_publica, []),
+        "clave_ssh": (obtener_clave_ssh, []),
+        "interfaz_red": (
+            crear_interfaz_red,
+            ["grupo_seguridad", "subred", "ip_publica"],
+        ),
+        "maquina_virtual": (
+            crear_maquina_virtual,
+            ["interfaz_red", "clave_ssh"],
+        ),
+        "disco": (etiquetar_disco, ["maquina_virtual"]),
+    }
+
+
+def resultado_crear_vm(nombre_base, recursos):
     """
-    logger.info("Iniciando la eliminación de la VM: %s", nombre_vm)
-    # Cliente de Compute
-    compute_client = ComputeManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
+    Devuelve la tupla de crear_vm a partir de los recursos creados.
+    """
+
+    public_ip = recursos["ip_publica"]
+    ip_privada = recursos["interfaz_red"].ip_configurations[0].private_ip_address
+
+    logger.info(
+        "✅ VM '%s' creada con IP estática %s e IP privada %s",
+        nombre_base,
+        public_ip.ip_address,
+        ip_privada,
     )
 
-    # Cliente de Red
-    network_client = NetworkManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
+    return (
+        True,
+        nombre_base,
+        public_ip.ip_address,
+        ip_privada,
+        ids_recursos_vm(recursos),
     )
 
-    try:
-        # Obtener la VM (antes de borrarla)
 
-        vm = compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
-        logger.debug("VM obtenida: %s", vm.id)
+def parametros_grupo_seguridad(region, etiquetas, reglas):
+    """
+    Devuelve los parámetros de un grupo de seguridad nuevo con sus reglas.
+    """
 
-        # Nombre del disco del sistema operativo
-        nombre_disco_duro = vm.storage_profile.os_disk.name
-        logger.debug("Disco duro asociado: %s", nombre_disco_duro)
+    # Los modelos de red cargan todo el SDK de red; solo se importan al crear
+    from azure.mgmt.network.models import NetworkSecurityGroup
 
-        nic_id = vm.network_profile.network_interfaces[0].id
-        nic_name = nic_id.split("/")[-1]
-        logger.debug("NIC asociada: %s", nic_name)
+    return NetworkSecurityGroup(location=region, tags=etiquetas, security_rules=reglas)
 
-        # NIC asociada
-        nic = network_client.network_interfaces.get(grupo_recursos, nic_name)
-        ip_config = nic.ip_configurations[0]
-        public_ip_id = (
-            ip_config.public_ip_address.id if ip_config.public_ip_address else None
-        )
-        public_ip_name = public_ip_id.split("/")[-1] if public_ip_id else None
-        logger.debug("IP pública asociada: %s", public_ip_name)
 
-        # Eliminar la VM
-        compute_client.virtual_machines.begin_delete(grupo_recursos, nombre_vm).result()
-        logger.info("VM '%s' eliminada.", nombre_vm)
+def fusionar_reglas_grupo_seguridad(nsg, reglas):
+    """
+    Añade reglas a un grupo de seguridad existente. Las reglas nuevas
+    sustituyen a las existentes con el mismo nombre, para aplicarlas todas en
+    una sola operación.
 
-        # Eliminar NIC
-        network_client.network_interfaces.begin_delete(
-            grupo_recursos, nic_name
-        ).result()
-        logger.info("NIC '%s' eliminada.", nic_name)
+    Returns:
+        list: Las reglas resultantes, ya asignadas al grupo.
+    """
 
-        # Eliminar disco
-        compute_client.disks.begin_delete(grupo_recursos, nombre_disco_duro).result()
-        logger.info("Disco '%s' eliminado.", nombre_disco_duro)
+    nombres = {regla.name for regla in reglas}
+    reglas = [
+        regla for regla in nsg.security_rules or [] if regla.name not in nombres
+    ] + reglas
+    validar_reglas_cortafuegos(reglas)
+    nsg.security_rules = reglas
 
-        # 6. Eliminar la IP pública (si tenía)
+    return reglas
 
-        if public_ip_name:
-            network_client.public_ip_addresses.begin_delete(
-                grupo_recursos, public_ip_name
-            ).result()
-            logger.info("IP pública '%s' eliminada.", public_ip_name)
 
-        if nic.network_security_group:
-            nsg_id = nic.network_security_group.id
-            nsg_name = nsg_id.split("/")[-1]
-            logger.info("La VM '%s' tiene asignado el NSG: %s", nombre_vm, nsg_name)
+def parametros_ip_publica(region, etiquetas):
+    """
+    Devuelve los parámetros de la IP pública estática de una VM.
+    """
 
-            network_client.network_security_groups.begin_delete(
-                grupo_recursos, nsg_name
-            ).result()
-            logger.info("NSG '%s' eliminado.", nsg_name)
-        else:
-            logger.info("La VM '%s' no tiene NSG asignado", nombre_vm)
+    return {
+        "location": region,
+        "sku": {"name": "Standard"},
+        "public_ip_allocation_method": "Static",
+        "tags": etiquetas,
+    }
 
-        return True, nombre_vm
 
-    except Exception as e:
-        logger.error("Error al eliminar la VM '%s': %s", nombre_vm, e)
-        return False, None
+def parametros_interfaz_red(region, etiquetas, dependencias):
+    """
+    Devuelve los parámetros de la NIC de una VM.
 
+    Args:
+        dependencias (dict): Recursos ya creados, con las claves "subred",
+            "ip_publica" y "grupo_seguridad".
+    """
 
-def crear_grupo_seguridad(
-    cliente_azure, nombre_nsg, region, grupo_recursos, reglas_cortafuegos=None
-):
+    from azure.mgmt.network.models import (
+        NetworkInterface,
+        NetworkInterfaceIPConfiguration,
+        PublicIPAddress,
+        Subnet,
+    )
 
-    network_client = NetworkManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
+    return NetworkInterface(
+        location=region,
+        ip_configurations=[
+            NetworkInterfaceIPConfiguration(
+                name="default",
+                subnet=Subnet(id=dependencias["subred"].id),
+                public_ip_address=PublicIPAddress(
+                    id=dependencias["ip_publica"].id, delete_option="Delete"
+                ),
+            )
+        ],
+        network_security_group=dependencias["grupo_seguridad"],
+        tags=etiquetas,
     )
 
-    try:
 
-        nsg_params = NetworkSecurityGroup(location=region)
-        nsg = network_client.network_security_groups.begin_create_or_update(
-            grupo_recursos, nombre_nsg, nsg_params
-        ).result()
+def parametros_maquina_virtual(
+    nombre_base,
+    region,
+    etiquetas,
+    tamanio_instancia,
+    sistema_operativo,
+    username,
+    datos_personalizados,
+    dependencias,
+):
+    """
+    Devuelve los parámetros de una VM.
 
-        logger.info(
-            "Se ha creado el grupo de seguridad: %s",
-            nsg.id,
+    Args:
+        datos_personalizados (str | callable): Como en crear_vm.
+        dependencias (dict): Recursos ya creados, con las claves "clave_ssh" e
+            "interfaz_red".
+    """
+
+    parametros_vm = {
+        "location": region,
+        "tags": etiquetas,
+        "hardware_profile": {"vm_size": tamanio_instancia},
+        "storage_profile": {
+            "image_reference": sistema_operativo,
+            "os_disk": {
+                "name": nombre_base + "disk",
+                "create_option": "FromImage",
+                "disk_size_gb": 32,
+                "managed_disk": {"storage_account_type": "StandardSSD_LRS"},
+                "delete_option": "Delete",
+            },
+        },
+        "os_profile": {
+            "computer_name": nombre_base,
+            "admin_username": username,
+            "linux_configuration": {
+                "disable_password_authentication": True,
+                "ssh": {
+                    "public_keys": [
+                        {
+                            "path": f"/home/{username}/.ssh/authorized_keys",
+                            "key_data": dependencias["clave_ssh"].public_key,
+                        }
+                    ]
+                },
+            },
+        },
+        "network_profile": {
+            "network_interfaces": [
+                {
+                    "id": dependencias["interfaz_red"].id,
+                    "primary": True,
+                    "delete_option": "Delete",
+                }
+            ]
+        },
+    }
+
+    if datos_personalizados is not None:
+        script = datos_personalizados
+        if callable(datos_personalizados):
+            ip_config = dependencias["interfaz_red"].ip_configurations[0]
+            script = datos_personalizados(ip_config.private_ip_address)
+
+        parametros_vm["os_profile"]["custom_data"] = codificar_datos_personalizados(
+            script
         )
 
-        if reglas_cortafuegos is not None and isinstance(reglas_cortafuegos, list):
-            logger.debug("Se han proporcionado reglas de cortafuegos personalizadas.")
+    return parametros_vm
 
-            for regla in reglas_cortafuegos:
-                try:
-
-                    regla_configuraciones_cortafuego = SecurityRule(
-                        protocol=regla["protocolo"],
-                        source_port_range=regla["puerto_origen"],
-                        destination_port_range=regla["puerto_destino"],
-                        source_address_prefix=regla["direccion_origen"],
-                        destination_address_prefix=regla["direccion_destino"],
-                        access=regla["acceso"],
-                        direction=regla["direccion"],
-                        priority=regla["prioridad"],
-                        name=regla["nombre"],
-                    )
 
-                    resultado_regla = (
-                        network_client.security_rules.begin_create_or_update(
-                            grupo_recursos,
-                            nombre_nsg,
-                            regla["nombre"],
-                            regla_configuraciones_cortafuego,
-                        ).result()
-                    )
+def ids_recursos_vm(recursos):
+    """
+    Devuelve los ids de los recursos creados por el grafo de crear_vm, para
+    guardarlos en el estado del clúster.
 
-                    logger.info(
-                        "Se ha creado la regla de cortafuegos: %s",
-                        resultado_regla.id,
-                    )
+    Returns:
+        dict: Diccionario con las claves "vm", "nic", "ip", "disco" y "nsg".
+    """
 
-                except Exception as e:
-                    logger.error("Error al crear la regla de cortafuegos: %s", e)
+    os_disk = recursos["maquina_virtual"].storage_profile.os_disk
 
-        return True
+    return {
+        "vm": recursos["maquina_virtual"].id,
+        "nic": recursos["interfaz_red"].id,
+        "ip": recursos["ip_publica"].id,
+        "disco": os_disk.managed_disk.id if os_disk.managed_disk else None,
+        "nsg": recursos["grupo_seguridad"].id,
+    }
 
-    except Exception as e:
-        logger.error("Error al crear el grupo de seguridad: %s", e)
-        return False
 
-
-def eliminar_vm(cliente_azure, grupo_recursos, nombre_vm):
-    """
-    Elimina una máquina virtual en Azure.
+async def esperar_operacion_async(operacion):
     """
+    Espera una operación de larga duración de un cliente asíncrono de Azure.
 
-    compute_client = ComputeManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
+    Args:
+        operacion (coroutine): Llamada begin_* sin esperar.
 
-    try:
-        # 1. Detener la VM
-        compute_client.virtual_machines.begin_power_off(
-            grupo_recursos, nombre_vm
-        ).result()
-        logger.info("VM '%s' detenida.", nombre_vm)
+    Returns:
+        object: El resultado de la operación.
+    """
 
-        # 2. Eliminar la VM
-        compute_client.virtual_machines.begin_delete(grupo_recursos, nombre_vm).result()
-        logger.info("VM '%s' eliminada.", nombre_vm)
+    poller = await operacion
+    return await poller.result()
 
-        # Eliminar NIC
-        network_client.network_interfaces.begin_delete(
-            grupo_recursos, nic_name
-        ).result()
-        logger.info("NIC '%s' eliminada.", nic_name)
 
-        # Eliminar disco
-        compute_client.disks.begin_delete(grupo_recursos, nombre_disco_duro).result()
-        logger.info("Disco '%s' eliminado.", nombre_disco_duro)
+async def crear_vm_async(
+    cliente_azure,
+    tamanio_instancia,
+    nombre_base,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    sistema_operativo,
+    region="eastus",
+    username="azureuser",
+    grupo_seguridad=None,
+    reglas_cortafuegos=None,
+    grupo_recursos_vnet=None,
+    datos_personalizados=None,
+    id_cluster=None,
+):
+    """
+    Variante asíncrona de crear_vm, sobre ClienteAzureAsync.
 
-        # 6. Eliminar la IP pública (si tenía)
+    Ejecuta el mismo grafo de tareas_crear_vm, pero las operaciones de larga
+    duración se esperan en el bucle de eventos en lugar de ocupar un hilo cada
+    una.
 
-        if public_ip_name:
-            network_client.public_ip_addresses.begin_delete(
-                grupo_recursos, public_ip_name
-            ).result()
-            logger.info("IP pública '%s' eliminada.", public_ip_name)
+    Returns:
+        tuple: (resultado, nombre, ip pública, ip privada, ids), como en
+        crear_vm.
+    """
 
-        if nic.network_security_group:
-            nsg_id = nic.network_security_group.id
-            nsg_name = nsg_id.split("/")[-1]
-            logger.info("La VM '%s' tiene asignado el NSG: %s", nombre_vm, nsg_name)
+    try:
+        tareas = tareas_crear_vm(
+            cliente_azure,
+            esperar_operacion_async,
+            tamanio_instancia=tamanio_instancia,
+            nombre_base=nombre_base,
+            grupo_recursos=grupo_recursos,
+            nombre_red_virtual=nombre_red_virtual,
+            nombre_subred=nombre_subred,
+            nombre_clave_ssh=nombre_clave_ssh,
+            sistema_operativo=sistema_operativo,
+            region=region,
+            username=username,
+            grupo_seguridad=grupo_seguridad,
+            reglas_cortafuegos=reglas_cortafuegos,
+            grupo_recursos_vnet=grupo_recursos_vnet,
+            datos_personalizados=datos_personalizados,
+            id_cluster=id_cluster,
+        )
 
-            network_client.network_security_groups.begin_delete(
-                grupo_recursos, nsg_name
-            ).result()
-            logger.info("NSG '%s' eliminado.", nsg_name)
-        else:
-            logger.info("La VM '%s' no tiene NSG asignado", nombre_vm)
+        recursos = await ejecutar_grafo_async(
+            {
+                nombre: (
+                    lambda dependencias, pasos=pasos: ejecutar_pasos_async(
+                        pasos(dependencias)
+                    ),
+                    dependencias,
+                )
+                for nombre, (pasos, dependencias) in tareas.items()
+            }
+        )
 
-        return True, nombre_vm
+        return resultado_crear_vm(nombre_base, recursos)
 
     except Exception as e:
-        logger.error("Error al eliminar la VM '%s': %s", nombre_vm, e)
-        return False, None
+        logger.error("Error al crear la VM %s: %s", nombre_base, e)
+        return False, None, None, None, None
 
 
 def crear_grupo_seguridad(
-    cliente_azure, nombre_nsg, region, grupo_recursos, reglas_cortafuegos=None
+    cliente_azure,
+    nombre_nsg,
+    region,
+    grupo_recursos,
+    reglas_cortafuegos=None,
+    id_cluster=None,
 ):
+    """
+    Crea un grupo de seguridad con todas sus reglas en una sola operación.
 
-    network_client = NetworkManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
+    Las reglas se validan antes de enviarlas; si alguna no es válida no se
+    crea el grupo.
+
+    Returns:
+        str: El id del grupo de seguridad creado, o None si no se pudo crear.
+    """
+
+    network_client = cliente_azure.obtener_cliente_red()
 
     try:
 
-        nsg_params = NetworkSecurityGroup(location=region)
+        reglas = []
+        if reglas_cortafuegos is not None and isinstance(reglas_cortafuegos, list):
+            logger.debug("Se han proporcionado reglas de cortafuegos personalizadas.")
+            reglas = compilar_reglas_cortafuegos(reglas_cortafuegos)
+
+        nsg_params = parametros_grupo_seguridad(
+            region, etiquetas_cluster(id_cluster), reglas
+        )
         nsg = network_client.network_security_groups.begin_create_or_update(
             grupo_recursos, nombre_nsg, nsg_params
         ).result()
+        cliente_azure.cache.guardar(
+            clave_cache_grupo_seguridad(grupo_recursos, nombre_nsg), nsg
+        )
 
         logger.info(
-            "Se ha creado el grupo de seguridad: %s",
+            "Se ha creado el grupo de seguridad: %s con %s reglas",
             nsg.id,
+            len(reglas),
         )
 
-        if reglas_cortafuegos is not None and isinstance(reglas_cortafuegos, list):
-            logger.debug("Se han proporcionado reglas de cortafuegos personalizadas.")
+        return nsg.id
 
-            for regla in reglas_cortafuegos:
-                try:
-
-                    regla_configuraciones_cortafuego = SecurityRule(
-                        protocol=regla["protocolo"],
-                        source_port_range=regla["puerto_origen"],
-                        destination_port_range=regla["puerto_destino"],
-                        source_address_prefix=regla["direccion_origen"],
-                        destination_address_prefix=regla["direccion_destino"],
-                        access=regla["acceso"],
-                        direction=regla["direccion"],
-                        priority=regla["prioridad"],
-                        name=regla["nombre"],
-                    )
+    except Exception as e:
+        logger.error("Error al crear el grupo de seguridad %s: %s", nombre_nsg, e)
+        return None
 
-                    resultado_regla = (
-                        network_client.security_rules.begin_create_or_update(
-                            grupo_recursos,
-                            nombre_nsg,
-                            regla["nombre"],
-                            regla_configuraciones_cortafuego,
-                        ).result()
-                    )
 
-                    logger.info(
-                        "Se ha creado la regla de cortafuegos: %s",
-                        resultado_regla.id,
-                    )
+def clave_cache_grupo_seguridad(grupo_recursos, nombre_nsg):
+    """
+    Clave de un grupo de seguridad en la caché de consultas del cliente.
+    """
 
-                except Exception as e:
-                    logger.error("Error al crear la regla de cortafuegos: %s", e)
+    return ("nsg", grupo_recursos, nombre_nsg)
 
-        return True
 
-    except Exception as e:
-        logger.error("Error al crear el grupo de seguridad: %s", e)
-        return False
+def compilar_reglas_cortafuegos(reglas_cortafuegos):
+    """
+    Convierte las reglas de cortafuegos en SecurityRule para incluirlas en el
+    grupo de seguridad.
 
+    Args:
+        reglas_cortafuegos (list): Diccionarios con las claves "protocolo",
+            "puerto_origen", "puerto_destino", "direccion_origen",
+            "direccion_destino", "acceso", "direccion", "prioridad" y
+            "nombre".
 
-def eliminar_vm(cliente_azure, grupo_recursos, nombre_vm):
+    Returns:
+        list: Lista de SecurityRule.
     """
-    Elimina una máquina virtual de Azure.
+
+    from azure.mgmt.network.models import SecurityRule
+
+    reglas = []
+
+    for regla in reglas_cortafuegos:
+        claves_faltantes = CLAVES_REGLA_CORTAFUEGOS - regla.keys()
+        if claves_faltantes:
+            raise ValueError(
+                f"A la regla {regla.get('nombre')} le faltan las claves: "
+                f"{sorted(claves_faltantes)}"
+            )
+
+        reglas.append(
+            SecurityRule(
+                protocol=regla["protocolo"],
+                source_port_range=regla["puerto_origen"],
+                destination_port_range=regla["puerto_destino"],
+                source_address_prefix=regla["direccion_origen"],
+                destination_address_prefix=regla["direccion_destino"],
+                access=regla["acceso"],
+                direction=regla["direccion"],
+                priority=regla["prioridad"],
+                name=regla["nombre"],
+            )
+        )
+
+    validar_reglas_cortafuegos(reglas)
+
+    return reglas
+
+
+def validar_reglas_cortafuegos(reglas):
     """
+    Comprueba en local lo que Azure rechazaría: prioridades fuera de rango o
+    repetidas en la misma dirección y nombres repetidos.
 
-    # Cliente de Compute
-    compute_client = ComputeManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
+    Args:
+        reglas (list): Lista de SecurityRule.
+    """
 
-    # Cliente de Red
-    network_client = NetworkManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
+    nombres = set()
+    prioridades = {}
 
-    try:
+    for regla in reglas:
+        if regla.name in nombres:
+            raise ValueError(f"La regla {regla.name} está repetida.")
+        nombres.add(regla.name)
+
+        if not isinstance(regla.priority, int) or not (
+            PRIORIDAD_MINIMA <= regla.priority <= PRIORIDAD_MAXIMA
+        ):
+            raise ValueError(
+                f"La prioridad de la regla {regla.name} debe estar entre "
+                f"{PRIORIDAD_MINIMA} y {PRIORIDAD_MAXIMA}: {regla.priority}"
+            )
+
+        direccion = getattr(regla.direction, "value", regla.direction)
+        clave = (str(direccion).lower(), regla.priority)
+        if clave in prioridades:
+            raise ValueError(
+                f"Las reglas {prioridades[clave]} y {regla.name} tienen la misma "
+                f"prioridad ({regla.priority})."
+            )
+        prioridades[clave] = regla.name
 
-        logger.info("Iniciando la eliminación de la VM: %s", nombre_vm)
 
-        # Obtener la VM (antes de borrarla)
-        vm = compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
-        logger.debug("Se ha obtenido la VM: %s", vm.id)
+def eliminar_vm(cliente_azure, grupo_recursos, nombre_vm):
+    """
+    Elimina una máquina virtual de Azure junto con su NIC, su disco y su IP
+    pública.
 
-        # Nombre del disco del sistema operativo
-        os_disk_name = vm.storage_profile.os_disk.name
-        logger.debug("Disco duro asociado: %s", os_disk_name)
+    Returns:
+        bool: True si no queda ninguno de los recursos de la VM.
+    """
 
-        nic_id = vm.network_profile.network_interfaces[0].id
-        logger.debug("NIC ID: %s", nic_id)
+    # Importación diferida: func.eliminacion importa este módulo
+    from func.eliminacion import eliminar_recursos_cluster
 
-        nic_name = nic_id.split("/")[-1]
-        logger.debug("NIC asociada: %s", nic_name)
+    logger.info("Iniciando la eliminación de la VM: %s", nombre_vm)
 
-        # NIC asociada
-        nic = network_client.network_interfaces.get(grupo_recursos, nic_name)
-        ip_config = nic.ip_configurations[0]
-        public_ip_id = (
-            ip_config.public_ip_address.id if ip_config.public_ip_address else None
+    try:
+        pendientes = eliminar_recursos_cluster(
+            cliente_azure, grupo_recursos, [nombre_vm], []
         )
-        public_ip_name = public_ip_id.split("/")[-1] if public_ip_id else None
+    except Exception as e:
+        logger.error("Error al eliminar la VM %s: %s", nombre_vm, e)
+        return False
 
-        # Eliminar la VM
-        compute_client.virtual_machines.begin_delete(grupo_recursos, nombre_vm).result()
-        logger.info("VM %s eliminada.", nombre_vm)
+    return not pendientes
 
-        # Eliminar NIC
-        network_client.network_interfaces.begin_delete(
-            grupo_recursos, nic_name
-        ).result()
-        logger.info("NIC %s eliminada.", nic_name)
 
-        # Eliminar disco
-        compute_client.disks.begin_delete(grupo_recursos, os_disk_name).result()
-        logger.info("Disco %s eliminado.", os_disk_name)
+async def eliminar_vm_async(cliente_azure, grupo_recursos, nombre_vm):
+    """
+    Variante asíncrona de eliminar_vm, sobre ClienteAzureAsync.
 
-        # 6. Eliminar la IP pública (si tenía)
+    Returns:
+        bool: True si no queda ninguno de los recursos de la VM.
+    """
 
-        if public_ip_name:
-            network_client.public_ip_addresses.begin_delete(
-                grupo_recursos, public_ip_name
-            ).result()
-            logger.info("IP pública %s eliminada.", public_ip_name)
+    # Importación diferida: func.eliminacion importa este módulo
+    from func.eliminacion import eliminar_recursos_vm_async
 
-        return True
+    logger.info("Iniciando la eliminación de la VM: %s", nombre_vm)
 
+    try:
+        pendientes = await eliminar_recursos_vm_async(
+            cliente_azure, grupo_recursos, nombre_vm
+        )
     except Exception as e:
         logger.error("Error al eliminar la VM %s: %s", nombre_vm, e)
         return False
 
+    return not pendientes
 
-def eliminar_grupo_seguridad(cliente_azure, grupo_recursos, nombre_nsg):
 
-    network_client = NetworkManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
+def redimensionar_vm(cliente_azure, grupo_recursos, nombre_vm, tamanio_instancia):
+    """
+    Cambia el tamaño de una máquina virtual. Azure reinicia la VM.
+
+    Returns:
+        bool: True si se cambió el tamaño.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+
     try:
-        network_client.network_security_groups.begin_delete(
-            grupo_recursos, nombre_nsg
+        logger.info(
+            "Cambiando el tamaño de la VM %s a %s", nombre_vm, tamanio_instancia
+        )
+        compute_client.virtual_machines.begin_update(
+            grupo_recursos,
+            nombre_vm,
+            {"hardware_profile": {"vm_size": tamanio_instancia}},
         ).result()
-        logger.info("NSG '%s' eliminado.", nombre_nsg)
+        logger.info("VM %s redimensionada a %s.", nombre_vm, tamanio_instancia)
+        return True
 
     except Exception as e:
-        logger.error("Error al eliminar el NSG '%s': %s", nombre_nsg, e)
+        logger.error("Error al redimensionar la VM %s: %s", nombre_vm, e)
         return False
 
 
@@ -600,98 +861,298 @@ def instalar_dependencias_vm(
     grupo_recursos,
     zona_dns,
     patron_dns,
+    registro=None,
+    fase=None,
+    ip_privada_vm=None,
 ):
     """
     Inicializa la máquina virtual.
+
+    Los scripts se ejecutan en el orden de listar_scripts y la instalación se
+    detiene en el primero que falle.
+
+    Args:
+        registro (logging.Logger): Logger donde se escribe la salida del nodo.
+        fase (str): "instalacion", "configuracion" o None para ejecutar todos
+            los scripts.
+        ip_privada_vm (str): IP privada del nodo, normalmente la guardada en
+            el estado del clúster. Si no se indica, se consulta a Azure.
+
+    Returns:
+        bool: True si todos los scripts terminaron correctamente.
     """
 
-    logger.info("Iniciando la instalación de dependencias en la VM: %s", nombre_host)
+    if registro is None:
+        registro = logger
 
-    _, ip_privada_vm = obtener_ip_privada_vm(cliente_azure, grupo_recursos, nombre_nodo)
+    registro.info("Iniciando la instalación de dependencias en la VM: %s", nombre_host)
 
-    logger.info("IP privada de la VM %s: %s", nombre_nodo, ip_privada_vm)
+    if ip_privada_vm is None:
+        _, ip_privada_vm = obtener_ip_privada_vm(
+            cliente_azure, grupo_recursos, nombre_nodo
+        )
+
+    registro.info("IP privada de la VM %s: %s", nombre_nodo, ip_privada_vm)
+
+    def renderizar(_, script_content):
+        return renderizar_script(
+            script_content,
+            usuario=usuario,
+            tipo_nodo=tipo_nodo,
+            nombre_nodo=nombre_nodo,
+            ip_privada_vm=ip_privada_vm,
+            zona_dns=zona_dns,
+            patron_dns=patron_dns,
+        )
+
+    # Subimos la carpeta de scripts en una sesión SFTP, renderizando cada
+    # script por el camino, y los ejecutamos en orden
+    return ejecutar_directorio_scripts(
+        nombre_host=nombre_host,
+        clave_publica=clave_publica,
+        usuario=usuario,
+        ruta_scripts=ruta_scripts,
+        nombres=listar_scripts(ruta_scripts, fase),
+        transformar=renderizar,
+        registro=registro,
+    )
 
-    # leemos todos los archivos de la carpeta de scripts
-    scripts = [f for f in os.listdir(ruta_scripts) if f.endswith(".sh")]
 
-    for script in scripts:
+async def instalar_dependencias_vm_async(
+    cliente_azure,
+    nombre_host,
+    clave_publica,
+    usuario,
+    ruta_scripts,
+    nombre_nodo,
+    tipo_nodo,
+    grupo_recursos,
+    zona_dns,
+    patron_dns,
+    registro=None,
+    fase=None,
+    ip_privada_vm=None,
+):
+    """
+    Variante asíncrona de instalar_dependencias_vm, sobre ClienteAzureAsync.
+
+    Returns:
+        bool: True si todos los scripts terminaron correctamente.
+    """
+
+    if registro is None:
+        registro = logger
+
+    registro.info("Iniciando la instalación de dependencias en la VM: %s", nombre_host)
+
+    if ip_privada_vm is None:
+        _, ip_privada_vm = await obtener_ip_privada_vm_async(
+            cliente_azure, grupo_recursos, nombre_nodo
+        )
+
+    registro.info("IP privada de la VM %s: %s", nombre_nodo, ip_privada_vm)
+
+    # La lectura de los scripts es local y rápida; no merece un hilo
+    scripts_renderizados = preparar_scripts_nodo(
+        ruta_scripts,
+        usuario=usuario,
+        tipo_nodo=tipo_nodo,
+        nombre_nodo=nombre_nodo,
+        ip_privada_vm=ip_privada_vm,
+        zona_dns=zona_dns,
+        patron_dns=patron_dns,
+        fase=fase,
+        registro=registro,
+    )
+
+    return await ejecutar_scripts_remotos_async(
+        nombre_host=nombre_host,
+        clave_publica=clave_publica,
+        usuario=usuario,
+        scripts=scripts_renderizados,
+        registro=registro,
+    )
+
+
+def preparar_scripts_nodo(
+    ruta_scripts,
+    usuario,
+    tipo_nodo,
+    nombre_nodo,
+    ip_privada_vm,
+    zona_dns,
+    patron_dns,
+    fase=None,
+    registro=None,
+):
+    """
+    Lee y renderiza los scripts de instalación de un nodo, en el orden de
+    listar_scripts.
+
+    Returns:
+        list: Tuplas (contenido, ruta_script_remota).
+    """
+
+    if registro is None:
+        registro = logger
+
+    scripts_renderizados = []
+
+    for script in listar_scripts(ruta_scripts, fase):
 
         ruta_script_local = Path(ruta_scripts) / script
 
         if ruta_script_local.exists():
 
-            logger.info("Se ha encontrado el script '%s'.", ruta_script_local)
+            registro.info("Se ha encontrado el script '%s'.", ruta_script_local)
             with ruta_script_local.open("r", encoding="utf-8") as f:
                 script_content = f.read()
 
-            script_content = script_content.replace("{{{USUARIO}}}", usuario)
-            if tipo_nodo == "Master":
-                script_content = script_content.replace(
-                    "{{{LINEA_CONFIG_1}}}", "export SPARK_DRIVER_BIND_ADDRESS=0.0.0.0"
-                )
-                script_content = script_content.replace(
-                    "{{{LINEA_CONFIG_2}}}", f"export SPARK_DRIVER_HOST={ip_privada_vm}"
-                )
-                script_content = script_content.replace(
-                    "{{{LINEA_CONFIG_3}}}",
-                    f"SPARK_PUBLIC_DNS={patron_dns}.driver.{zona_dns}",
-                )
-            elif tipo_nodo == "Worker":
+            script_content = renderizar_script(
+                script_content,
+                usuario=usuario,
+                tipo_nodo=tipo_nodo,
+                nombre_nodo=nombre_nodo,
+                ip_privada_vm=ip_privada_vm,
+                zona_dns=zona_dns,
+                patron_dns=patron_dns,
+            )
 
-                numero_nodo = nombre_nodo.split("-")[-1]
+            scripts_renderizados.append((script_content, f"~/{script}"))
 
-                script_content = script_content.replace(
-                    "{{{LINEA_CONFIG_1}}}", f"export SPARK_LOCAL_IP={ip_privada_vm}"
-                )
-                script_content = script_content.replace(
-                    "{{{LINEA_CONFIG_2}}}",
-                    f"export SPARK_PUBLIC_DNS={patron_dns}.worker.{numero_nodo}.{zona_dns}",
-                )
-                script_content = script_content.replace(
-                    "{{{LINEA_CONFIG_3}}}",
-                    "",
-                )
-            else:
-                raise ValueError("Tipo de nodo desconocido.")
+    return scripts_renderizados
 
-            # Ejecutamos el script de instalación de Hadoop
-            ejecutar_script_remoto(
-                nombre_host=nombre_host,
-                clave_publica=clave_publica,
-                usuario=usuario,
-                script_content=script_content,
-                ruta_script_remota=f"~/{script}",
-            )
+
+def etiquetas_cluster(id_cluster):
+    """
+    Devuelve las etiquetas de Azure de los recursos de un clúster.
+    """
+
+    if id_cluster is None:
+        return {}
+
+    return {ETIQUETA_CLUSTER: id_cluster}
+
+
+def codificar_datos_personalizados(script):
+    """
+    Codifica en base64 el script de cloud-init, como lo espera Azure.
+
+    Raises:
+        ValueError: Si supera el tamaño máximo que admite Azure.
+    """
+
+    codificado = base64.b64encode(script.encode("utf-8")).decode("ascii")
+
+    if len(codificado) > TAMANIO_MAXIMO_DATOS_PERSONALIZADOS:
+        raise ValueError(
+            f"Los datos personalizados ocupan {len(codificado)} bytes en base64 "
+            f"(máximo {TAMANIO_MAXIMO_DATOS_PERSONALIZADOS})"
+        )
+
+    return codificado
+
+
+def listar_scripts(ruta_scripts, fase=None):
+    """
+    Lista los scripts de la carpeta de scripts en el orden en que se ejecutan.
+
+    Los scripts configuracion_*.sh contienen solo la configuración propia de
+    cada nodo y se ejecutan después de los de instalación. Los nodos creados
+    desde una imagen dorada ejecutan solo estos.
+
+    Args:
+        fase (str): "instalacion" para omitir los scripts de configuración,
+            "configuracion" para ejecutar solo estos o None para todos.
+
+    Returns:
+        list: Nombres de los scripts.
+    """
+
+    if fase not in (None, "instalacion", "configuracion"):
+        raise ValueError(f"Fase de instalación desconocida: {fase}")
+
+    # leemos todos los archivos de la carpeta de scripts
+    scripts = sorted(
+        (f for f in os.listdir(ruta_scripts) if f.endswith(".sh")),
+        key=lambda f: (f.startswith(PREFIJO_SCRIPTS_CONFIGURACION), f),
+    )
+
+    if fase == "instalacion":
+        return [f for f in scripts if not f.startswith(PREFIJO_SCRIPTS_CONFIGURACION)]
+
+    if fase == "configuracion":
+        return [f for f in scripts if f.startswith(PREFIJO_SCRIPTS_CONFIGURACION)]
+
+    return scripts
+
+
+def renderizar_script(
+    script_content, usuario, tipo_nodo, nombre_nodo, ip_privada_vm, zona_dns, patron_dns
+):
+    """
+    Sustituye las variables de plantilla de un script de instalación según el
+    tipo de nodo.
+    """
+
+    script_content = script_content.replace("{{{USUARIO}}}", usuario)
+    if tipo_nodo == "Master":
+        script_content = script_content.replace(
+            "{{{LINEA_CONFIG_1}}}", "export SPARK_DRIVER_BIND_ADDRESS=0.0.0.0"
+        )
+        script_content = script_content.replace(
+            "{{{LINEA_CONFIG_2}}}", f"export SPARK_DRIVER_HOST={ip_privada_vm}"
+        )
+        script_content = script_content.replace(
+            "{{{LINEA_CONFIG_3}}}",
+            f"SPARK_PUBLIC_DNS={patron_dns}.driver.{zona_dns}",
+        )
+    elif tipo_nodo == "Worker":
+
+        numero_nodo = nombre_nodo.split("-")[-1]
+
+        script_content = script_content.replace(
+            "{{{LINEA_CONFIG_1}}}", f"export SPARK_LOCAL_IP={ip_privada_vm}"
+        )
+        script_content = script_content.replace(
+            "{{{LINEA_CONFIG_2}}}",
+            f"export SPARK_PUBLIC_DNS={patron_dns}.worker.{numero_nodo}.{zona_dns}",
+        )
+        script_content = script_content.replace(
+            "{{{LINEA_CONFIG_3}}}",
+            "",
+        )
+    else:
+        raise ValueError("Tipo de nodo desconocido.")
+
+    return script_content
 
 
 def iniciar_master(nombre_host, usuario, clave_publica, port=22):
     """
-    Se conecta al servidor remoto, copia un script y lo ejecuta.
+    Inicia el proceso master de Spark en el nodo remoto.
+
+    Returns:
+        bool: True si el comando terminó correctamente.
     """
-    ssh_client = None
-    sftp_client = None
 
     try:
 
         # --- 1. Conexión SSH ---
         logger.info("Intentando conectar al servidor: %s", nombre_host)
 
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        ssh_client.connect(
-            hostname=nombre_host,
-            port=port,
-            username=usuario,
-            key_filename=clave_publica + ".pem",
-        )
+        ssh_client = pool_ssh.obtener(nombre_host, usuario, clave_publica, port)
 
         logger.info("Conexión establecida con éxito.")
 
-        _, stdout, stderr = ssh_client.exec_command("/opt/spark/sbin/start-master.sh")
+        resultado = ejecutar_comando(ssh_client, comando_iniciar_master(), nombre_host)
 
-        logger.info("Nodo maestro iniciado.")
-        logger.info("Salida del comando: %s", stdout.read().decode())
+        if resultado["resultado"]:
+            logger.info("Nodo maestro iniciado.")
+        else:
+            logger.error("No se pudo iniciar el nodo maestro en %s", nombre_host)
+
+        return resultado["resultado"]
 
     except paramiko.AuthenticationException:
         logger.error(
@@ -699,48 +1160,56 @@ def iniciar_master(nombre_host, usuario, clave_publica, port=22):
         )
     except paramiko.SSHException as e:
         logger.error("Error en la conexión SSH: %s", e)
+        pool_ssh.descartar(nombre_host, usuario, clave_publica, port)
     except Exception as e:
         logger.error("Ocurrió un error inesperado: %s", e)
-        exit(1)
-    finally:
-        if sftp_client:
-            sftp_client.close()
-        if ssh_client:
-            ssh_client.close()
-            print("Conexión SSH cerrada.")
+
+    return False
+
+
+def comando_iniciar_master():
+    """
+    Devuelve el comando que inicia el master de Spark.
+    """
+
+    return "/opt/spark/sbin/start-master.sh"
+
+
+def comando_iniciar_worker(nombre_host_master):
+    """
+    Devuelve el comando que inicia un worker de Spark apuntando al master.
+    """
+
+    return "/opt/spark/sbin/start-worker.sh spark://" + nombre_host_master + ":7077"
 
 
 def iniciar_worker(nombre_host, usuario, nombre_host_master, clave_publica, port=22):
     """
-    Se conecta al servidor remoto, copia un script y lo ejecuta.
+    Inicia el proceso worker de Spark en el nodo remoto apuntando al master.
+
+    Returns:
+        bool: True si el comando terminó correctamente.
     """
-    ssh_client = None
-    sftp_client = None
 
     try:
 
         # --- 1. Conexión SSH ---
         logger.info("Intentando conectar al servidor: %s", nombre_host)
 
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        ssh_client.connect(
-            hostname=nombre_host,
-            port=port,
-            username=usuario,
-            key_filename=clave_publica + ".pem",
-        )
+        ssh_client = pool_ssh.obtener(nombre_host, usuario, clave_publica, port)
 
         logger.info("Conexión establecida con éxito.")
 
-        _, stdout, stderr = ssh_client.exec_command(
-            "/opt/spark/sbin/start-worker.sh spark://" + nombre_host_master + ":7077"
+        resultado = ejecutar_comando(
+            ssh_client, comando_iniciar_worker(nombre_host_master), nombre_host
         )
 
-        logger.info("Nodo trabajador iniciado.")
-        logger.info("Salida del comando: %s", stdout.read().decode())
-        logger.error("Error del comando: %s", stderr.read().decode())
+        if resultado["resultado"]:
+            logger.info("Nodo trabajador iniciado.")
+        else:
+            logger.error("No se pudo iniciar el nodo trabajador en %s", nombre_host)
+
+        return resultado["resultado"]
 
     except paramiko.AuthenticationException:
         logger.error(
@@ -748,15 +1217,11 @@ def iniciar_worker(nombre_host, usuario, nombre_host_master, clave_publica, port
         )
     except paramiko.SSHException as e:
         logger.error("Error en la conexión SSH: %s", e)
+        pool_ssh.descartar(nombre_host, usuario, clave_publica, port)
     except Exception as e:
         logger.error("Ocurrió un error inesperado: %s", e)
-        exit(1)
-    finally:
-        if sftp_client:
-            sftp_client.close()
-        if ssh_client:
-            ssh_client.close()
-            logger.info("Conexión SSH cerrada.")
+
+    return False
 
 
 def obtener_ip_privada_vm(cliente_azure, grupo_recursos, nombre_vm):
@@ -764,12 +1229,8 @@ def obtener_ip_privada_vm(cliente_azure, grupo_recursos, nombre_vm):
     Obtiene la ip privada de la vm
     """
 
-    compute_client = ComputeManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
-    network_client = NetworkManagementClient(
-        cliente_azure.credencial, cliente_azure.id_suscripcion
-    )
+    compute_client = cliente_azure.obtener_cliente_compute()
+    network_client = cliente_azure.obtener_cliente_red()
 
     vm = compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
     logger.info("Buscando IP privada para la VM: %s", vm.name)
@@ -801,6 +1262,103 @@ def obtener_ip_privada_vm(cliente_azure, grupo_recursos, nombre_vm):
         return False, None
 
 
+async def obtener_ip_privada_vm_async(cliente_azure, grupo_recursos, nombre_vm):
+    """
+    Variante asíncrona de obtener_ip_privada_vm, sobre ClienteAzureAsync.
+
+    Returns:
+        tuple: (encontrada, ip privada).
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+    network_client = cliente_azure.obtener_cliente_red()
+
+    vm = await compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
+    logger.info("Buscando IP privada para la VM: %s", vm.name)
+
+    for nic_reference in vm.network_profile.network_interfaces:
+        nic_id = nic_reference.id
+        nic = await network_client.network_interfaces.get(
+            nic_id.split("/")[4], nic_id.split("/")[-1]
+        )
+
+        for ip_config in nic.ip_configurations:
+            if ip_config.private_ip_address:
+                return True, ip_config.private_ip_address
+
+    logger.warning("No se encontró una dirección IP privada para la VM %s", nombre_vm)
+    return False, None
+
+
+def inventario_ips(cliente_azure, grupo_recursos):
+    """
+    Obtiene las IPs privadas y públicas de todas las VMs del grupo de recursos
+    con dos listados en bloque (NICs e IPs públicas), en lugar de dos
+    consultas por VM.
+
+    Returns:
+        dict: Diccionario {nombre_vm: {"ip_privada", "ip_publica", "ids"}},
+        donde "ids" tiene los ids de la NIC ("nic"), la IP pública ("ip") y el
+        grupo de seguridad ("nsg") de la VM.
+    """
+
+    network_client = cliente_azure.obtener_cliente_red()
+
+    listados = ejecutar_concurrente(
+        {
+            "nic": (
+                lambda: list(network_client.network_interfaces.list(grupo_recursos)),
+                {},
+            ),
+            "ip": (
+                lambda: {
+                    ip.id.lower(): ip.ip_address
+                    for ip in network_client.public_ip_addresses.list(grupo_recursos)
+                },
+                {},
+            ),
+        }
+    )
+
+    for resultado in listados.values():
+        if not resultado["resultado"]:
+            raise resultado["error"]
+
+    ips_publicas = listados["ip"]["valor"]
+    inventario = {}
+
+    for nic in listados["nic"]["valor"]:
+        if nic.virtual_machine is None or not nic.ip_configurations:
+            continue
+
+        ip_config = nic.ip_configurations[0]
+        ip_publica = None
+        if ip_config.public_ip_address:
+            ip_publica = ips_publicas.get(ip_config.public_ip_address.id.lower())
+
+        inventario[nic.virtual_machine.id.split("/")[-1]] = {
+            "ip_privada": ip_config.private_ip_address,
+            "ip_publica": ip_publica,
+            "ids": {
+                "nic": nic.id,
+                "ip": (
+                    ip_config.public_ip_address.id
+                    if ip_config.public_ip_address
+                    else None
+                ),
+                "nsg": (
+                    nic.network_security_group.id
+                    if nic.network_security_group
+                    else None
+                ),
+            },
+        }
+
+    logger.debug("Inventario de IPs de %s VMs obtenido", len(inventario))
+
+    return inventario
+
+
 def copiar_clave_privada_devops(
     nombre_vm, clave_publica, ip_nodo, usuario, contenido_clave_devops
 ):
@@ -808,38 +1366,25 @@ def copiar_clave_privada_devops(
     Copia la clave privada de DevOps a la VM especificada.
     """
 
-    ssh_client = None
-    sftp_client = None
-
     try:
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh_client.connect(
-            hostname=ip_nodo,
-            username=usuario,
-            key_filename=clave_publica + ".pem",
-        )
-
-        command = f"""
-    cat <<'SCRIPT_END' | tee /home/{usuario}/.ssh/id_rsa > /dev/null
-{contenido_clave_devops}
-SCRIPT_END
-"""
-        logger.info("Creando el script en el servidor...")
-        _, stdout, _ = ssh_client.exec_command(command)
+        ssh_client = pool_ssh.obtener(ip_nodo, usuario, clave_publica)
+
+        logger.info("Copiando la clave privada de DevOps al servidor...")
+        subir_archivo(
+            ssh_client,
+            contenido_clave_devops,
+            f"/home/{usuario}/.ssh/id_rsa",
+            modo=0o400,
+            nombre_nodo=nombre_vm,
+        )
 
         logger.info("Clave privada de DevOps copiada a la VM %s", nombre_vm)
 
-        ssh_client.exec_command(f"sudo chmod 400 /home/{usuario}/.ssh/id_rsa")
-
-        ssh_client.exec_command(f"mkdir -p /home/{usuario}/Proyectos")
+        _, stdout, _ = ssh_client.exec_command(f"mkdir -p /home/{usuario}/Proyectos")
+        stdout.channel.recv_exit_status()
 
     except paramiko.AuthenticationException:
         logger.error("Error de autenticación al conectar a la VM %s", nombre_vm)
     except paramiko.SSHException as e:
         logger.error("Error en la conexión SSH: %s", e)
-    finally:
-        if sftp_client:
-            sftp_client.close()
-        if ssh_client:
-            ssh_client.close()
+        pool_ssh.descartar(ip_nodo, usuario, clave_publica)
@@ -0,0 +1,200 @@
+import logging
+import time
+
+from azure.core.exceptions import ResourceNotFoundError
+
+from config.configuraciones import TIEMPO_MAXIMO_DISPONIBILIDAD
+from func.conexiones_ssh import pool_ssh
+from func.disponibilidad import esperar_nodo_listo
+from func.ejecucion_remota import ejecutar_comando
+from func.eliminacion import eliminar_recursos_cluster
+from func.funciones_vm import crear_vm, instalar_dependencias_vm
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+def obtener_imagen_dorada(cliente_azure, grupo_recursos, nombre_imagen):
+    """
+    Busca la imagen dorada en el grupo de recursos.
+
+    Returns:
+        dict: Referencia de imagen para crear_vm ({"id": ...}) o None si la
+        imagen no existe.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+
+    try:
+        imagen = compute_client.images.get(grupo_recursos, nombre_imagen)
+    except ResourceNotFoundError:
+        return None
+
+    return {"id": imagen.id}
+
+
+def crear_imagen_dorada(
+    cliente_azure,
+    nombre_imagen,
+    tamanio_instancia,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    region,
+    username,
+    ip_publica,
+    ruta_scripts,
+    sistema_operativo,
+    grupo_recursos_vnet=None,
+    reconstruir=False,
+    tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD,
+):
+    """
+    Crea una imagen de Azure con Hadoop, Spark y sus dependencias instaladas.
+
+    Se crea una VM temporal, se ejecutan en ella los scripts de instalación
+    (no los de configuración, que dependen de cada nodo), se generaliza y se
+    captura como imagen. La VM temporal se elimina al terminar.
+
+    Si la imagen ya existe no se vuelve a crear, salvo que reconstruir sea
+    True.
+
+    Los nodos creados desde la imagen deben usar el mismo usuario, porque las
+    variables de entorno quedan en su .bashrc.
+
+    Returns:
+        dict: Referencia de imagen para crear_vm ({"id": ...}) o None si no se
+        pudo crear.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+
+    referencia = obtener_imagen_dorada(cliente_azure, grupo_recursos, nombre_imagen)
+
+    if referencia is not None and not reconstruir:
+        logger.info("La imagen %s ya existe: %s", nombre_imagen, referencia["id"])
+        return referencia
+
+    nombre_vm = f"{nombre_imagen}-base"
+
+    reglas_cortafuegos = [
+        {
+            "protocolo": "Tcp",
+            "puerto_origen": "*",
+            "puerto_destino": "22",
+            "direccion_origen": str(ip_publica),
+            "direccion_destino": "*",
+            "acceso": "Allow",
+            "direccion": "Inbound",
+            "prioridad": 200,
+            "nombre": "PermitirSSH",
+        }
+    ]
+
+    logger.info("Creando la VM base para la imagen: %s", nombre_vm)
+
+    inicio = time.monotonic()
+
+    try:
+        resultado, _, ip, ip_privada, _ = crear_vm(
+            cliente_azure=cliente_azure,
+            tamanio_instancia=tamanio_instancia,
+            nombre_base=nombre_vm,
+            grupo_recursos=grupo_recursos,
+            nombre_red_virtual=nombre_red_virtual,
+            nombre_subred=nombre_subred,
+            nombre_clave_ssh=nombre_clave_ssh,
+            sistema_operativo=sistema_operativo,
+            region=region,
+            username=username,
+            reglas_cortafuegos=reglas_cortafuegos,
+            grupo_recursos_vnet=grupo_recursos_vnet,
+        )
+        if not resultado:
+            raise RuntimeError(f"No se pudo crear la VM {nombre_vm}")
+
+        nodo = {"nombre": nombre_vm, "ip": ip, "usuario": username}
+
+        if not esperar_nodo_listo(
+            cliente_azure,
+            grupo_recursos,
+            nodo,
+            nombre_clave_ssh,
+            time.monotonic() + tiempo_maximo,
+        ):
+            raise RuntimeError(f"La VM {nombre_vm} no está disponible")
+
+        # El tipo de nodo solo afecta a los scripts de configuración, que no
+        # se ejecutan aquí
+        if not instalar_dependencias_vm(
+            cliente_azure,
+            ip,
+            nombre_clave_ssh,
+            username,
+            ruta_scripts=ruta_scripts,
+            nombre_nodo=nombre_vm,
+            tipo_nodo="Master",
+            grupo_recursos=grupo_recursos,
+            zona_dns=None,
+            patron_dns=None,
+            fase="instalacion",
+            ip_privada_vm=ip_privada,
+        ):
+            raise RuntimeError(f"La instalación falló en {nombre_vm}")
+
+        # Se conserva el usuario (-deprovision sin +user) para mantener su
+        # .bashrc con las variables de Hadoop y Spark
+        logger.info("Generalizando la VM %s", nombre_vm)
+        ssh_client = pool_ssh.obtener(ip, username, nombre_clave_ssh)
+        resultado_comando = ejecutar_comando(
+            ssh_client,
+            "sudo rm -f /tmp/*.tar.gz /tmp/*.tgz /tmp/*.sha256 && "
+            "sudo waagent -deprovision -force",
+            nombre_vm,
+        )
+        pool_ssh.descartar(ip, username, nombre_clave_ssh)
+
+        if not resultado_comando["resultado"]:
+            raise RuntimeError(f"No se pudo desaprovisionar la VM {nombre_vm}")
+
+        compute_client.virtual_machines.begin_deallocate(
+            grupo_recursos, nombre_vm
+        ).result()
+        compute_client.virtual_machines.generalize(grupo_recursos, nombre_vm)
+
+        vm = compute_client.virtual_machines.get(grupo_recursos, nombre_vm)
+        vista = compute_client.virtual_machines.instance_view(grupo_recursos, nombre_vm)
+
+        logger.info("Capturando la imagen %s", nombre_imagen)
+        imagen = compute_client.images.begin_create_or_update(
+            grupo_recursos,
+            nombre_imagen,
+            {
+                "location": region,
+                "source_virtual_machine": {"id": vm.id},
+                "hyper_v_generation": vista.hyper_v_generation or "V2",
+            },
+        ).result()
+
+        logger.info(
+            "✅ Imagen %s creada en %.1f s: %s",
+            nombre_imagen,
+            time.monotonic() - inicio,
+            imagen.id,
+        )
+
+        return {"id": imagen.id}
+
+    except Exception as e:
+        logger.error("Error al crear la imagen %s: %s", nombre_imagen, e)
+        return None
+
+    finally:
+        logger.info("Eliminando la VM base %s", nombre_vm)
+        try:
+            eliminar_recursos_cluster(
+                cliente_azure, grupo_recursos, [nombre_vm], [f"{nombre_vm}-nsg"]
+            )
+        except Exception as e:
+            logger.error("Error al eliminar la VM base %s: %s", nombre_vm, e)
@@ -1,75 +1,350 @@
 import paramiko
-import os
 import logging
-from traceback import format_exc
+
+from func.conexiones_ssh import (
+    asyncssh_disponible,
+    ejecutar_sin_asyncssh,
+    pool_ssh,
+    pool_ssh_async,
+)
+from func.ejecucion_remota import ejecutar_comando, ejecutar_comando_async
+from func.transferencias import subir_archivos, subir_archivos_async, subir_directorio
 
 # Obtiene el logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Directorio remoto al que se sube la carpeta de scripts
+DIRECTORIO_SCRIPTS_REMOTO = "~/scripts"
 
-def ejecutar_script_remoto(
-    nombre_host, clave_publica, usuario, script_content, ruta_script_remota, port=22
+
+def ejecutar_comando_remoto(
+    nombre_host, clave_publica, usuario, comando, port=22, registro=None
 ):
     """
-    Se conecta al servidor remoto, copia un script y lo ejecuta.
+    Ejecuta un comando en el servidor remoto y muestra su salida.
+
+    Args:
+        registro (logging.Logger): Logger donde se escribe la salida del comando.
+            Por defecto, el logger de este módulo.
+
+    Returns:
+        bool: True si el comando terminó con código de salida 0.
     """
-    ssh_client = None
-    sftp_client = None
+    if registro is None:
+        registro = logger
 
     try:
+        ssh_client = pool_ssh.obtener(nombre_host, usuario, clave_publica, port)
 
-        # --- 1. Conexión SSH ---
-        logger.info("Intentando conectar al servidor...")
+        registro.info("Ejecutando '%s' en el servidor...", comando)
+        resultado = ejecutar_comando(ssh_client, comando, nombre_host, registro)
 
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if not resultado["resultado"]:
+            registro.error(
+                "'%s' terminó con código %s", comando, resultado["codigo_salida"]
+            )
+            return False
 
-        ssh_client.connect(
-            hostname=nombre_host,
-            port=port,
-            username=usuario,
-            key_filename=clave_publica + ".pem",
+        registro.info("Ejecución completada en %.1f s.", resultado["duracion"])
+        return True
+
+    except paramiko.AuthenticationException:
+        registro.error(
+            "Error de autenticación. Verifica el usuario, la contraseña o la clave SSH."
+        )
+    except paramiko.SSHException as e:
+        registro.error("Error en la conexión SSH: %s", e)
+        pool_ssh.descartar(nombre_host, usuario, clave_publica, port)
+    except Exception as e:
+        registro.error("Ocurrió un error inesperado: %s", e)
+
+    return False
+
+
+def ejecutar_scripts_remotos(
+    nombre_host, clave_publica, usuario, scripts, port=22, registro=None
+):
+    """
+    Sube varios scripts por SFTP en una sola sesión y los ejecuta en orden.
+    La ejecución se detiene en el primer script que falle.
+
+    Args:
+        scripts (list): Tuplas (contenido, ruta_script_remota).
+        registro (logging.Logger): Logger donde se escribe la salida.
+
+    Returns:
+        bool: True si todos los scripts terminaron con código de salida 0.
+    """
+
+    def subir(ssh_client, registro):
+        registro.info("Subiendo %s scripts al servidor...", len(scripts))
+        subir_archivos(
+            ssh_client,
+            [(contenido, ruta, 0o755) for contenido, ruta in scripts],
+            nombre_nodo=nombre_host,
+            registro=registro,
+        )
+        return [ruta for _, ruta in scripts]
+
+    return _subir_y_ejecutar_scripts(
+        nombre_host, clave_publica, usuario, subir, port, registro
+    )
+
+
+def ejecutar_directorio_scripts(
+    nombre_host,
+    clave_publica,
+    usuario,
+    ruta_scripts,
+    nombres=None,
+    transformar=None,
+    port=22,
+    registro=None,
+):
+    """
+    Sube la carpeta de scripts a DIRECTORIO_SCRIPTS_REMOTO en una sola sesión
+    SFTP y ejecuta en orden los scripts indicados. La ejecución se detiene en
+    el primer script que falle.
+
+    Args:
+        nombres (list): Scripts que se suben y ejecutan, en orden. Por
+            defecto, todos los de la carpeta.
+        transformar (callable): Como en subir_directorio.
+        registro (logging.Logger): Logger donde se escribe la salida.
+
+    Returns:
+        bool: True si todos los scripts terminaron con código de salida 0.
+    """
+
+    def subir(ssh_client, registro):
+        registro.info(
+            "Subiendo la carpeta '%s' a '%s'...",
+            ruta_scripts,
+            DIRECTORIO_SCRIPTS_REMOTO,
+        )
+        return subir_directorio(
+            ssh_client,
+            ruta_scripts,
+            DIRECTORIO_SCRIPTS_REMOTO,
+            nombres=nombres,
+            transformar=transformar,
+            modo=0o755,
+            nombre_nodo=nombre_host,
+            registro=registro,
         )
 
-        logger.info("Conexión establecida con éxito.")
+    return _subir_y_ejecutar_scripts(
+        nombre_host, clave_publica, usuario, subir, port, registro
+    )
 
-        # --- 2. Eliminamos el archivo remoto si existe
-        ssh_client.exec_command(f"rm -f {ruta_script_remota}")
 
-        # --- 3. Crear el archivo remoto con el heredoc ---
-        # El comando utiliza 'sudo tee' para escribir el contenido en el archivo remoto
-        command = f"""
-    cat <<'SCRIPT_END' | sudo tee {ruta_script_remota} > /dev/null
-{script_content}
-SCRIPT_END
-"""
-        logger.info("Creando el script en el servidor...")
-        _, stdout, _ = ssh_client.exec_command(command)
+def _subir_y_ejecutar_scripts(
+    nombre_host, clave_publica, usuario, subir, port, registro
+):
+    """
+    Sube los scripts con subir(ssh_client, registro), que devuelve sus rutas
+    remotas, y los ejecuta en ese orden.
+    """
+    if registro is None:
+        registro = logger
 
-        ssh_client.exec_command(f"sudo chmod 777 {ruta_script_remota}")
+    try:
 
-        # # --- 3. Ejecución remota del script ---
-        logger.info("Ejecutando el script '%s' en el servidor...", ruta_script_remota)
-        _, stdout, _ = ssh_client.exec_command(f"sudo {ruta_script_remota}")
+        # --- 1. Conexión SSH ---
+        registro.info("Intentando conectar al servidor...")
 
-        # Lee y muestra la salida del script en tiempo real
-        for line in stdout:
-            logger.info("STDOUT: %s", line)
+        ssh_client = pool_ssh.obtener(nombre_host, usuario, clave_publica, port)
 
-        logger.info("Ejecución del script completada.")
+        registro.info("Conexión establecida con éxito.")
+
+        # --- 2. Subida de los scripts por SFTP ---
+        rutas_scripts = subir(ssh_client, registro)
 
     except paramiko.AuthenticationException:
-        logger.error(
+        registro.error(
             "Error de autenticación. Verifica el usuario, la contraseña o la clave SSH."
         )
+        return False
     except paramiko.SSHException as e:
-        logger.error("Error en la conexión SSH: %s", e)
+        registro.error("Error en la conexión SSH: %s", e)
+        pool_ssh.descartar(nombre_host, usuario, clave_publica, port)
+        return False
     except Exception as e:
-        logger.error("Ocurrió un error inesperado: %s", e)
-        exit(1)
-    finally:
-        if sftp_client:
-            sftp_client.close()
-        if ssh_client:
-            ssh_client.close()
-            logger.info("Conexión SSH cerrada.")
+        registro.error("Error al subir los scripts: %s", e)
+        return False
+
+    # --- 3. Ejecución remota de los scripts ---
+    for ruta_script_remota in rutas_scripts:
+        registro.info("Ejecutando el script '%s' en el servidor...", ruta_script_remota)
+
+        if not ejecutar_comando_remoto(
+            nombre_host,
+            clave_publica,
+            usuario,
+            f"sudo {ruta_script_remota}",
+            port=port,
+            registro=registro,
+        ):
+            registro.error("Falló el script '%s'", ruta_script_remota)
+            return False
+
+    return True
+
+
+def ejecutar_script_remoto(
+    nombre_host,
+    clave_publica,
+    usuario,
+    script_content,
+    ruta_script_remota,
+    port=22,
+    registro=None,
+):
+    """
+    Se conecta al servidor remoto, copia un script por SFTP y lo ejecuta.
+
+    Args:
+        registro (logging.Logger): Logger donde se escribe la salida del script.
+            Por defecto, el logger de este módulo.
+
+    Returns:
+        bool: True si el script terminó con código de salida 0.
+    """
+
+    return ejecutar_scripts_remotos(
+        nombre_host,
+        clave_publica,
+        usuario,
+        [(script_content, ruta_script_remota)],
+        port=port,
+        registro=registro,
+    )
+
+
+async def ejecutar_comando_remoto_async(
+    nombre_host, clave_publica, usuario, comando, port=22, registro=None
+):
+    """
+    Variante asíncrona de ejecutar_comando_remoto sobre asyncssh. Si asyncssh
+    no está instalado, ejecuta la variante síncrona en un hilo.
+
+    Returns:
+        bool: True si el comando terminó con código de salida 0.
+    """
+
+    if not asyncssh_disponible():
+        return await ejecutar_sin_asyncssh(
+            ejecutar_comando_remoto,
+            nombre_host,
+            clave_publica,
+            usuario,
+            comando,
+            port=port,
+            registro=registro,
+        )
+
+    import asyncssh
+
+    if registro is None:
+        registro = logger
+
+    try:
+        conexion = await pool_ssh_async.obtener(
+            nombre_host, usuario, clave_publica, port
+        )
+
+        registro.info("Ejecutando '%s' en el servidor...", comando)
+        resultado = await ejecutar_comando_async(
+            conexion, comando, nombre_host, registro
+        )
+
+        if not resultado["resultado"]:
+            registro.error(
+                "'%s' terminó con código %s", comando, resultado["codigo_salida"]
+            )
+            return False
+
+        registro.info("Ejecución completada en %.1f s.", resultado["duracion"])
+        return True
+
+    except asyncssh.PermissionDenied:
+        registro.error(
+            "Error de autenticación. Verifica el usuario, la contraseña o la clave SSH."
+        )
+    except (asyncssh.Error, OSError) as e:
+        registro.error("Error en la conexión SSH: %s", e)
+        pool_ssh_async.descartar(nombre_host, usuario, clave_publica, port)
+    except Exception as e:
+        registro.error("Ocurrió un error inesperado: %s", e)
+
+    return False
+
+
+async def ejecutar_scripts_remotos_async(
+    nombre_host, clave_publica, usuario, scripts, port=22, registro=None
+):
+    """
+    Variante asíncrona de ejecutar_scripts_remotos sobre asyncssh. Si asyncssh
+    no está instalado, ejecuta la variante síncrona en un hilo.
+
+    Returns:
+        bool: True si todos los scripts terminaron con código de salida 0.
+    """
+
+    if not asyncssh_disponible():
+        return await ejecutar_sin_asyncssh(
+            ejecutar_scripts_remotos,
+            nombre_host,
+            clave_publica,
+            usuario,
+            scripts,
+            port=port,
+            registro=registro,
+        )
+
+    import asyncssh
+
+    if registro is None:
+        registro = logger
+
+    try:
+        conexion = await pool_ssh_async.obtener(
+            nombre_host, usuario, clave_publica, port
+        )
+
+        registro.info("Subiendo %s scripts al servidor...", len(scripts))
+        await subir_archivos_async(
+            conexion,
+            [(contenido, ruta, 0o755) for contenido, ruta in scripts],
+            nombre_nodo=nombre_host,
+            registro=registro,
+        )
+
+    except asyncssh.PermissionDenied:
+        registro.error(
+            "Error de autenticación. Verifica el usuario, la contraseña o la clave SSH."
+        )
+        return False
+    except (asyncssh.Error, OSError) as e:
+        registro.error("Error en la conexión SSH: %s", e)
+        pool_ssh_async.descartar(nombre_host, usuario, clave_publica, port)
+        return False
+    except Exception as e:
+        registro.error("Error al subir los scripts: %s", e)
+        return False
+
+    for _, ruta_script_remota in scripts:
+        registro.info("Ejecutando el script '%s' en el servidor...", ruta_script_remota)
+
+        if not await ejecutar_comando_remoto_async(
+            nombre_host,
+            clave_publica,
+            usuario,
+            f"sudo {ruta_script_remota}",
+            port=port,
+            registro=registro,
+        ):
+            registro.error("Falló el script '%s'", ruta_script_remota)
+            return False
+
+    return True
@@ -0,0 +1,787 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+from config.configuraciones import (
+    MAX_CONCURRENCIA,
+    MAX_CONCURRENCIA_ASYNC,
+    MODO_APROVISIONAMIENTO,
+    TIEMPO_MAXIMO_DISPONIBILIDAD,
+)
+from config.registros import obtener_logger_nodo
+from func.aprovisionamiento import datos_personalizados_nodo, esperar_aprovisionamiento
+from func.artefactos import DistribuidorArtefactos
+from func.concurrencia import (
+    ejecutar_concurrente,
+    ejecutar_concurrente_async,
+    ejecutar_pasos,
+    ejecutar_pasos_async,
+)
+from func.conexiones_ssh import pool_ssh, pool_ssh_async
+from func.disponibilidad import esperar_nodo_listo, esperar_nodo_listo_async
+from func.estado import registrar_fase
+from func.funciones_cluster import (
+    SISTEMA_OPERATIVO_POR_DEFECTO,
+    especificaciones_nodos,
+    guardar_grupos_seguridad,
+    guardar_nodos_cluster,
+    nombre_registro_dns,
+    preparar_grupos_seguridad,
+)
+from func.funciones_dns import (
+    create_or_update_dns_record,
+    create_or_update_dns_record_async,
+)
+from func.funciones_vm import (
+    comando_iniciar_master,
+    comando_iniciar_worker,
+    copiar_clave_privada_devops,
+    crear_vm,
+    crear_vm_async,
+    iniciar_master,
+    iniciar_worker,
+    instalar_dependencias_vm,
+    instalar_dependencias_vm_async,
+)
+from func.inicializar_vm import ejecutar_comando_remoto_async
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+def leer_clave_devops(clave_devops):
+    """
+    Lee la clave privada de DevOps que se copia al master.
+
+    Returns:
+        str | None: El contenido de la clave, o None si no se indicó o no existe.
+    """
+
+    if not clave_devops:
+        return None
+
+    ruta_clave_devops = Path(clave_devops)
+    if not ruta_clave_devops.exists():
+        logger.error("La ruta de la clave de DevOps no existe: %s", ruta_clave_devops)
+        return None
+
+    return ruta_clave_devops.read_text(encoding="utf8")
+
+
+class TiemposFases:
+    """
+    Registra el inicio y el fin de cada fase de cada nodo.
+
+    Los tiempos son relativos al inicio de la orquestación, en segundos.
+
+    Args:
+        al_terminar_fase (callable): Función opcional que recibe el nombre del
+            nodo, el de la fase y si terminó correctamente.
+    """
+
+    def __init__(self, al_terminar_fase=None):
+        self.inicio = time.monotonic()
+        self.tiempos = {}
+        self.al_terminar_fase = al_terminar_fase
+        self._bloqueo = threading.Lock()
+
+    @contextmanager
+    def fase(self, nombre_nodo, nombre_fase):
+        """
+        Mide una fase de un nodo. Si la fase lanza una excepción se registra
+        como fallida y la excepción se propaga.
+        """
+
+        inicio = time.monotonic() - self.inicio
+        resultado = False
+
+        try:
+            yield
+            resultado = True
+        finally:
+            fin = time.monotonic() - self.inicio
+            with self._bloqueo:
+                self.tiempos.setdefault(nombre_nodo, {})[nombre_fase] = (
+                    inicio,
+                    fin,
+                    resultado,
+                )
+
+            if self.al_terminar_fase is not None:
+                try:
+                    self.al_terminar_fase(nombre_nodo, nombre_fase, resultado)
+                except Exception as e:
+                    logger.warning(
+                        "No se pudo registrar la fase %s de %s: %s",
+                        nombre_fase,
+                        nombre_nodo,
+                        e,
+                    )
+
+    def registrar_resumen(self):
+        """
+        Registra la duración de cada fase por nodo y el camino crítico, es
+        decir, el nodo que terminó más tarde y en qué fases invirtió su tiempo.
+        """
+
+        if not self.tiempos:
+            return
+
+        for nombre_nodo, fases in sorted(self.tiempos.items()):
+            detalle = ", ".join(
+                f"{fase}={fin - inicio:.1f}s{'' if resultado else ' (error)'}"
+                for fase, (inicio, fin, resultado) in sorted(
+                    fases.items(), key=lambda item: item[1][0]
+                )
+            )
+            logger.info("Tiempos de %s: %s", nombre_nodo, detalle)
+
+        nodo_critico, fases_criticas = max(
+            self.tiempos.items(),
+            key=lambda item: max(fin for _, fin, _ in item[1].values()),
+        )
+        fin_total = max(fin for _, fin, _ in fases_criticas.values())
+
+        fase_mas_larga = max(
+            fases_criticas.items(), key=lambda item: item[1][1] - item[1][0]
+        )
+
+        logger.info(
+            "Camino crítico: %s terminó en %.1f s; su fase más larga fue '%s' (%.1f s)",
+            nodo_critico,
+            fin_total,
+            fase_mas_larga[0],
+            fase_mas_larga[1][1] - fase_mas_larga[1][0],
+        )
+
+
+class OperacionesOrquestacion:
+    """
+    Operaciones de la orquestación con los clientes síncronos: cada nodo
+    avanza en su propio hilo y cada operación se ejecuta al llamarla.
+
+    pasos_orquestacion produce con yield el resultado de cada operación, por
+    lo que aquí basta con devolverlo (ver ejecutar_pasos).
+    """
+
+    def __init__(self, cliente_azure, cf, max_concurrencia):
+        self.cliente_azure = cliente_azure
+        self.cf = cf
+        self.max_concurrencia = max_concurrencia
+
+        # Los nodos se guardan a medida que se crean para poder eliminarlos
+        # aunque la orquestación se interrumpa
+        self._nodos_creados = []
+        self._bloqueo_nodos = threading.Lock()
+
+        # El master avisa aquí cuando está iniciado
+        self._master_iniciado = threading.Event()
+
+    def en_hilo(self, funcion, *args, **kwargs):
+        return funcion(*args, **kwargs)
+
+    def registrar_fase(self, nombre_nodo, nombre_fase, resultado):
+        registrar_fase(nombre_nodo, nombre_fase, resultado)
+
+    def guardar_grupos_seguridad(self, nombres_grupos):
+        guardar_grupos_seguridad(nombres_grupos)
+
+    def guardar_nodo(self, nodo):
+        with self._bloqueo_nodos:
+            self._nodos_creados.append(nodo)
+            guardar_nodos_cluster(self._nodos_creados)
+
+    def crear_vm(self, **kwargs):
+        return crear_vm(cliente_azure=self.cliente_azure, **kwargs)
+
+    def esperar_nodo_listo(self, grupo_recursos, nodo, clave_publica, plazo):
+        return esperar_nodo_listo(
+            self.cliente_azure, grupo_recursos, nodo, clave_publica, plazo
+        )
+
+    def instalar_dependencias_vm(self, nombre_host, clave_publica, usuario, **kwargs):
+        return instalar_dependencias_vm(
+            self.cliente_azure, nombre_host, clave_publica, usuario, **kwargs
+        )
+
+    def iniciar_master(self, nombre_host, usuario, clave_publica):
+        return iniciar_master(
+            nombre_host=nombre_host, usuario=usuario, clave_publica=clave_publica
+        )
+
+    def iniciar_worker(self, nombre_host, usuario, clave_publica, nombre_host_master):
+        return iniciar_worker(
+            nombre_host=nombre_host,
+            usuario=usuario,
+            clave_publica=clave_publica,
+            nombre_host_master=nombre_host_master,
+        )
+
+    def avisar_master(self):
+        self._master_iniciado.set()
+
+    def esperar_master(self, plazo):
+        self._master_iniciado.wait(max(0, plazo - time.monotonic()))
+
+    def crear_registro_dns(self, **kwargs):
+        return create_or_update_dns_record(self.cf, **kwargs)
+
+    def procesar_nodos(self, tareas):
+        return ejecutar_concurrente(
+            {
+                identificador: (
+                    lambda pasos=pasos, **kwargs: ejecutar_pasos(pasos(**kwargs)),
+                    kwargs,
+                )
+                for identificador, (pasos, kwargs) in tareas.items()
+            },
+            max_concurrencia=self.max_concurrencia,
+        )
+
+
+class OperacionesOrquestacionAsync:
+    """
+    Operaciones de la orquestación en un único bucle de eventos: cada
+    operación devuelve un awaitable que ejecutar_pasos_async espera.
+
+    Las operaciones de Azure usan cliente_azure_async (ClienteAzureAsync), el
+    DNS un cliente AsyncCloudflare (cf) y las operaciones SSH asyncssh. Las
+    que solo existen en versión síncrona se ejecutan en un ejecutor propio,
+    que se cierra en cerrar().
+
+    Las escrituras del estado (fases, nodos y grupos de seguridad) usan un
+    único hilo aparte: no bloquean el bucle con sus fsync y se aplican en el
+    orden en que se piden.
+    """
+
+    def __init__(self, cliente_azure, cliente_azure_async, cf, max_concurrencia):
+        self.cliente_azure = cliente_azure
+        self.cliente_azure_async = cliente_azure_async
+        self.cf = cf
+        self.max_concurrencia = max_concurrencia
+
+        # Las fases síncronas de todos los nodos pueden estar en vuelo a la vez
+        self._ejecutor = ThreadPoolExecutor(max_workers=max(1, max_concurrencia))
+        self._escritor = ThreadPoolExecutor(max_workers=1)
+        self._bucle = asyncio.get_running_loop()
+
+        # Solo el bucle de eventos modifica la lista, por lo que no necesita
+        # bloqueo
+        self._nodos_creados = []
+        self._master_iniciado = asyncio.Event()
+
+    def en_hilo(self, funcion, *args, **kwargs):
+        return self._bucle.run_in_executor(
+            self._ejecutor, partial(funcion, *args, **kwargs)
+        )
+
+    def _escribir(self, funcion, *args):
+        return self._bucle.run_in_executor(self._escritor, partial(funcion, *args))
+
+    def registrar_fase(self, nombre_nodo, nombre_fase, resultado):
+        # TiemposFases no espera el resultado: los errores se registran aquí
+        def registrar():
+            try:
+                registrar_fase(nombre_nodo, nombre_fase, resultado)
+            except Exception as e:
+                logger.warning(
+                    "No se pudo registrar la fase %s de %s: %s",
+                    nombre_fase,
+                    nombre_nodo,
+                    e,
+                )
+
+        self._escritor.submit(registrar)
+
+    def guardar_grupos_seguridad(self, nombres_grupos):
+        return self._escribir(guardar_grupos_seguridad, nombres_grupos)
+
+    def guardar_nodo(self, nodo):
+        self._nodos_creados.append(nodo)
+        return self._escribir(guardar_nodos_cluster, list(self._nodos_creados))
+
+    def crear_vm(self, **kwargs):
+        return crear_vm_async(cliente_azure=self.cliente_azure_async, **kwargs)
+
+    def esperar_nodo_listo(self, grupo_recursos, nodo, clave_publica, plazo):
+        return esperar_nodo_listo_async(
+            self.cliente_azure_async, grupo_recursos, nodo, clave_publica, plazo
+        )
+
+    def instalar_dependencias_vm(self, nombre_host, clave_publica, usuario, **kwargs):
+        return instalar_dependencias_vm_async(
+            self.cliente_azure_async, nombre_host, clave_publica, usuario, **kwargs
+        )
+
+    def iniciar_master(self, nombre_host, usuario, clave_publica):
+        return ejecutar_comando_remoto_async(
+            nombre_host, clave_publica, usuario, comando_iniciar_master()
+        )
+
+    def iniciar_worker(self, nombre_host, usuario, clave_publica, nombre_host_master):
+        return ejecutar_comando_remoto_async(
+            nombre_host,
+            clave_publica,
+            usuario,
+            comando_iniciar_worker(nombre_host_master),
+        )
+
+    def avisar_master(self):
+        self._master_iniciado.set()
+
+    async def esperar_master(self, plazo):
+        try:
+            await asyncio.wait_for(
+                self._master_iniciado.wait(), max(0, plazo - time.monotonic())
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    def crear_registro_dns(self, **kwargs):
+        return create_or_update_dns_record_async(self.cf, **kwargs)
+
+    async def procesar_nodos(self, tareas):
+        try:
+            return await ejecutar_concurrente_async(
+                {
+                    identificador: (
+                        lambda pasos=pasos, **kwargs: ejecutar_pasos_async(
+                            pasos(**kwargs)
+                        ),
+                        kwargs,
+                    )
+                    for identificador, (pasos, kwargs) in tareas.items()
+                },
+                max_concurrencia=self.max_concurrencia,
+            )
+        finally:
+            await pool_ssh_async.cerrar()
+
+    async def cerrar(self):
+        """
+        Espera las escrituras del estado pendientes y cierra los ejecutores.
+        """
+
+        try:
+            await self._bucle.run_in_executor(None, self._escritor.shutdown)
+        finally:
+            self._ejecutor.shutdown(wait=False, cancel_futures=True)
+
+
+def pasos_orquestacion(
+    operaciones,
+    nombre_base,
+    cantidad_nodos,
+    tamanio_instancia_driver,
+    tamanio_instancia_worker,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    region,
+    username,
+    ip_publica,
+    ruta_scripts,
+    zona_dns,
+    zona_dns_id,
+    patron_dns,
+    clave_devops,
+    grupo_recursos_vnet,
+    sistema_operativo,
+    tiempo_maximo,
+    desde_imagen,
+    modo_aprovisionamiento,
+):
+    """
+    Fases de la orquestación, comunes a orquestar_cluster y
+    orquestar_cluster_async.
+
+    Es un generador de pasos (ver ejecutar_pasos): cada llamada a operaciones
+    se produce con yield y recibe su resultado, de modo que el mismo flujo
+    funciona con OperacionesOrquestacion y con OperacionesOrquestacionAsync.
+
+    Returns:
+        TiemposFases: Los tiempos de cada fase por nodo.
+    """
+
+    if grupo_recursos_vnet is None:
+        grupo_recursos_vnet = grupo_recursos
+
+    if sistema_operativo is None:
+        sistema_operativo = SISTEMA_OPERATIVO_POR_DEFECTO
+
+    if modo_aprovisionamiento not in ("ssh", "cloud-init"):
+        raise ValueError(
+            f"Modo de aprovisionamiento desconocido: {modo_aprovisionamiento}"
+        )
+
+    por_cloud_init = modo_aprovisionamiento == "cloud-init"
+    fase_scripts = "configuracion" if desde_imagen else None
+
+    # El resultado de cada fase queda en el estado del clúster
+    tiempos = TiemposFases(al_terminar_fase=operaciones.registrar_fase)
+    plazo = time.monotonic() + tiempo_maximo
+
+    # En modo "operador" los artefactos se descargan mientras se crean las VMs
+    distribuidor = DistribuidorArtefactos(tiempo_maximo=tiempo_maximo)
+    if not desde_imagen and not por_cloud_init:
+        precarga = threading.Thread(target=distribuidor.precargar, daemon=True)
+        precarga.start()
+
+    contenido_clave_devops = leer_clave_devops(clave_devops)
+
+    with tiempos.fase("cluster", "grupos_seguridad"):
+        grupo_seguridad_driver, grupo_seguridad_worker = yield operaciones.en_hilo(
+            preparar_grupos_seguridad,
+            cliente_azure=operaciones.cliente_azure,
+            nombre_base=nombre_base,
+            region=region,
+            grupo_recursos=grupo_recursos,
+            ip_publica=ip_publica,
+        )
+
+    yield operaciones.guardar_grupos_seguridad(
+        [grupo_seguridad_driver, grupo_seguridad_worker]
+    )
+
+    especificaciones = especificaciones_nodos(
+        nombre_base=nombre_base,
+        cantidad_nodos=cantidad_nodos,
+        tamanio_instancia_driver=tamanio_instancia_driver,
+        tamanio_instancia_worker=tamanio_instancia_worker,
+        username_driver=username,
+        username_worker=username,
+        grupo_seguridad_driver=grupo_seguridad_driver,
+        grupo_seguridad_worker=grupo_seguridad_worker,
+    )
+
+    # El master publica aquí su IP privada una vez iniciado
+    datos_master = {"ip_privada": None}
+
+    def pasos_nodo(especificacion):
+        nombre = especificacion["nombre"]
+        es_master = especificacion["tipo_nodo"] == "Master"
+
+        datos_personalizados = None
+        if por_cloud_init:
+            datos_personalizados = datos_personalizados_nodo(
+                ruta_scripts,
+                {
+                    "nombre": nombre,
+                    "usuario": especificacion["usuario"],
+                    "tipo_nodo": especificacion["tipo_nodo"],
+                },
+                zona_dns,
+                patron_dns,
+                fase=fase_scripts,
+            )
+
+        try:
+            with tiempos.fase(nombre, "crear"):
+                resultado, _, ip, ip_privada, ids = yield operaciones.crear_vm(
+                    tamanio_instancia=especificacion["tamanio_instancia"],
+                    nombre_base=nombre,
+                    grupo_recursos=grupo_recursos,
+                    nombre_red_virtual=nombre_red_virtual,
+                    nombre_subred=nombre_subred,
+                    nombre_clave_ssh=nombre_clave_ssh,
+                    sistema_operativo=sistema_operativo,
+                    region=region,
+                    username=especificacion["usuario"],
+                    grupo_recursos_vnet=grupo_recursos_vnet,
+                    grupo_seguridad=especificacion["grupo_seguridad"],
+                    datos_personalizados=datos_personalizados,
+                    id_cluster=nombre_base,
+                )
+                if not resultado:
+                    raise RuntimeError(f"No se pudo crear la VM {nombre}")
+
+            nodo = {
+                "nombre": nombre,
+                "ip": ip,
+                "usuario": especificacion["usuario"],
+                "tipo_nodo": especificacion["tipo_nodo"],
+                "ip_privada": ip_privada,
+                "ids": ids,
+            }
+
+            yield operaciones.guardar_nodo(nodo)
+
+            with tiempos.fase(nombre, "disponible"):
+                if not (
+                    yield operaciones.esperar_nodo_listo(
+                        grupo_recursos, nodo, nombre_clave_ssh, plazo
+                    )
+                ):
+                    raise RuntimeError(f"El nodo {nombre} no está disponible")
+
+            registro = obtener_logger_nodo(nombre)
+
+            if not desde_imagen and not por_cloud_init:
+                with tiempos.fase(nombre, "artefactos"):
+                    yield operaciones.en_hilo(
+                        lambda: distribuidor.distribuir(
+                            pool_ssh.obtener(ip, nodo["usuario"], nombre_clave_ssh),
+                            nodo,
+                            registro,
+                        )
+                    )
+
+            with tiempos.fase(nombre, "instalar"):
+                if por_cloud_init:
+                    instalado = yield operaciones.en_hilo(
+                        esperar_aprovisionamiento,
+                        nodo,
+                        nombre_clave_ssh,
+                        tiempo_maximo,
+                        registro,
+                    )
+                else:
+                    instalado = yield operaciones.instalar_dependencias_vm(
+                        ip,
+                        nombre_clave_ssh,
+                        nodo["usuario"],
+                        ruta_scripts=ruta_scripts,
+                        nombre_nodo=nombre,
+                        tipo_nodo=nodo["tipo_nodo"],
+                        grupo_recursos=grupo_recursos,
+                        zona_dns=zona_dns,
+                        patron_dns=patron_dns,
+                        registro=registro,
+                        fase=fase_scripts,
+                        ip_privada_vm=ip_privada,
+                    )
+                if not instalado:
+                    raise RuntimeError(f"La instalación falló en {nombre}")
+
+            with tiempos.fase(nombre, "iniciar"):
+                if es_master:
+                    if not (
+                        yield operaciones.iniciar_master(
+                            nombre_host=ip,
+                            usuario=nodo["usuario"],
+                            clave_publica=nombre_clave_ssh,
+                        )
+                    ):
+                        raise RuntimeError("No se pudo iniciar el master")
+                    datos_master["ip_privada"] = ip_privada
+                    operaciones.avisar_master()
+                else:
+                    yield operaciones.esperar_master(plazo)
+                    if datos_master["ip_privada"] is None:
+                        raise RuntimeError(
+                            f"El master no está disponible para iniciar {nombre}"
+                        )
+                    if not (
+                        yield operaciones.iniciar_worker(
+                            nombre_host=ip,
+                            usuario=nodo["usuario"],
+                            clave_publica=nombre_clave_ssh,
+                            nombre_host_master=datos_master["ip_privada"],
+                        )
+                    ):
+                        raise RuntimeError(f"No se pudo iniciar el worker {nombre}")
+
+            with tiempos.fase(nombre, "dns"):
+                yield operaciones.crear_registro_dns(
+                    nombre_zona=zona_dns,
+                    id_zona=zona_dns_id,
+                    record_type="A",
+                    record_name=nombre_registro_dns(nodo, zona_dns, patron_dns),
+                    record_content=ip,
+                    proxied=False,
+                )
+
+            if es_master and contenido_clave_devops is not None:
+                with tiempos.fase(nombre, "devops"):
+                    yield operaciones.en_hilo(
+                        copiar_clave_privada_devops,
+                        nombre_vm=nombre,
+                        clave_publica=nombre_clave_ssh,
+                        ip_nodo=ip,
+                        usuario=nodo["usuario"],
+                        contenido_clave_devops=contenido_clave_devops,
+                    )
+
+            return True
+
+        finally:
+            # Si el master falla, los workers no deben quedarse esperando
+            if es_master:
+                operaciones.avisar_master()
+                distribuidor.liberar()
+
+    resultados = yield operaciones.procesar_nodos(
+        {
+            especificacion["nombre"]: (
+                pasos_nodo,
+                {"especificacion": especificacion},
+            )
+            for especificacion in especificaciones
+        }
+    )
+
+    yield operaciones.en_hilo(distribuidor.finalizar)
+
+    nodos_fallidos = [
+        nombre for nombre, resultado in resultados.items() if not resultado["resultado"]
+    ]
+
+    if nodos_fallidos:
+        logger.error("Nodos con errores en la orquestación: %s", nodos_fallidos)
+    else:
+        logger.info("Todos los nodos completaron la orquestación")
+
+    tiempos.registrar_resumen()
+
+    return tiempos
+
+
+def orquestar_cluster(
+    cliente_azure,
+    cf,
+    nombre_base,
+    cantidad_nodos,
+    tamanio_instancia_driver,
+    tamanio_instancia_worker,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    region,
+    username,
+    ip_publica,
+    ruta_scripts,
+    zona_dns,
+    zona_dns_id,
+    patron_dns,
+    clave_devops=None,
+    grupo_recursos_vnet=None,
+    sistema_operativo=None,
+    max_concurrencia=MAX_CONCURRENCIA,
+    tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD,
+    desde_imagen=False,
+    modo_aprovisionamiento=MODO_APROVISIONAMIENTO,
+):
+    """
+    Crea y configura el clúster avanzando cada nodo por las fases de forma
+    independiente: crear, disponible, artefactos, instalar, iniciar, dns y
+    devops.
+
+    La única espera entre nodos es la de los workers, que solo se inician
+    cuando el master está en marcha y se conoce su IP privada.
+
+    Si desde_imagen es True, sistema_operativo es la imagen dorada: no se
+    distribuyen artefactos y solo se ejecutan los scripts de configuración.
+
+    Con modo_aprovisionamiento="cloud-init", los scripts se pasan a la VM como
+    custom_data y se ejecutan durante el arranque; la fase de instalación solo
+    espera el marcador de finalización. En modo "ssh" se suben y ejecutan por
+    SSH cuando el nodo está disponible.
+
+    Returns:
+        TiemposFases: Los tiempos de cada fase por nodo.
+    """
+
+    return ejecutar_pasos(
+        pasos_orquestacion(
+            OperacionesOrquestacion(cliente_azure, cf, max_concurrencia),
+            nombre_base=nombre_base,
+            cantidad_nodos=cantidad_nodos,
+            tamanio_instancia_driver=tamanio_instancia_driver,
+            tamanio_instancia_worker=tamanio_instancia_worker,
+            grupo_recursos=grupo_recursos,
+            nombre_red_virtual=nombre_red_virtual,
+            nombre_subred=nombre_subred,
+            nombre_clave_ssh=nombre_clave_ssh,
+            region=region,
+            username=username,
+            ip_publica=ip_publica,
+            ruta_scripts=ruta_scripts,
+            zona_dns=zona_dns,
+            zona_dns_id=zona_dns_id,
+            patron_dns=patron_dns,
+            clave_devops=clave_devops,
+            grupo_recursos_vnet=grupo_recursos_vnet,
+            sistema_operativo=sistema_operativo,
+            tiempo_maximo=tiempo_maximo,
+            desde_imagen=desde_imagen,
+            modo_aprovisionamiento=modo_aprovisionamiento,
+        )
+    )
+
+
+async def orquestar_cluster_async(
+    cliente_azure,
+    cliente_azure_async,
+    cf,
+    nombre_base,
+    cantidad_nodos,
+    tamanio_instancia_driver,
+    tamanio_instancia_worker,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    region,
+    username,
+    ip_publica,
+    ruta_scripts,
+    zona_dns,
+    zona_dns_id,
+    patron_dns,
+    clave_devops=None,
+    grupo_recursos_vnet=None,
+    sistema_operativo=None,
+    max_concurrencia=MAX_CONCURRENCIA_ASYNC,
+    tiempo_maximo=TIEMPO_MAXIMO_DISPONIBILIDAD,
+    desde_imagen=False,
+    modo_aprovisionamiento=MODO_APROVISIONAMIENTO,
+):
+    """
+    Variante asíncrona de orquestar_cluster: las mismas fases por nodo, pero
+    todos los nodos avanzan en un único bucle de eventos en lugar de ocupar un
+    hilo cada uno (ver OperacionesOrquestacionAsync).
+
+    Returns:
+        TiemposFases: Los tiempos de cada fase por nodo.
+    """
+
+    operaciones = OperacionesOrquestacionAsync(
+        cliente_azure, cliente_azure_async, cf, max_concurrencia
+    )
+
+    try:
+        return await ejecutar_pasos_async(
+            pasos_orquestacion(
+                operaciones,
+                nombre_base=nombre_base,
+                cantidad_nodos=cantidad_nodos,
+                tamanio_instancia_driver=tamanio_instancia_driver,
+                tamanio_instancia_worker=tamanio_instancia_worker,
+                grupo_recursos=grupo_recursos,
+                nombre_red_virtual=nombre_red_virtual,
+                nombre_subred=nombre_subred,
+                nombre_clave_ssh=nombre_clave_ssh,
+                region=region,
+                username=username,
+                ip_publica=ip_publica,
+                ruta_scripts=ruta_scripts,
+                zona_dns=zona_dns,
+                zona_dns_id=zona_dns_id,
+                patron_dns=patron_dns,
+                clave_devops=clave_devops,
+                grupo_recursos_vnet=grupo_recursos_vnet,
+                sistema_operativo=sistema_operativo,
+                tiempo_maximo=tiempo_maximo,
+                desde_imagen=desde_imagen,
+                modo_aprovisionamiento=modo_aprovisionamiento,
+            )
+        )
+    finally:
+        await operaciones.cerrar()
@@ -0,0 +1,280 @@
+import logging
+
+from config.configuraciones import MAX_CONCURRENCIA
+from func.concurrencia import ejecutar_concurrente
+from func.funciones_cluster import (
+    SISTEMA_OPERATIVO_POR_DEFECTO,
+    especificaciones_nodos,
+    guardar_grupos_seguridad,
+    guardar_nodos_cluster,
+    indice_worker,
+    preparar_grupos_seguridad,
+)
+from func.funciones_vm import crear_vm, eliminar_vm, inventario_ips, redimensionar_vm
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+
+def listar_nodos_existentes(cliente_azure, grupo_recursos, nombre_base):
+    """
+    Lista en bloque las VMs del clúster que ya existen en el grupo de recursos,
+    con su tamaño, usuario e IPs.
+
+    Se hacen llamadas paginadas (VMs, NICs e IPs públicas) en lugar de una por
+    nodo.
+
+    Returns:
+        dict: Diccionario {nombre: {"nombre", "ip", "usuario", "tipo_nodo",
+        "ip_privada", "ids", "tamanio_instancia"}}, con "ids" como los
+        devuelve crear_vm.
+    """
+
+    compute_client = cliente_azure.obtener_cliente_compute()
+
+    inventario = inventario_ips(cliente_azure, grupo_recursos)
+
+    nodos = {}
+
+    for vm in compute_client.virtual_machines.list(grupo_recursos):
+        if vm.name == f"{nombre_base}-master":
+            tipo_nodo = "Master"
+        elif indice_worker(nombre_base, vm.name) is not None:
+            tipo_nodo = "Worker"
+        else:
+            continue
+
+        ips = inventario.get(vm.name, {})
+        os_disk = vm.storage_profile.os_disk
+
+        nodos[vm.name] = {
+            "nombre": vm.name,
+            "ip": ips.get("ip_publica"),
+            "usuario": vm.os_profile.admin_username if vm.os_profile else None,
+            "tipo_nodo": tipo_nodo,
+            "ip_privada": ips.get("ip_privada"),
+            "ids": {
+                **ips.get("ids", {}),
+                "vm": vm.id,
+                "disco": os_disk.managed_disk.id if os_disk.managed_disk else None,
+            },
+            "tamanio_instancia": vm.hardware_profile.vm_size,
+        }
+
+    return nodos
+
+
+def planificar_cambios(especificaciones, existentes):
+    """
+    Compara el estado deseado con los nodos existentes.
+
+    Args:
+        especificaciones (list): Especificaciones de los nodos deseados.
+        existentes (dict): Nodos existentes, como en listar_nodos_existentes.
+
+    Returns:
+        dict: Diccionario con las listas "crear" y "redimensionar"
+        (especificaciones), "eliminar" y "sin_cambios" (nombres).
+    """
+
+    deseados = {especificacion["nombre"] for especificacion in especificaciones}
+
+    plan = {"crear": [], "redimensionar": [], "eliminar": [], "sin_cambios": []}
+
+    for especificacion in especificaciones:
+        existente = existentes.get(especificacion["nombre"])
+
+        if existente is None:
+            plan["crear"].append(especificacion)
+        elif (
+            existente["tamanio_instancia"].lower()
+            != especificacion["tamanio_instancia"].lower()
+        ):
+            plan["redimensionar"].append(especificacion)
+        else:
+            plan["sin_cambios"].append(especificacion["nombre"])
+
+    plan["eliminar"] = sorted(
+        (nombre for nombre in existentes if nombre not in deseados),
+        key=lambda nombre: (existentes[nombre]["tipo_nodo"], nombre),
+    )
+
+    return plan
+
+
+def reconciliar_cluster(
+    cliente_azure,
+    nombre_base,
+    cantidad_nodos,
+    tamanio_instancia_driver,
+    grupo_recursos,
+    nombre_red_virtual,
+    nombre_subred,
+    nombre_clave_ssh,
+    region,
+    username_driver,
+    ip_publica,
+    grupo_recursos_vnet=None,
+    sistema_operativo=None,
+    username_worker=None,
+    tamanio_instancia_worker=None,
+    max_concurrencia=MAX_CONCURRENCIA,
+):
+    """
+    Lleva el clúster al estado definido por la configuración, tocando solo los
+    nodos que difieren: crea los que faltan, redimensiona los que tienen otro
+    tamaño y elimina los que sobran. Los grupos de seguridad solo se crean si
+    no existen.
+
+    Returns:
+        dict: El plan aplicado, como en planificar_cambios, con la clave
+        adicional "fallidos" (nombres).
+    """
+
+    if grupo_recursos_vnet is None:
+        grupo_recursos_vnet = grupo_recursos
+
+    if username_worker is None:
+        username_worker = username_driver
+
+    if tamanio_instancia_worker is None:
+        tamanio_instancia_worker = tamanio_instancia_driver
+
+    if sistema_operativo is None:
+        sistema_operativo = SISTEMA_OPERATIVO_POR_DEFECTO
+
+    network_client = cliente_azure.obtener_cliente_red()
+
+    grupo_seguridad_driver = nombre_base + "-nsg-driver"
+    grupo_seguridad_worker = nombre_base + "-nsg-worker"
+
+    grupos_existentes = {
+        nsg.name for nsg in network_client.network_security_groups.list(grupo_recursos)
+    }
+
+    if {grupo_seguridad_driver, grupo_seguridad_worker} <= grupos_existentes:
+        logger.info("Los grupos de seguridad ya existen, no se modifican")
+    else:
+        grupo_seguridad_driver, grupo_seguridad_worker = preparar_grupos_seguridad(
+            cliente_azure=cliente_azure,
+            nombre_base=nombre_base,
+            region=region,
+            grupo_recursos=grupo_recursos,
+            ip_publica=ip_publica,
+        )
+
+    especificaciones = especificaciones_nodos(
+        nombre_base=nombre_base,
+        cantidad_nodos=cantidad_nodos,
+        tamanio_instancia_driver=tamanio_instancia_driver,
+        tamanio_instancia_worker=tamanio_instancia_worker,
+        username_driver=username_driver,
+        username_worker=username_worker,
+        grupo_seguridad_driver=grupo_seguridad_driver,
+        grupo_seguridad_worker=grupo_seguridad_worker,
+    )
+
+    existentes = listar_nodos_existentes(cliente_azure, grupo_recursos, nombre_base)
+    plan = planificar_cambios(especificaciones, existentes)
+
+    logger.info(
+        "Reconciliación: %s por crear, %s por redimensionar, %s por eliminar, "
+        "%s sin cambios",
+        len(plan["crear"]),
+        len(plan["redimensionar"]),
+        len(plan["eliminar"]),
+        len(plan["sin_cambios"]),
+    )
+
+    tareas = {}
+
+    for especificacion in plan["crear"]:
+        tareas[especificacion["nombre"]] = (
+            crear_vm,
+            {
+                "cliente_azure": cliente_azure,
+                "tamanio_instancia": especificacion["tamanio_instancia"],
+                "nombre_base": especificacion["nombre"],
+                "grupo_recursos": grupo_recursos,
+                "nombre_red_virtual": nombre_red_virtual,
+                "nombre_subred": nombre_subred,
+                "nombre_clave_ssh": nombre_clave_ssh,
+                "sistema_operativo": sistema_operativo,
+                "region": region,
+                "username": especificacion["usuario"],
+                "grupo_recursos_vnet": grupo_recursos_vnet,
+                "grupo_seguridad": especificacion["grupo_seguridad"],
+                "id_cluster": nombre_base,
+            },
+        )
+
+    for especificacion in plan["redimensionar"]:
+        tareas[especificacion["nombre"]] = (
+            redimensionar_vm,
+            {
+                "cliente_azure": cliente_azure,
+                "grupo_recursos": grupo_recursos,
+                "nombre_vm": especificacion["nombre"],
+                "tamanio_instancia": especificacion["tamanio_instancia"],
+            },
+        )
+
+    for nombre in plan["eliminar"]:
+        tareas[nombre] = (
+            eliminar_vm,
+            {
+                "cliente_azure": cliente_azure,
+                "grupo_recursos": grupo_recursos,
+                "nombre_vm": nombre,
+            },
+        )
+
+    resultados = ejecutar_concurrente(tareas, max_concurrencia=max_concurrencia)
+
+    def correcto(nombre):
+        resultado = resultados[nombre]
+        if not resultado["resultado"]:
+            return False
+        # crear_vm devuelve una tupla (resultado, nombre, ip, ip_privada, ids)
+        if isinstance(resultado["valor"], tuple):
+            return resultado["valor"][0]
+        return bool(resultado["valor"])
+
+    plan["fallidos"] = [nombre for nombre in resultados if not correcto(nombre)]
+
+    # El estado guardado refleja lo que existe: los nodos creados, los que ya
+    # existían y los que no se pudieron eliminar
+    nodos = []
+
+    for especificacion in especificaciones:
+        nombre = especificacion["nombre"]
+
+        if nombre in existentes:
+            nodo = existentes[nombre]
+        elif nombre in resultados and correcto(nombre):
+            nodo = {
+                "nombre": nombre,
+                "ip": resultados[nombre]["valor"][2],
+                "usuario": especificacion["usuario"],
+                "tipo_nodo": especificacion["tipo_nodo"],
+                "ip_privada": resultados[nombre]["valor"][3],
+                "ids": resultados[nombre]["valor"][4],
+            }
+        else:
+            continue
+
+        nodos.append(nodo)
+
+    nodos += [
+        existentes[nombre] for nombre in plan["eliminar"] if nombre in plan["fallidos"]
+    ]
+
+    guardar_nodos_cluster(nodos)
+    guardar_grupos_seguridad([grupo_seguridad_driver, grupo_seguridad_worker])
+
+    if plan["fallidos"]:
+        logger.error("La reconciliación falló en: %s", plan["fallidos"])
+    else:
+        logger.info("Clúster reconciliado")
+
+    return plan
@@ -0,0 +1,318 @@
+import hashlib
+import io
+import logging
+import posixpath
+import shlex
+import time
+from pathlib import Path
+
+import paramiko
+
+from func.conexiones_ssh import pool_ssh
+
+# Obtiene el logger para este módulo
+logger = logging.getLogger(__name__)
+
+# Ventana grande para que las escrituras en cadena no esperen confirmaciones
+TAMANIO_VENTANA_SFTP = 64 * 1024 * 1024
+TAMANIO_PAQUETE_SFTP = 32 * 1024
+TAMANIO_BLOQUE = 1024 * 1024
+
+
+def _ruta_sftp(ruta_remota):
+    """
+    Convierte una ruta "~/archivo" en una ruta relativa al home, que es como
+    la interpreta SFTP.
+    """
+
+    if ruta_remota.startswith("~/"):
+        return ruta_remota[2:]
+
+    return ruta_remota
+
+
+def abrir_sftp(ssh_client):
+    """
+    Abre una sesión SFTP sobre la conexión SSH con ventana y paquetes grandes.
+    """
+
+    return paramiko.SFTPClient.from_transport(
+        ssh_client.get_transport(),
+        window_size=TAMANIO_VENTANA_SFTP,
+        max_packet_size=TAMANIO_PAQUETE_SFTP,
+    )
+
+
+def _escribir_archivo(sftp, origen, ruta_remota, modo=None):
+    """
+    Escribe un archivo remoto de forma atómica: primero en un archivo temporal
+    y luego se renombra sobre el destino.
+
+    Returns:
+        tuple: Bytes escritos y sha256 del contenido.
+    """
+
+    ruta_temporal = ruta_remota + ".tmp"
+    suma = hashlib.sha256()
+    total = 0
+
+    with sftp.open(ruta_temporal, "wb") as archivo_remoto:
+        archivo_remoto.set_pipelined(True)
+
+        while True:
+            bloque = origen.read(TAMANIO_BLOQUE)
+            if not bloque:
+                break
+            archivo_remoto.write(bloque)
+            suma.update(bloque)
+            total += len(bloque)
+
+    if modo is not None:
+        sftp.chmod(ruta_temporal, modo)
+
+    sftp.posix_rename(ruta_temporal, ruta_remota)
+
+    return total, suma.hexdigest()
+
+
+def verificar_checksums(ssh_client, checksums):
+    """
+    Comprueba con una sola llamada a sha256sum que los archivos remotos tengan
+    el contenido esperado.
+
+    Args:
+        checksums (dict): Diccionario {ruta_remota: sha256}.
+
+    Returns:
+        list: Rutas cuyo checksum no coincide.
+    """
+
+    if not checksums:
+        return []
+
+    rutas = " ".join(shlex.quote(ruta) for ruta in checksums)
+    _, stdout, _ = ssh_client.exec_command(f"sha256sum -- {rutas}")
+    salida = stdout.read().decode()
+
+    remotos = {}
+    for linea in salida.splitlines():
+        suma, _, ruta = linea.partition("  ")
+        remotos[ruta] = suma
+
+    return [ruta for ruta, suma in checksums.items() if remotos.get(ruta) != suma]
+
+
+def subir_archivos(ssh_client, archivos, nombre_nodo=None, registro=None):
+    """
+    Sube varios archivos en una sola sesión SFTP y verifica sus checksums.
+
+    Args:
+        archivos (list): Tuplas (origen, ruta_remota, modo). El origen puede ser
+            bytes, str o una ruta local (Path). El modo es opcional (None).
+        nombre_nodo (str): Nombre del nodo para los registros.
+        registro (logging.Logger): Logger donde se escribe el resumen.
+
+    Returns:
+        dict: Diccionario con las claves "bytes", "segundos" y "mb_s".
+
+    Raises:
+        IOError: Si algún archivo no coincide con su checksum tras la subida.
+    """
+
+    if registro is None:
+        registro = logger
+
+    nombre_nodo = nombre_nodo or ssh_client.get_transport().getpeername()[0]
+
+    inicio = time.monotonic()
+    total = 0
+    checksums = {}
+
+    # La conexión no debe cerrarse por inactividad durante una subida larga
+    with pool_ssh.en_uso(ssh_client):
+        sftp = abrir_sftp(ssh_client)
+
+        try:
+            for origen, ruta_remota, modo in archivos:
+                ruta_remota = _ruta_sftp(ruta_remota)
+
+                if isinstance(origen, Path):
+                    flujo = origen.open("rb")
+                elif isinstance(origen, str):
+                    flujo = io.BytesIO(origen.encode("utf-8"))
+                else:
+                    flujo = io.BytesIO(origen)
+
+                with flujo:
+                    escritos, suma = _escribir_archivo(sftp, flujo, ruta_remota, modo)
+
+                total += escritos
+                checksums[ruta_remota] = suma
+        finally:
+            sftp.close()
+
+        fallidos = verificar_checksums(ssh_client, checksums)
+
+    if fallidos:
+        raise IOError(f"Checksum incorrecto tras la subida a {nombre_nodo}: {fallidos}")
+
+    segundos = max(time.monotonic() - inicio, 1e-6)
+    mb_s = total / segundos / (1024 * 1024)
+
+    registro.info(
+        "Transferidos %s archivos (%.1f KB) a %s en %.2f s (%.2f MB/s)",
+        len(archivos),
+        total / 1024,
+        nombre_nodo,
+        segundos,
+        mb_s,
+    )
+
+    return {"bytes": total, "segundos": segundos, "mb_s": mb_s}
+
+
+async def subir_archivos_async(conexion, archivos, nombre_nodo, registro=None):
+    """
+    Variante asíncrona de subir_archivos sobre una conexión asyncssh. Cada
+    archivo se escribe de forma atómica (temporal y renombrado) y los
+    checksums se verifican con una sola llamada a sha256sum.
+
+    Args:
+        archivos (list): Tuplas (origen, ruta_remota, modo), como en
+            subir_archivos.
+
+    Returns:
+        dict: Diccionario con las claves "bytes", "segundos" y "mb_s".
+
+    Raises:
+        IOError: Si algún archivo no coincide con su checksum tras la subida.
+    """
+
+    if registro is None:
+        registro = logger
+
+    inicio = time.monotonic()
+    total = 0
+    checksums = {}
+
+    async with conexion.start_sftp_client() as sftp:
+        for origen, ruta_remota, modo in archivos:
+            ruta_remota = _ruta_sftp(ruta_remota)
+            ruta_temporal = ruta_remota + ".tmp"
+
+            if isinstance(origen, Path):
+                datos = origen.read_bytes()
+            elif isinstance(origen, str):
+                datos = origen.encode("utf-8")
+            else:
+                datos = bytes(origen)
+
+            async with sftp.open(ruta_temporal, "wb") as archivo_remoto:
+                await archivo_remoto.write(datos)
+
+            if modo is not None:
+                await sftp.chmod(ruta_temporal, modo)
+
+            await sftp.posix_rename(ruta_temporal, ruta_remota)
+
+            total += len(datos)
+            checksums[ruta_remota] = hashlib.sha256(datos).hexdigest()
+
+    rutas = " ".join(shlex.quote(ruta) for ruta in checksums)
+    resultado = await conexion.run(f"sha256sum -- {rutas}")
+
+    remotos = {}
+    for linea in resultado.stdout.splitlines():
+        suma, _, ruta = linea.partition("  ")
+        remotos[ruta] = suma
+
+    fallidos = [ruta for ruta, suma in checksums.items() if remotos.get(ruta) != suma]
+    if fallidos:
+        raise IOError(f"Checksum incorrecto tras la subida a {nombre_nodo}: {fallidos}")
+
+    segundos = max(time.monotonic() - inicio, 1e-6)
+    mb_s = total / segundos / (1024 * 1024)
+
+    registro.info(
+        "Transferidos %s archivos (%.1f KB) a %s en %.2f s (%.2f MB/s)",
+        len(archivos),
+        total / 1024,
+        nombre_nodo,
+        segundos,
+        mb_s,
+    )
+
+    return {"bytes": total, "segundos": segundos, "mb_s": mb_s}
+
+
+def subir_archivo(
+    ssh_client, origen, ruta_remota, modo=None, nombre_nodo=None, registro=None
+):
+    """
+    Sube un único archivo por SFTP y verifica su checksum.
+    """
+
+    return subir_archivos(
+        ssh_client, [(origen, ruta_remota, modo)], nombre_nodo, registro
+    )
+
+
+def subir_directorio(
+    ssh_client,
+    ruta_local,
+    ruta_remota,
+    nombres=None,
+    transformar=None,
+    modo=None,
+    nombre_nodo=None,
+    registro=None,
+):
+    """
+    Sube los archivos de un directorio local (sin subdirectorios) en una sola
+    sesión SFTP, creando el directorio remoto si no existe.
+
+    Args:
+        nombres (list): Archivos que se suben, en orden. Por defecto, todos.
+        transformar (callable): Función (nombre, contenido) -> contenido que se
+            aplica al texto de cada archivo antes de subirlo, por ejemplo para
+            renderizar una plantilla.
+        modo (int): Permisos de los archivos remotos. Por defecto, los del
+            archivo local.
+
+    Returns:
+        list: Las rutas remotas de los archivos subidos, en el mismo orden.
+    """
+
+    ruta_local = Path(ruta_local)
+
+    if nombres is None:
+        nombres = sorted(
+            ruta_archivo.name
+            for ruta_archivo in ruta_local.iterdir()
+            if ruta_archivo.is_file()
+        )
+
+    _, stdout, _ = ssh_client.exec_command(
+        f"mkdir -p {shlex.quote(_ruta_sftp(ruta_remota))}"
+    )
+    stdout.channel.recv_exit_status()
+
+    archivos = []
+
+    for nombre in nombres:
+        ruta_archivo = ruta_local / nombre
+        origen = ruta_archivo
+        if transformar is not None:
+            origen = transformar(nombre, ruta_archivo.read_text(encoding="utf-8"))
+
+        archivos.append(
+            (
+                origen,
+                posixpath.join(ruta_remota, nombre),
+                modo if modo is not None else ruta_archivo.stat().st_mode & 0o777,
+            )
+        )
+
+    subir_archivos(ssh_client, archivos, nombre_nodo, registro)
+
+    return [ruta for _, ruta, _ in archivos]
@@ -1,12 +1,11 @@
 import argparse
+import atexit
 import logging
 import sys
-import time
 
-from azure.identity import DefaultAzureCredential
-from cloudflare import Cloudflare
-
-from auth.autenticacion import ClienteAzure
+# Solo se importan aquí módulos ligeros. Los SDK de Azure y Cloudflare y las
+# funciones del clúster se importan dentro de cada comando, para que --help o
+# --configurar-devops no paguen su tiempo de carga.
 from config.configuraciones import (
     GRUPO_RECURSOS,
     GRUPO_RECURSOS_VNET,
@@ -23,34 +22,119 @@ from config.configuraciones import (
     USERNAME,
     RUTA_SCRIPTS_DEPENDENCIAS,
     CLOUDFLARE_TOKEN,
+    CLOUDFLARE_URL_API,
     ZONA_DNS,
     PATRON_DNS,
     ZONA_DNS_ID,
     CLAVE_PRIVADA_DEVOPS,
+    MAX_CONCURRENCIA,
+    MAX_CONCURRENCIA_ASYNC,
+    MOTOR_ORQUESTACION,
+    IMAGEN_DORADA,
 )
 from config.registros import setup_logging
-from func.funciones_cluster import (
-    crear_cluster,
-    eliminar_cluster,
-    instalar_dependencias_cluster,
-    iniciar_nodos_cluster,
-    actualizar_dns,
-    configurar_driver_devops,
-)
-
-setup_logging()
 
 logger = logging.getLogger(__name__)
 
+_cliente_azure = None
+
+
+def obtener_cliente_azure():
+    """
+    Devuelve el cliente de Azure del proceso, creándolo la primera vez.
+
+    Así todas las fases de una orquestación comparten credencial, clientes
+    de gestión y conexiones HTTP. El cliente se cierra al terminar el
+    proceso.
+    """
+    global _cliente_azure
+
+    if _cliente_azure is None:
+        from azure.identity import DefaultAzureCredential
+
+        from auth.autenticacion import ClienteAzure
+
+        cred = DefaultAzureCredential()
+        _cliente_azure = ClienteAzure(credencial=cred, id_suscripcion=ID_SUSRCIPCION)
+        atexit.register(_cliente_azure.cerrar)
+
+    return _cliente_azure
+
+
+def obtener_cliente_cloudflare():
+    """
+    Crea el cliente de Cloudflare. Con CLOUDFLARE_URL_API se puede apuntar a
+    otra API, por ejemplo dev/cloudflare_local.py.
+    """
+    from cloudflare import Cloudflare
+
+    return Cloudflare(api_token=CLOUDFLARE_TOKEN, base_url=CLOUDFLARE_URL_API)
+
+
+def referencia_imagen_dorada(cliente_azure):
+    """
+    Devuelve la referencia de la imagen dorada si IMAGEN_DORADA está definida
+    y la imagen existe. En otro caso se usa la imagen del marketplace.
+    """
+
+    if not IMAGEN_DORADA:
+        return None
+
+    from func.imagenes import obtener_imagen_dorada
+
+    referencia = obtener_imagen_dorada(cliente_azure, GRUPO_RECURSOS, IMAGEN_DORADA)
+
+    if referencia is None:
+        logger.warning(
+            "La imagen %s no existe, créala con --crear-imagen. Se instalarán "
+            "todas las dependencias en cada nodo.",
+            IMAGEN_DORADA,
+        )
+    else:
+        logger.info("Usando la imagen dorada: %s", referencia["id"])
+
+    return referencia
+
+
+def crear_imagen():
+    """
+    Crea la imagen dorada con las dependencias instaladas.
+    """
+
+    if not IMAGEN_DORADA:
+        logger.error("Define IMAGEN_DORADA en el archivo .env para crear la imagen.")
+        sys.exit(1)
+
+    from func.funciones_cluster import SISTEMA_OPERATIVO_POR_DEFECTO
+    from func.imagenes import crear_imagen_dorada
+
+    logger.info("Creando la imagen dorada: %s", IMAGEN_DORADA)
+    crear_imagen_dorada(
+        cliente_azure=obtener_cliente_azure(),
+        nombre_imagen=IMAGEN_DORADA,
+        tamanio_instancia=TAMANIO_INSTANCIA_DRIVER,
+        grupo_recursos=GRUPO_RECURSOS,
+        nombre_red_virtual=NOMBRE_RED_VIRTUAL,
+        nombre_subred=NOMBRE_SUBRED,
+        nombre_clave_ssh=NOMBRE_CLAVE_SSH,
+        region=REGION,
+        username=USERNAME,
+        ip_publica=IP_PUBLICA,
+        ruta_scripts=RUTA_SCRIPTS_DEPENDENCIAS,
+        sistema_operativo=SISTEMA_OPERATIVO_POR_DEFECTO,
+        grupo_recursos_vnet=GRUPO_RECURSOS_VNET,
+    )
+
 
 def crear_recurso():
     """
     Crea un cluster según las configuraciones definidas en .env
     """
 
+    from func.funciones_cluster import crear_cluster
+
     logger.info("Creando cluster")
-    cred = DefaultAzureCredential()
-    cliente_azure = ClienteAzure(credencial=cred, id_suscripcion=ID_SUSRCIPCION)
+    cliente_azure = obtener_cliente_azure()
 
     crear_cluster(
         cliente_azure=cliente_azure,
@@ -66,27 +150,99 @@ def crear_recurso():
         grupo_recursos_vnet=GRUPO_RECURSOS_VNET,
         tamanio_instancia_worker=TAMANIO_INSTANCIA_WORKER,
         ip_publica=IP_PUBLICA,
+        sistema_operativo=referencia_imagen_dorada(cliente_azure),
+        max_concurrencia=MAX_CONCURRENCIA,
+    )
+
+
+def reconciliar_recurso():
+    """
+    Ajusta el clúster existente a las configuraciones definidas en .env,
+    creando, redimensionando o eliminando solo los nodos que difieren.
+    """
+
+    from func.reconciliacion import reconciliar_cluster
+
+    logger.info("Reconciliando cluster")
+    cliente_azure = obtener_cliente_azure()
+
+    reconciliar_cluster(
+        cliente_azure=cliente_azure,
+        nombre_base=NOMBRE_CLUSTER,
+        cantidad_nodos=NUMERO_NODOS,
+        tamanio_instancia_driver=TAMANIO_INSTANCIA_DRIVER,
+        grupo_recursos=GRUPO_RECURSOS,
+        nombre_red_virtual=NOMBRE_RED_VIRTUAL,
+        nombre_subred=NOMBRE_SUBRED,
+        nombre_clave_ssh=NOMBRE_CLAVE_SSH,
+        region=REGION,
+        username_driver=USERNAME,
+        grupo_recursos_vnet=GRUPO_RECURSOS_VNET,
+        tamanio_instancia_worker=TAMANIO_INSTANCIA_WORKER,
+        ip_publica=IP_PUBLICA,
+        sistema_operativo=referencia_imagen_dorada(cliente_azure),
+        max_concurrencia=MAX_CONCURRENCIA,
+    )
+
+
+def escalar_cluster(cantidad_workers):
+    """
+    Añade o elimina workers del clúster en marcha hasta tener cantidad_workers.
+    """
+
+    from func.escalado import escalar_workers
+
+    logger.info("Escalando el cluster a %s workers", cantidad_workers)
+    cliente_azure = obtener_cliente_azure()
+    imagen = referencia_imagen_dorada(cliente_azure)
+
+    escalar_workers(
+        cliente_azure=cliente_azure,
+        cf=obtener_cliente_cloudflare(),
+        cantidad_workers=cantidad_workers,
+        nombre_base=NOMBRE_CLUSTER,
+        tamanio_instancia_worker=TAMANIO_INSTANCIA_WORKER,
+        grupo_recursos=GRUPO_RECURSOS,
+        nombre_red_virtual=NOMBRE_RED_VIRTUAL,
+        nombre_subred=NOMBRE_SUBRED,
+        nombre_clave_ssh=NOMBRE_CLAVE_SSH,
+        region=REGION,
+        username=USERNAME,
+        ruta_scripts=RUTA_SCRIPTS_DEPENDENCIAS,
+        zona_dns=ZONA_DNS,
+        zona_dns_id=ZONA_DNS_ID,
+        patron_dns=PATRON_DNS,
+        grupo_recursos_vnet=GRUPO_RECURSOS_VNET,
+        sistema_operativo=imagen,
+        desde_imagen=imagen is not None,
+        max_concurrencia=MAX_CONCURRENCIA,
     )
 
 
 def eliminar_recurso():
     """
-    Elimina un cluster según las configuraciones definidas en los archivos .csv
+    Elimina un cluster según el estado guardado y las etiquetas de sus recursos
     """
+    from func.funciones_cluster import eliminar_cluster
+
     logger.info("Eliminando cluster")
-    cred = DefaultAzureCredential()
-    cliente_azure = ClienteAzure(credencial=cred, id_suscripcion=ID_SUSRCIPCION)
-    eliminar_cluster(cliente_azure=cliente_azure, grupo_recursos=GRUPO_RECURSOS)
+    cliente_azure = obtener_cliente_azure()
+    eliminar_cluster(
+        cliente_azure=cliente_azure,
+        grupo_recursos=GRUPO_RECURSOS,
+        id_cluster=NOMBRE_CLUSTER,
+    )
 
 
-def instalar_dependencias():
+def instalar_dependencias(esperar_disponibilidad=False):
     """
     Instala las dependencias en los nodos del clúster.
     """
+    from func.funciones_cluster import instalar_dependencias_cluster
+
     logger.info("Instalando dependencias en el cluster")
     logger.info(RUTA_SCRIPTS_DEPENDENCIAS)
-    cred = DefaultAzureCredential()
-    cliente_azure = ClienteAzure(credencial=cred, id_suscripcion=ID_SUSRCIPCION)
+    cliente_azure = obtener_cliente_azure()
     instalar_dependencias_cluster(
         cliente_azure,
         RUTA_SCRIPTS_DEPENDENCIAS,
@@ -94,6 +250,8 @@ def instalar_dependencias():
         ZONA_DNS,
         PATRON_DNS,
         GRUPO_RECURSOS,
+        esperar_disponibilidad=esperar_disponibilidad,
+        fase="configuracion" if referencia_imagen_dorada(cliente_azure) else None,
     )
 
 
@@ -101,43 +259,142 @@ def iniciar_cluster():
     """
     Inicia el clúster.
     """
+    from func.funciones_cluster import iniciar_nodos_cluster
+
     logger.info("Iniciando el cluster")
-    cred = DefaultAzureCredential()
-    cliente_azure = ClienteAzure(credencial=cred, id_suscripcion=ID_SUSRCIPCION)
+    cliente_azure = obtener_cliente_azure()
     iniciar_nodos_cluster(cliente_azure, NOMBRE_CLAVE_SSH, GRUPO_RECURSOS)
 
 
-def configurar_dns():
+def configurar_dns(forzar=False):
     """
     Configura los registros DNS para el clúster.
     """
+    from func.funciones_cluster import actualizar_dns
+
     logger.info("Configurando DNS para el cluster")
-    cf = Cloudflare(api_token=CLOUDFLARE_TOKEN)
-    cf.dns.records.list
-    actualizar_dns(cf, ZONA_DNS, ZONA_DNS_ID, PATRON_DNS)
+    cf = obtener_cliente_cloudflare()
+    actualizar_dns(cf, ZONA_DNS, ZONA_DNS_ID, PATRON_DNS, forzar=forzar)
 
 
 def configurar_devops():
     """
     Configura el entorno de DevOps para el clúster.
     """
+    from func.funciones_cluster import configurar_driver_devops
+
     logger.info("Configurando DevOps para el cluster")
     configurar_driver_devops(NOMBRE_CLAVE_SSH, CLAVE_PRIVADA_DEVOPS)
 
 
+async def orquestar_cluster_en_bucle(parametros):
+    """
+    Crea los clientes asíncronos de Azure y Cloudflare y ejecuta
+    orquestar_cluster_async en el bucle de eventos actual.
+    """
+    from azure.identity.aio import DefaultAzureCredential
+    from cloudflare import AsyncCloudflare
+
+    from auth.autenticacion import ClienteAzureAsync
+    from func.orquestador import orquestar_cluster_async
+
+    cf = AsyncCloudflare(api_token=CLOUDFLARE_TOKEN, base_url=CLOUDFLARE_URL_API)
+
+    try:
+        async with ClienteAzureAsync(
+            credencial=DefaultAzureCredential(), id_suscripcion=ID_SUSRCIPCION
+        ) as cliente_azure_async:
+            await orquestar_cluster_async(
+                cliente_azure=obtener_cliente_azure(),
+                cliente_azure_async=cliente_azure_async,
+                cf=cf,
+                max_concurrencia=MAX_CONCURRENCIA_ASYNC,
+                **parametros,
+            )
+
+            estadisticas = cliente_azure_async.estadisticas()
+            logger.info(
+                "Clientes asíncronos de Azure creados: %s, consultas servidas "
+                "desde la caché: %s, realizadas: %s",
+                estadisticas["clientes"],
+                estadisticas["consultas_cache"],
+                estadisticas["consultas_azure"],
+            )
+    finally:
+        await cf.close()
+
+
 def orquestador_cluster():
     """
     Orquesta las acciones a realizar sobre el clúster.
+
+    Cada nodo avanza por las fases (crear, instalar, iniciar, DNS) en cuanto
+    termina la anterior, sin esperar al resto de nodos.
+
+    Con MOTOR_ORQUESTACION="asyncio" todos los nodos avanzan en un único bucle
+    de eventos (orquestar_cluster_async); por defecto ("hilos"), cada nodo
+    ocupa un hilo.
     """
-    crear_recurso()
-    time.sleep(60)
-    instalar_dependencias()
-    time.sleep(15)
-    iniciar_cluster()
-    time.sleep(15)
-    configurar_dns()
-    time.sleep(15)
-    configurar_devops()
+    from func.conexiones_ssh import pool_ssh
+    from func.orquestador import orquestar_cluster
+
+    if MOTOR_ORQUESTACION not in ("hilos", "asyncio"):
+        raise ValueError(f"Motor de orquestación desconocido: {MOTOR_ORQUESTACION}")
+
+    logger.info("Orquestando el cluster")
+    imagen = referencia_imagen_dorada(obtener_cliente_azure())
+    parametros = dict(
+        nombre_base=NOMBRE_CLUSTER,
+        cantidad_nodos=NUMERO_NODOS,
+        tamanio_instancia_driver=TAMANIO_INSTANCIA_DRIVER,
+        tamanio_instancia_worker=TAMANIO_INSTANCIA_WORKER,
+        grupo_recursos=GRUPO_RECURSOS,
+        nombre_red_virtual=NOMBRE_RED_VIRTUAL,
+        nombre_subred=NOMBRE_SUBRED,
+        nombre_clave_ssh=NOMBRE_CLAVE_SSH,
+        region=REGION,
+        username=USERNAME,
+        ip_publica=IP_PUBLICA,
+        ruta_scripts=RUTA_SCRIPTS_DEPENDENCIAS,
+        zona_dns=ZONA_DNS,
+        zona_dns_id=ZONA_DNS_ID,
+        patron_dns=PATRON_DNS,
+        clave_devops=CLAVE_PRIVADA_DEVOPS,
+        grupo_recursos_vnet=GRUPO_RECURSOS_VNET,
+        sistema_operativo=imagen,
+        desde_imagen=imagen is not None,
+    )
+
+    if MOTOR_ORQUESTACION == "asyncio":
+        import asyncio
+
+        asyncio.run(orquestar_cluster_en_bucle(parametros))
+    else:
+        orquestar_cluster(
+            cliente_azure=obtener_cliente_azure(),
+            cf=obtener_cliente_cloudflare(),
+            max_concurrencia=MAX_CONCURRENCIA,
+            **parametros,
+        )
+
+    estadisticas = obtener_cliente_azure().estadisticas()
+    logger.info(
+        "Clientes de Azure creados: %s, conexiones HTTP abiertas: %s",
+        estadisticas["clientes"],
+        estadisticas["conexiones"],
+    )
+    logger.info(
+        "Consultas a Azure servidas desde la caché: %s, realizadas: %s",
+        estadisticas["consultas_cache"],
+        estadisticas["consultas_azure"],
+    )
+
+    estadisticas_ssh = pool_ssh.estadisticas()
+    logger.info(
+        "Conexiones SSH abiertas: %s, handshakes evitados por reutilización: %s",
+        estadisticas_ssh["handshakes"],
+        estadisticas_ssh["handshakes_evitados"],
+    )
 
 
 def main():
@@ -156,6 +413,17 @@ def main():
         action="store_true",
         help="Elimina un recurso existente.",
     )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="Ajusta el clúster existente a la configuración sin recrearlo.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        metavar="N",
+        help="Añade o elimina workers del clúster en marcha hasta tener N.",
+    )
     parser.add_argument(
         "--dependencias",
         action="store_true",
@@ -171,6 +439,11 @@ def main():
         action="store_true",
         help="Configura los registros DNS para el clúster.",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Con --configurar-dns, reescribe todos los registros aunque no hayan cambiado.",
+    )
     parser.add_argument(
         "--configurar-devops",
         action="store_true",
@@ -181,9 +454,16 @@ def main():
         action="store_true",
         help="Orquesta las acciones a realizar sobre el clúster.",
     )
+    parser.add_argument(
+        "--crear-imagen",
+        action="store_true",
+        help="Crea la imagen dorada con las dependencias instaladas.",
+    )
 
     args = parser.parse_args()
 
+    setup_logging()
+
     if args.crear and args.eliminar:
         logger.error("Error: No puedes usar --crear y --eliminar al mismo tiempo.")
         sys.exit(1)
@@ -191,16 +471,22 @@ def main():
         crear_recurso()
     elif args.eliminar:
         eliminar_recurso()
+    elif args.reconcile:
+        reconciliar_recurso()
+    elif args.scale is not None:
+        escalar_cluster(args.scale)
     elif args.dependencias:
         instalar_dependencias()
     elif args.iniciar:
         iniciar_cluster()
     elif args.configurar_dns:
-        configurar_dns()
+        configurar_dns(forzar=args.force)
     elif args.configurar_devops:
         configurar_devops()
     elif args.orquestar:
         orquestador_cluster()
+    elif args.crear_imagen:
+        crear_imagen()
     else:
         logger.warning("No se especificó ninguna acción. Usa --crear o --eliminar.")
         parser.print_help()
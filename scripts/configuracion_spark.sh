@@ -0,0 +1,24 @@
+#!/bin/bash
+
+# Configuración propia de cada nodo. Se ejecuta después de los scripts de
+# instalación y es el único script que se ejecuta en los nodos creados desde
+# la imagen dorada.
+
+# --- VARIABLES ---
+USER={{{USUARIO}}}
+HADOOP_HOME="/usr/local/hadoop"
+
+# --- Configuramos spark-env.sh
+sudo tee  /opt/spark/conf/spark-env.sh > /dev/null <<EOL
+export HADOOP_CONF_DIR=$HADOOP_HOME/etc/hadoop
+{{{LINEA_CONFIG_1}}}
+{{{LINEA_CONFIG_2}}}
+{{{LINEA_CONFIG_3}}}
+EOL
+
+if [ $? -ne 0 ]; then
+  echo "Error: No se pudo configurar spark-env.sh."
+  exit 1
+fi
+
+echo "Configuración de Spark completada."
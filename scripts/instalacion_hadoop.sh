@@ -53,9 +53,14 @@ java -version
 echo "--- Iniciando la instalación automática de Hadoop ---"
 
 # 3. Descargar y extraer Hadoop
-echo "Descargando Hadoop..."
-wget -P /tmp $HADOOP_URL
-check_success "No se pudo descargar Hadoop."
+# Si el archivo ya fue distribuido y su checksum coincide no se descarga
+if [ -f /tmp/hadoop-$HADOOP_VERSION.tar.gz.sha256 ] && sha256sum -c --status /tmp/hadoop-$HADOOP_VERSION.tar.gz.sha256; then
+  echo "Hadoop ya está descargado, se omite la descarga."
+else
+  echo "Descargando Hadoop..."
+  wget -O /tmp/hadoop-$HADOOP_VERSION.tar.gz $HADOOP_URL
+  check_success "No se pudo descargar Hadoop."
+fi
 
 echo "Extrayendo Hadoop y moviéndolo a /usr/local..."
 sudo tar -xzf /tmp/hadoop-$HADOOP_VERSION.tar.gz -C /usr/local/
@@ -16,9 +16,14 @@ check_success() {
 
 
 # --- Descargamos spark
-echo "Descargando Spark..."
-wget -P /tmp $SPARK_URL
-check_success "No se pudo descargar Spark."
+# Si el archivo ya fue distribuido y su checksum coincide no se descarga
+if [ -f /tmp/spark-$SPARK_VERSION-bin-hadoop3.tgz.sha256 ] && sha256sum -c --status /tmp/spark-$SPARK_VERSION-bin-hadoop3.tgz.sha256; then
+  echo "Spark ya está descargado, se omite la descarga."
+else
+  echo "Descargando Spark..."
+  wget -O /tmp/spark-$SPARK_VERSION-bin-hadoop3.tgz $SPARK_URL
+  check_success "No se pudo descargar Spark."
+fi
 
 echo "Extrayendo Spark y moviéndolo a /opt..."
 sudo tar -xzf /tmp/spark-3.5.4-bin-hadoop3.tgz -C /opt/
@@ -32,12 +37,5 @@ echo "export YARN_CONF_DIR=\$HADOOP_HOME/etc/hadoop" >> /home/$USER/.bashrc
 
 source /home/$USER/.bashrc
 
-# --- Configuramos spark-env.sh
-sudo tee  /opt/spark/conf/spark-env.sh > /dev/null <<EOL
-export HADOOP_CONF_DIR=$HADOOP_HOME/etc/hadoop
-{{{LINEA_CONFIG_1}}}
-{{{LINEA_CONFIG_2}}}
-{{{LINEA_CONFIG_3}}}
-EOL
-
-echo "Configuración de Spark completada."
\ No newline at end of file
+# La configuración propia de cada nodo está en configuracion_spark.sh
+echo "Instalación de Spark completada."
\ No newline at end of file
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Las pruebas importan los módulos del proyecto (config, func) y el servidor
+# de dev/ como lo hace main.py, desde la raíz del repositorio
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(RAIZ / "dev"))
@@ -0,0 +1,86 @@
+import pytest
+
+from func.aprovisionamiento import (
+    DELIMITADOR,
+    DIRECTORIO_MARCADORES,
+    DIRECTORIO_SCRIPTS_ARRANQUE,
+    generar_script_arranque,
+)
+
+
+@pytest.fixture
+def ruta_scripts(tmp_path):
+    (tmp_path / "instalacion_spark.sh").write_text(
+        "#!/bin/bash\necho instalar para {{{USUARIO}}}\n", encoding="utf-8"
+    )
+    (tmp_path / "configuracion_spark.sh").write_text(
+        "#!/bin/bash\n{{{LINEA_CONFIG_1}}}\n{{{LINEA_CONFIG_2}}}\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "instalacion_hadoop.sh").write_text(
+        "#!/bin/bash\necho hadoop\n", encoding="utf-8"
+    )
+    (tmp_path / "notas.txt").write_text("no es un script", encoding="utf-8")
+    return tmp_path
+
+
+def generar(ruta_scripts, tipo_nodo="Worker", nombre_nodo="spark-worker-2", fase=None):
+    return generar_script_arranque(
+        ruta_scripts,
+        usuario="azureuser",
+        tipo_nodo=tipo_nodo,
+        nombre_nodo=nombre_nodo,
+        ip_privada_vm="10.0.0.5",
+        zona_dns="ejemplo.com",
+        patron_dns="spark",
+        fase=fase,
+    )
+
+
+def test_generar_script_arranque_ejecuta_la_configuracion_al_final(ruta_scripts):
+    script = generar(ruta_scripts)
+
+    assert script.startswith("#!/bin/bash\n")
+    assert (
+        "for script in instalacion_hadoop.sh instalacion_spark.sh "
+        "configuracion_spark.sh; do"
+    ) in script
+    assert "notas.txt" not in script
+    assert script.rstrip().endswith(f"touch {DIRECTORIO_MARCADORES}/completado")
+    assert f"> {DIRECTORIO_MARCADORES}/fallido" in script
+
+
+def test_generar_script_arranque_renderiza_cada_script(ruta_scripts):
+    script = generar(ruta_scripts)
+
+    assert (
+        f"cat > {DIRECTORIO_SCRIPTS_ARRANQUE}/instalacion_spark.sh <<'{DELIMITADOR}'\n"
+        "#!/bin/bash\necho instalar para azureuser\n"
+        f"{DELIMITADOR}\n"
+    ) in script
+    assert "export SPARK_LOCAL_IP=10.0.0.5" in script
+    assert "export SPARK_PUBLIC_DNS=spark.worker.2.ejemplo.com" in script
+    assert "{{{" not in script
+
+
+def test_generar_script_arranque_del_master(ruta_scripts):
+    script = generar(ruta_scripts, tipo_nodo="Master", nombre_nodo="spark-master")
+
+    assert "export SPARK_DRIVER_BIND_ADDRESS=0.0.0.0" in script
+    assert "export SPARK_DRIVER_HOST=10.0.0.5" in script
+
+
+def test_generar_script_arranque_solo_configuracion(ruta_scripts):
+    script = generar(ruta_scripts, fase="configuracion")
+
+    assert "for script in configuracion_spark.sh; do" in script
+    assert "instalacion_" not in script
+
+
+def test_generar_script_arranque_rechaza_scripts_con_el_delimitador(ruta_scripts):
+    (ruta_scripts / "instalacion_spark.sh").write_text(
+        f"cat <<{DELIMITADOR}\n{DELIMITADOR}\n", encoding="utf-8"
+    )
+
+    with pytest.raises(ValueError, match="contiene el delimitador"):
+        generar(ruta_scripts)
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+from func.concurrencia import ejecutar_grafo, ejecutar_pasos, ejecutar_pasos_async
+
+
+def test_ejecutar_grafo_pasa_los_resultados_de_las_dependencias():
+    resultados = ejecutar_grafo(
+        {
+            "a": (lambda _: 1, []),
+            "b": (lambda _: 2, []),
+            "suma": (
+                lambda dependencias: dependencias["a"] + dependencias["b"],
+                ["a", "b"],
+            ),
+            "doble": (lambda dependencias: dependencias["suma"] * 2, ["suma"]),
+        }
+    )
+
+    assert resultados == {"a": 1, "b": 2, "suma": 3, "doble": 6}
+
+
+def test_ejecutar_grafo_lanza_a_la_vez_las_tareas_independientes():
+    # Cada tarea espera a la otra: solo terminan si se ejecutan a la vez
+    barrera = threading.Barrier(2, timeout=5)
+
+    def esperar_a_la_otra(_):
+        barrera.wait()
+        return True
+
+    resultados = ejecutar_grafo(
+        {"a": (esperar_a_la_otra, []), "b": (esperar_a_la_otra, [])},
+        max_concurrencia=2,
+    )
+
+    assert resultados == {"a": True, "b": True}
+
+
+def test_ejecutar_grafo_no_lanza_una_tarea_antes_que_sus_dependencias():
+    orden = []
+
+    def registrar(nombre):
+        def tarea(_):
+            orden.append(nombre)
+
+        return tarea
+
+    ejecutar_grafo(
+        {
+            "vm": (registrar("vm"), ["nic"]),
+            "nic": (registrar("nic"), ["ip"]),
+            "ip": (registrar("ip"), []),
+        }
+    )
+
+    assert orden == ["ip", "nic", "vm"]
+
+
+def test_ejecutar_grafo_rechaza_dependencias_inexistentes():
+    with pytest.raises(ValueError, match="inexistentes"):
+        ejecutar_grafo({"a": (lambda _: 1, ["b"])})
+
+
+def test_ejecutar_grafo_rechaza_ciclos():
+    with pytest.raises(ValueError, match="cíclicas"):
+        ejecutar_grafo({"a": (lambda _: 1, ["b"]), "b": (lambda _: 2, ["a"])})
+
+
+def test_ejecutar_grafo_propaga_el_error_de_una_tarea():
+    def fallar(_):
+        raise RuntimeError("sin cuota")
+
+    with pytest.raises(RuntimeError, match="sin cuota"):
+        ejecutar_grafo({"a": (fallar, []), "b": (lambda _: 1, ["a"])})
+
+
+def pasos_con_recuperacion(operacion):
+    try:
+        valor = yield operacion
+    except RuntimeError:
+        valor = "recuperado"
+    return valor
+
+
+def test_ejecutar_pasos_devuelve_el_valor_del_generador():
+    assert ejecutar_pasos(pasos_con_recuperacion(3)) == 3
+
+
+def test_ejecutar_pasos_async_espera_cada_operacion():
+    async def operacion():
+        return 3
+
+    assert asyncio.run(ejecutar_pasos_async(pasos_con_recuperacion(operacion()))) == 3
+
+
+def test_ejecutar_pasos_async_lanza_los_errores_dentro_del_generador():
+    async def operacion():
+        raise RuntimeError("falló")
+
+    resultado = asyncio.run(ejecutar_pasos_async(pasos_con_recuperacion(operacion())))
+
+    assert resultado == "recuperado"
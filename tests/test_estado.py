@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from func import estado
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    # Los .csv anteriores se buscan en el directorio de trabajo
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_leer_estado_sin_archivos_devuelve_un_estado_vacio(directorio):
+    assert estado.leer_estado("estado_cluster.json") == estado.estado_vacio()
+    assert not (directorio / "estado_cluster.json").exists()
+
+
+def test_leer_estado_migra_los_csv_anteriores(directorio):
+    (directorio / estado.CSV_NODOS).write_text(
+        "Nombre,IP,Usuario,TipoNodo,IPPrivada\n"
+        "spark-master,20.0.0.1,azureuser,Master,10.0.0.4\n"
+        "spark-worker-1,,azureuser,Worker,\n",
+        encoding="utf-8",
+    )
+    (directorio / estado.CSV_GRUPOS_SEGURIDAD).write_text(
+        "Nombre\nspark-driver-nsg\nspark-worker-nsg\n", encoding="utf-8"
+    )
+
+    migrado = estado.leer_estado("estado_cluster.json")
+
+    assert migrado["version"] == estado.VERSION_ESTADO
+    assert migrado["tipos"] == {
+        "Master": ["spark-master"],
+        "Worker": ["spark-worker-1"],
+    }
+    assert migrado["nodos"]["spark-master"] == {
+        "nombre": "spark-master",
+        "ip": "20.0.0.1",
+        "usuario": "azureuser",
+        "tipo_nodo": "Master",
+        "ip_privada": "10.0.0.4",
+        "ids": {tipo: None for tipo in estado.TIPOS_RECURSO},
+    }
+    # Las celdas vacías se guardan como None
+    assert migrado["nodos"]["spark-worker-1"]["ip"] is None
+    assert migrado["nodos"]["spark-worker-1"]["ip_privada"] is None
+    assert migrado["grupos_seguridad"] == {
+        "spark-driver-nsg": None,
+        "spark-worker-nsg": None,
+    }
+
+    # El estado queda en JSON y los .csv se conservan renombrados
+    guardado = json.loads((directorio / "estado_cluster.json").read_text("utf-8"))
+    assert guardado == migrado
+    assert not (directorio / estado.CSV_NODOS).exists()
+    assert (directorio / (estado.CSV_NODOS + ".migrado")).exists()
+    assert (directorio / (estado.CSV_GRUPOS_SEGURIDAD + ".migrado")).exists()
+
+
+def test_leer_estado_migra_csv_sin_ip_privada(directorio):
+    # Las versiones más antiguas no guardaban la IP privada
+    (directorio / estado.CSV_NODOS).write_text(
+        "Nombre,IP,Usuario,TipoNodo\nspark-master,20.0.0.1,azureuser,Master\n",
+        encoding="utf-8",
+    )
+
+    migrado = estado.leer_estado("estado_cluster.json")
+
+    assert migrado["nodos"]["spark-master"]["ip_privada"] is None
+    assert migrado["grupos_seguridad"] == {}
+
+
+def test_leer_estado_prefiere_el_json_a_los_csv(directorio):
+    estado.escribir_estado(estado.estado_vacio(), "estado_cluster.json")
+    (directorio / estado.CSV_NODOS).write_text(
+        "Nombre,IP,Usuario,TipoNodo\nspark-master,20.0.0.1,azureuser,Master\n",
+        encoding="utf-8",
+    )
+
+    assert estado.leer_estado("estado_cluster.json")["nodos"] == {}
+    assert (directorio / estado.CSV_NODOS).exists()
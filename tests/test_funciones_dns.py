@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+
+import pytest
+
+from cloudflare_local import iniciar_servidor
+from func.funciones_dns import planificar_sincronizacion_dns, sincronizar_dns
+
+ZONA = "zona-prueba"
+
+
+def registro_existente(id_registro, contenido, ttl=120, comment="SparkClusterSdk"):
+    return SimpleNamespace(
+        id=id_registro,
+        type="A",
+        content=contenido,
+        proxied=False,
+        ttl=ttl,
+        comment=comment,
+    )
+
+
+def test_planificar_sincronizacion_dns_crea_actualiza_y_omite():
+    existentes = {
+        "master.ejemplo.com": registro_existente("1", "10.0.0.1"),
+        "worker-1.ejemplo.com": registro_existente("2", "10.0.0.2"),
+        "worker-2.ejemplo.com": registro_existente("3", "10.0.0.3", ttl=1),
+    }
+
+    plan = planificar_sincronizacion_dns(
+        {
+            "master.ejemplo.com": "10.0.0.1",
+            "worker-1.ejemplo.com": "10.0.0.20",
+            "worker-2.ejemplo.com": "10.0.0.3",
+            "worker-3.ejemplo.com": "10.0.0.4",
+        },
+        existentes,
+    )
+
+    assert plan["sin_cambios"] == ["master.ejemplo.com"]
+    assert [(c["id"], c["content"]) for c in plan["actualizar"]] == [
+        ("2", "10.0.0.20"),
+        # Mismo contenido, pero otro ttl
+        ("3", "10.0.0.3"),
+    ]
+    assert [c["name"] for c in plan["crear"]] == ["worker-3.ejemplo.com"]
+    assert plan["eliminar"] == []
+
+
+def test_planificar_sincronizacion_dns_con_forzar_actualiza_los_existentes():
+    existentes = {"master.ejemplo.com": registro_existente("1", "10.0.0.1")}
+
+    plan = planificar_sincronizacion_dns(
+        {"master.ejemplo.com": "10.0.0.1"}, existentes, forzar=True
+    )
+
+    assert [c["id"] for c in plan["actualizar"]] == ["1"]
+    assert plan["sin_cambios"] == []
+
+
+def test_planificar_sincronizacion_dns_solo_elimina_los_sobrantes_indicados():
+    existentes = {
+        "worker-5.ejemplo.com": registro_existente("5", "10.0.0.5"),
+        "worker-4.ejemplo.com": registro_existente("4", "10.0.0.4"),
+        "web.ejemplo.com": registro_existente("9", "10.0.0.9"),
+    }
+
+    plan = planificar_sincronizacion_dns(
+        {},
+        existentes,
+        es_sobrante=lambda nombre: nombre.startswith("worker-"),
+    )
+
+    assert plan["eliminar"] == [
+        {"id": "4", "name": "worker-4.ejemplo.com"},
+        {"id": "5", "name": "worker-5.ejemplo.com"},
+    ]
+
+
+@pytest.fixture
+def api_cloudflare():
+    """
+    Cliente de Cloudflare contra el servidor local de dev/cloudflare_local.py.
+    """
+
+    cloudflare = pytest.importorskip("cloudflare")
+
+    servidor, api, url_base = iniciar_servidor()
+    try:
+        yield cloudflare.Cloudflare(api_token="token-de-prueba", base_url=url_base), api
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_sincronizar_dns_no_escribe_si_nada_ha_cambiado(api_cloudflare):
+    cf, api = api_cloudflare
+    deseados = {
+        "spark-master.ejemplo.com": "20.0.0.1",
+        "spark-worker-1.ejemplo.com": "20.0.0.2",
+    }
+
+    plan = sincronizar_dns(cf, ZONA, "spark-", deseados)
+
+    assert len(plan["crear"]) == 2
+    assert plan["fallidos"] == []
+    assert api.peticiones == {"GET": 1, "POST": 1}
+
+    plan = sincronizar_dns(cf, ZONA, "spark-", deseados)
+
+    assert sorted(plan["sin_cambios"]) == sorted(deseados)
+    assert api.peticiones == {"GET": 2, "POST": 1}
+
+
+def test_sincronizar_dns_actualiza_y_elimina_en_un_lote(api_cloudflare):
+    cf, api = api_cloudflare
+    sincronizar_dns(
+        cf,
+        ZONA,
+        "spark-",
+        {
+            "spark-master.ejemplo.com": "20.0.0.1",
+            "spark-worker-1.ejemplo.com": "20.0.0.2",
+            "spark-worker-2.ejemplo.com": "20.0.0.3",
+        },
+    )
+
+    plan = sincronizar_dns(
+        cf,
+        ZONA,
+        "spark-",
+        {
+            "spark-master.ejemplo.com": "20.0.0.10",
+            "spark-worker-1.ejemplo.com": "20.0.0.2",
+        },
+        es_sobrante=lambda nombre: True,
+    )
+
+    assert [c["name"] for c in plan["actualizar"]] == ["spark-master.ejemplo.com"]
+    assert [c["name"] for c in plan["eliminar"]] == ["spark-worker-2.ejemplo.com"]
+    assert api.peticiones["POST"] == 2
+    assert "PATCH" not in api.peticiones and "DELETE" not in api.peticiones
+    assert sorted(
+        (registro["name"], registro["content"])
+        for registro in api.registros[ZONA].values()
+    ) == [
+        ("spark-master.ejemplo.com", "20.0.0.10"),
+        ("spark-worker-1.ejemplo.com", "20.0.0.2"),
+    ]
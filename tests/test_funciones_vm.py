@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import pytest
+
+from func.funciones_vm import compilar_reglas_cortafuegos, validar_reglas_cortafuegos
+
+
+def regla(nombre, prioridad, direccion="Inbound"):
+    return SimpleNamespace(name=nombre, priority=prioridad, direction=direccion)
+
+
+def test_validar_reglas_cortafuegos_acepta_reglas_validas():
+    validar_reglas_cortafuegos(
+        [
+            regla("ssh", 100),
+            regla("spark", 110),
+            # La misma prioridad en otra dirección no es un conflicto
+            regla("salida", 100, "Outbound"),
+        ]
+    )
+
+
+@pytest.mark.parametrize("prioridad", [99, 4097, "100", None])
+def test_validar_reglas_cortafuegos_rechaza_prioridades_fuera_de_rango(prioridad):
+    with pytest.raises(ValueError, match="debe estar entre 100 y 4096"):
+        validar_reglas_cortafuegos([regla("ssh", prioridad)])
+
+
+def test_validar_reglas_cortafuegos_rechaza_nombres_repetidos():
+    with pytest.raises(ValueError, match="ssh está repetida"):
+        validar_reglas_cortafuegos([regla("ssh", 100), regla("ssh", 110)])
+
+
+def test_validar_reglas_cortafuegos_rechaza_prioridades_repetidas():
+    # Las direcciones de Azure pueden ser enums; se comparan por su valor
+    entrada = SimpleNamespace(value="Inbound")
+
+    with pytest.raises(ValueError, match="misma prioridad"):
+        validar_reglas_cortafuegos(
+            [regla("ssh", 100, entrada), regla("spark", 100, "inbound")]
+        )
+
+
+def test_compilar_reglas_cortafuegos_rechaza_reglas_incompletas():
+    with pytest.raises(ValueError, match="le faltan las claves"):
+        compilar_reglas_cortafuegos([{"nombre": "ssh", "prioridad": 100}])
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+
+from func.orquestador import TiemposFases
+
+
+def test_tiempos_fases_registra_cada_fase_y_avisa_al_terminar():
+    avisos = []
+    tiempos = TiemposFases(al_terminar_fase=lambda *aviso: avisos.append(aviso))
+
+    with tiempos.fase("spark-master", "crear"):
+        pass
+    with tiempos.fase("spark-master", "disponible"):
+        pass
+
+    fases = tiempos.tiempos["spark-master"]
+    assert list(fases) == ["crear", "disponible"]
+    inicio_crear, fin_crear, resultado_crear = fases["crear"]
+    assert 0 <= inicio_crear <= fin_crear <= fases["disponible"][0]
+    assert resultado_crear is True
+    assert avisos == [
+        ("spark-master", "crear", True),
+        ("spark-master", "disponible", True),
+    ]
+
+
+def test_tiempos_fases_registra_como_fallida_la_fase_que_lanza():
+    avisos = []
+    tiempos = TiemposFases(al_terminar_fase=lambda *aviso: avisos.append(aviso))
+
+    with pytest.raises(RuntimeError):
+        with tiempos.fase("spark-worker-1", "instalar"):
+            raise RuntimeError("falló un script")
+
+    assert tiempos.tiempos["spark-worker-1"]["instalar"][2] is False
+    assert avisos == [("spark-worker-1", "instalar", False)]
+
+
+def test_tiempos_fases_no_falla_si_el_aviso_falla(caplog):
+    def fallar(*_):
+        raise OSError("disco lleno")
+
+    tiempos = TiemposFases(al_terminar_fase=fallar)
+
+    with caplog.at_level(logging.WARNING):
+        with tiempos.fase("spark-master", "dns"):
+            pass
+
+    assert tiempos.tiempos["spark-master"]["dns"][2] is True
+    assert "No se pudo registrar la fase dns de spark-master" in caplog.text
+
+
+def test_tiempos_fases_resumen_indica_el_camino_critico(caplog):
+    tiempos = TiemposFases()
+    tiempos.tiempos = {
+        "spark-master": {"crear": (0.0, 60.0, True), "instalar": (60.0, 200.0, True)},
+        "spark-worker-1": {
+            "crear": (0.0, 90.0, True),
+            "instalar": (90.0, 150.0, False),
+        },
+    }
+
+    with caplog.at_level(logging.INFO):
+        tiempos.registrar_resumen()
+
+    assert "Tiempos de spark-worker-1: crear=90.0s, instalar=60.0s (error)" in (
+        caplog.text
+    )
+    assert (
+        "Camino crítico: spark-master terminó en 200.0 s; su fase más larga fue "
+        "'instalar' (140.0 s)"
+    ) in caplog.text
@@ -0,0 +1,74 @@
+from func.funciones_cluster import especificaciones_nodos
+from func.reconciliacion import planificar_cambios
+
+
+def especificaciones(cantidad_nodos, tamanio_worker="Standard_D2s_v3"):
+    return especificaciones_nodos(
+        nombre_base="spark",
+        cantidad_nodos=cantidad_nodos,
+        tamanio_instancia_driver="Standard_D4s_v3",
+        tamanio_instancia_worker=tamanio_worker,
+        username_driver="azureuser",
+        username_worker="azureuser",
+        grupo_seguridad_driver="spark-driver-nsg",
+        grupo_seguridad_worker="spark-worker-nsg",
+    )
+
+
+def existente(nombre, tipo_nodo, tamanio_instancia):
+    return {
+        "nombre": nombre,
+        "tipo_nodo": tipo_nodo,
+        "tamanio_instancia": tamanio_instancia,
+    }
+
+
+def test_planificar_cambios_sin_nodos_crea_todos():
+    plan = planificar_cambios(especificaciones(2), {})
+
+    assert [e["nombre"] for e in plan["crear"]] == [
+        "spark-master",
+        "spark-worker-1",
+        "spark-worker-2",
+    ]
+    assert plan["redimensionar"] == plan["eliminar"] == plan["sin_cambios"] == []
+
+
+def test_planificar_cambios_compara_tamanios_sin_distinguir_mayusculas():
+    existentes = {
+        "spark-master": existente("spark-master", "Master", "standard_d4s_v3"),
+        "spark-worker-1": existente("spark-worker-1", "Worker", "Standard_D2s_v3"),
+    }
+
+    plan = planificar_cambios(especificaciones(1), existentes)
+
+    assert plan["crear"] == plan["redimensionar"] == plan["eliminar"] == []
+    assert plan["sin_cambios"] == ["spark-master", "spark-worker-1"]
+
+
+def test_planificar_cambios_redimensiona_los_nodos_con_otro_tamanio():
+    existentes = {
+        "spark-master": existente("spark-master", "Master", "Standard_D4s_v3"),
+        "spark-worker-1": existente("spark-worker-1", "Worker", "Standard_D2s_v3"),
+    }
+
+    plan = planificar_cambios(
+        especificaciones(1, tamanio_worker="Standard_D8s_v3"), existentes
+    )
+
+    assert [e["nombre"] for e in plan["redimensionar"]] == ["spark-worker-1"]
+    assert plan["sin_cambios"] == ["spark-master"]
+
+
+def test_planificar_cambios_elimina_los_sobrantes_ordenados_por_tipo_y_nombre():
+    existentes = {
+        nombre: existente(nombre, "Worker", "Standard_D2s_v3")
+        for nombre in ("spark-worker-3", "spark-worker-1", "spark-worker-2")
+    }
+    existentes["spark-master"] = existente("spark-master", "Master", "Standard_D4s_v3")
+    existentes["otro-master"] = existente("otro-master", "Master", "Standard_D4s_v3")
+
+    plan = planificar_cambios(especificaciones(1), existentes)
+
+    assert plan["eliminar"] == ["otro-master", "spark-worker-2", "spark-worker-3"]
+    assert plan["sin_cambios"] == ["spark-master", "spark-worker-1"]